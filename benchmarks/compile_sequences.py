@@ -0,0 +1,178 @@
+"""Build the standard sequences against the recording backend and report their cost.
+
+Every ``_do_*`` sequence of the standard operation classes is built in a fresh
+offline shot (globals from defaults.yml plus the given overrides), with the
+devices created by ``labscriptlib.recording_devices.RecordingBackend``, so this
+runs on any machine with labscript installed, without the lab hardware.
+For each sequence the wall time, the peak memory allocated by Python and the
+number of recorded instructions are reported. Sequences reading globals that are
+only defined in runmanager (not in defaults.yml) need them in ``--globals``.
+
+Usage::
+
+    python -m labscriptlib.benchmarks.compile_sequences [-k PATTERN] [--repeat N]
+        [--globals overrides.yml] [--save results.json] [--compare baseline.json]
+
+The exit code is 1 if any sequence fails to build. With ``--compare``,
+sequences that got slower by more than ``--threshold`` (or now add more
+instructions) are listed, and also make the exit code 1.
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import inspect
+import json
+import logging
+import sys
+import tempfile
+import time
+import traceback
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import yaml
+
+from labscriptlib.clockline_coalescer import coalesce_clocklines
+from labscriptlib.connection_table import devices
+from labscriptlib.output_ledger import prune_redundant_instructions
+from labscriptlib.recording_devices import RecordingBackend
+from labscriptlib.shot_globals import write_offline_shot
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    wall_time: float
+    """Fastest build time over the repeats, in s"""
+    peak_memory: int
+    """Peak memory allocated while building, in bytes"""
+    instructions: int
+    events: int
+    error: str = ''
+
+
+def discover_sequences(pattern: str = '*') -> list[tuple[type, str]]:
+    """``(class, method name)`` of the ``_do_*`` sequences matching ``pattern``, in definition order.
+
+    Some modules read globals when imported, so a shot must be loaded before calling this.
+    """
+    from labscriptlib.standard_operations import (
+        MOTOperations,
+        OpticalPumpingOperations,
+        RydbergOperations,
+        TweezerOperations,
+    )
+
+    sequences = []
+    for cls in (MOTOperations, OpticalPumpingOperations, TweezerOperations, RydbergOperations):
+        for name, member in vars(cls).items():
+            if name.startswith('_do_') and inspect.isfunction(member) and fnmatch.fnmatch(name, pattern):
+                sequences.append((cls, name))
+    return sequences
+
+
+def build_sequence(cls: type, name: str, shot_path: Path, overrides: dict) -> RecordingBackend:
+    """Build one sequence from t = 0 in a new offline shot, returning the backend with the recorded calls."""
+    from labscriptlib.experiment_components.microwaves import SpectrumSegmentCache
+
+    write_offline_shot(shot_path, overrides)
+    backend = RecordingBackend()
+    devices.initialize(backend=backend)
+    t = 0
+    sequence = cls(t)
+    t = getattr(sequence, name)(t)
+    # the spectrum card segments are only sent when the card is reset at the end of a shot
+    if hasattr(sequence, 'Microwave_obj'):
+        sequence.Microwave_obj.reset_spectrum(t)
+    SpectrumSegmentCache.check_flushed()
+    prune_redundant_instructions(devices.built_devices().values())
+    coalesce_clocklines(devices.built_devices().values())
+    return backend
+
+
+def benchmark_sequence(cls: type, name: str, workdir: Path, overrides: dict, repeat: int = 1) -> BenchmarkResult:
+    label = f'{cls.__name__}.{name}'
+    times = []
+    try:
+        for i in range(repeat):
+            shot_path = workdir / f'{label}_{i}.h5'
+            tracemalloc.start()
+            t_start = time.perf_counter()
+            backend = build_sequence(cls, name, shot_path, overrides)
+            times.append(time.perf_counter() - t_start)
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    except Exception as e:
+        tracemalloc.stop()
+        logger.debug(f'{label} failed', exc_info=True)
+        origin = traceback.extract_tb(e.__traceback__)[-1]
+        error = f'{type(e).__name__}: {e} ({Path(origin.filename).name}:{origin.lineno})'
+        return BenchmarkResult(label, float('nan'), 0, 0, 0, error=error)
+    return BenchmarkResult(label, min(times), peak_memory, backend.n_instructions, len(backend.events()))
+
+
+def compare(results: list[BenchmarkResult], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """Descriptions of the results that regressed with respect to ``baseline``."""
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.name)
+        if reference is None or result.error:
+            continue
+        if result.wall_time > threshold * reference['wall_time']:
+            regressions.append(
+                f'{result.name}: {1e3 * result.wall_time:.1f} ms, was {1e3 * reference["wall_time"]:.1f} ms'
+            )
+        if result.instructions > reference['instructions']:
+            regressions.append(
+                f'{result.name}: {result.instructions} instructions, was {reference["instructions"]}'
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-k', '--pattern', default='*', help='glob pattern of the sequence methods to run')
+    parser.add_argument('--repeat', type=int, default=3, help='builds per sequence; the fastest is reported')
+    parser.add_argument('--globals', type=Path, help='YAML file of globals overriding defaults.yml')
+    parser.add_argument('--save', type=Path, help='write the results to this JSON file')
+    parser.add_argument('--compare', type=Path, help='JSON file of earlier results to check for regressions')
+    parser.add_argument('--threshold', type=float, default=1.25, help='slowdown factor counted as a regression')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(stream=sys.stdout, level=logging.WARNING)
+    overrides = yaml.safe_load(args.globals.read_text()) if args.globals else {}
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        write_offline_shot(Path(workdir) / 'import.h5', overrides)
+        for cls, name in discover_sequences(args.pattern):
+            result = benchmark_sequence(cls, name, Path(workdir), overrides, args.repeat)
+            results.append(result)
+            if result.error:
+                print(f'{result.name:<70} FAILED  {result.error}')
+            else:
+                print(
+                    f'{result.name:<70} {1e3 * result.wall_time:9.1f} ms {result.peak_memory / 2**20:8.1f} MiB '
+                    f'{result.instructions:8d} instructions'
+                )
+
+    n_failed = sum(bool(result.error) for result in results)
+    if n_failed:
+        print(f'{n_failed} of {len(results)} sequences failed to build')
+
+    if args.save:
+        args.save.write_text(json.dumps({result.name: asdict(result) for result in results}, indent=2))
+    regressions = []
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+    return int(bool(n_failed or regressions))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,396 @@
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+from importlib import resources as impresources
+from typing import ClassVar, NamedTuple
+
 import numpy as np
+import yaml
+
+import labscriptlib
+
+logger = logging.getLogger(__name__)
+
+CALIBRATION_DIR = impresources.files(labscriptlib) / 'calibration_data'
+"""Fitted coefficient files, as ``<curve name>/v<version>.yml``"""
+
+RELOAD_INTERVAL = 1.0
+"""Minimum time in seconds between checks for new coefficient files"""
+
+
+class CoefficientFile(NamedTuple):
+    path: str
+    version: int
+    mtime_ns: int
+    coefficients: np.ndarray
+
+
+_coefficient_files: dict[str, CoefficientFile] = {}
+
+
+def _versions(name, directory=None):
+    """Paths of the coefficient files of curve ``name`` by version."""
+    curve_dir = os.path.join(directory or CALIBRATION_DIR, name)
+    try:
+        filenames = os.listdir(curve_dir)
+    except FileNotFoundError:
+        return {}
+    versions = {}
+    for filename in filenames:
+        match = re.fullmatch(r'v(\d+)\.yml', filename)
+        if match:
+            versions[int(match.group(1))] = os.path.join(curve_dir, filename)
+    return versions
+
+
+def _file_key(fit_file):
+    return None if fit_file is None else (fit_file.path, fit_file.mtime_ns)
+
+
+def latest_coefficients(name, directory=None):
+    """
+    Coefficients from the most recent fit of curve ``name``.
+
+    Files are only parsed again when a new version appears or the file changes.
+
+    Returns
+    -------
+    CoefficientFile or None
+        None if the curve was never refitted, in which case the coefficients
+        in this module apply.
+    """
+    versions = _versions(name, directory)
+    if not versions:
+        return None
+    version = max(versions)
+    path = versions[version]
+    mtime_ns = os.stat(path).st_mtime_ns
+    cached = _coefficient_files.get(path)
+    if cached is None or cached.mtime_ns != mtime_ns:
+        with open(path) as f:
+            content = yaml.safe_load(f)
+        cached = CoefficientFile(path, version, mtime_ns, np.asarray(content['coefficients'], dtype=float))
+        _coefficient_files[path] = cached
+    return cached
+
+
+@dataclass
+class PolynomialCalibration:
+    """
+    Polynomial calibration curve with a validated input range.
+
+    The polynomial is built once, and both the range check and the evaluation
+    work on whole arrays, so a ramp can push all of its samples through a
+    calibration in a single call.
+
+    At first use, ``interpolate`` and ``inverse`` tabulate the curve densely over
+    its domain and then evaluate by binary search in that table. The curve must
+    be monotonic over the domain to be inverted. ``interpolation_error`` and
+    ``inverse_error`` bound the error of the table.
+
+    ``coefficients`` are the defaults. When ``fit_calibration`` has saved a newer
+    fit for this curve, that fit is used instead. The curve checks for new fits at
+    most every ``RELOAD_INTERVAL``, so runmanager picks up a recalibration without
+    reloading this module.
+
+    Parameters
+    ----------
+    name : str
+        Key of the curve in ``CALIBRATIONS``.
+    coefficients : array_like
+        Polynomial coefficients, highest power first (as returned by ``np.polyfit``).
+    domain : tuple of float
+        Inclusive range of valid inputs.
+    error : type
+        Exception raised for inputs outside ``domain``.
+    message : str
+        Message of that exception.
+    offset : float
+        Offset added to the input before evaluating the polynomial.
+    """
+    name: str
+    coefficients: np.ndarray
+    domain: tuple[float, float]
+    error: type[Exception]
+    message: str
+    offset: float = 0
+
+    TABLE_SIZE: ClassVar[int] = 4097
+    """Number of points in the lookup tables"""
+
+    def __post_init__(self):
+        self.coefficients = np.asarray(self.coefficients, dtype=float)
+        self.polynomial = np.poly1d(self.coefficients)
+        self.default_coefficients = self.coefficients
+        self.fit_file: CoefficientFile | None = None
+        self._checked_at = -np.inf
+        CALIBRATIONS[self.name] = self
+
+    def refresh(self, force=False):
+        """Switch to the latest saved fit of this curve, if it changed."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < RELOAD_INTERVAL:
+            return
+        self._checked_at = now
+        fit_file = latest_coefficients(self.name)
+        if _file_key(fit_file) == _file_key(self.fit_file):
+            return
+        self.fit_file = fit_file
+        if fit_file is None:
+            self.coefficients = self.default_coefficients
+        else:
+            logger.info(f'{self.name} calibration: using coefficients from {fit_file.path}')
+            self.coefficients = fit_file.coefficients
+        self.polynomial = np.poly1d(self.coefficients)
+        for table in ('_forward_table', '_inverse_table', 'interpolation_error', 'inverse_error'):
+            self.__dict__.pop(table, None)
+
+    def check_domain(self, x):
+        x = np.asarray(x)
+        low, high = self.domain
+        # written so that NaN fails the check as well
+        if not np.all((x >= low) & (x <= high)):
+            if x.ndim == 0:
+                raise self.error(self.message)
+            raise self.error(f'{self.message}, got values in [{np.nanmin(x)}, {np.nanmax(x)}]')
+
+    def __call__(self, x):
+        self.refresh()
+        self.check_domain(x)
+        return self.polynomial(np.asarray(x) + self.offset)
+
+    def interpolate(self, x):
+        """Evaluate the curve from the lookup table, see ``interpolation_error``."""
+        self.refresh()
+        self.check_domain(x)
+        inputs, outputs = self._forward_table
+        return np.interp(x, inputs, outputs)
+
+    def inverse(self, y):
+        """Input that the curve maps to ``y``, e.g. the detuning for a VCO voltage."""
+        self.refresh()
+        outputs, inputs = self._inverse_table
+        y = np.asarray(y)
+        if not np.all((y >= outputs[0]) & (y <= outputs[-1])):
+            raise self.error(
+                f'{self.name} calibration output must be within [{outputs[0]}, {outputs[-1]}]'
+            )
+        return np.interp(y, outputs, inputs)
+
+    @cached_property
+    def interpolation_error(self) -> float:
+        """Maximum error of ``interpolate``, in output units."""
+        inputs, outputs = self._forward_table
+        midpoints = (inputs[1:] + inputs[:-1]) / 2
+        exact = self.polynomial(midpoints + self.offset)
+        return float(np.max(np.abs(exact - (outputs[1:] + outputs[:-1]) / 2)))
+
+    @cached_property
+    def inverse_error(self) -> float:
+        """Maximum error of ``inverse``, in input units."""
+        inputs, _ = self._forward_table
+        midpoints = (inputs[1:] + inputs[:-1]) / 2
+        outputs, table_inputs = self._inverse_table
+        roundtrip = np.interp(self.polynomial(midpoints + self.offset), outputs, table_inputs)
+        return float(np.max(np.abs(roundtrip - midpoints)))
+
+    @cached_property
+    def _forward_table(self) -> tuple[np.ndarray, np.ndarray]:
+        inputs = np.linspace(*self.domain, self.TABLE_SIZE)
+        return inputs, self.polynomial(inputs + self.offset)
+
+    @cached_property
+    def _inverse_table(self) -> tuple[np.ndarray, np.ndarray]:
+        """The forward table sorted by output, for ``np.interp``."""
+        inputs, outputs = self._forward_table
+        steps = np.diff(outputs)
+        if np.all(steps < 0):
+            return outputs[::-1].copy(), inputs[::-1].copy()
+        if not np.all(steps > 0):
+            raise ValueError(
+                f'{self.name} calibration is not monotonic over {self.domain} and cannot be inverted'
+            )
+        return outputs, inputs
+
+
+CALIBRATIONS: dict[str, PolynomialCalibration] = {}
+"""Registry of the polynomial calibration curves by name"""
+
+
+@dataclass
+class CalibrationFit:
+    """
+    Polynomial fit of calibration measurements, see ``fit_calibration``.
+
+    Attributes
+    ----------
+    name : str
+        Name of the fitted curve in ``CALIBRATIONS``.
+    coefficients : ndarray
+        Fitted coefficients, highest power first.
+    inputs, outputs : ndarray
+        The measurements, in the units of the polynomial argument and value.
+    notes : str
+        Free-form description saved with the fit.
+    """
+    name: str
+    coefficients: np.ndarray
+    inputs: np.ndarray
+    outputs: np.ndarray
+    notes: str = ''
+
+    @property
+    def residuals(self):
+        return self.outputs - np.polyval(self.coefficients, self.inputs)
+
+    @property
+    def rms_residual(self):
+        return float(np.sqrt(np.mean(self.residuals**2)))
+
+    @property
+    def max_residual(self):
+        return float(np.max(np.abs(self.residuals)))
+
+    def report(self):
+        lines = [
+            f'{self.name}: degree {len(self.coefficients) - 1} fit to {len(self.inputs)} points',
+            f'  coefficients: {self.coefficients!r}',
+            f'  residuals: rms {self.rms_residual:.4g}, max {self.max_residual:.4g}',
+        ]
+        worst = np.argsort(np.abs(self.residuals))[::-1][:3]
+        lines += [
+            f'  at {self.inputs[i]:.6g}: measured {self.outputs[i]:.6g}, residual {self.residuals[i]:+.4g}'
+            for i in worst
+        ]
+        return '\n'.join(lines)
+
+    def save(self, directory=None):
+        """
+        Write the fit as the next version of the curve's coefficient file.
+
+        Returns
+        -------
+        str
+            Path of the new file.
+        """
+        versions = _versions(self.name, directory)
+        version = max(versions, default=0) + 1
+        curve_dir = os.path.join(directory or CALIBRATION_DIR, self.name)
+        os.makedirs(curve_dir, exist_ok=True)
+        path = os.path.join(curve_dir, f'v{version:03d}.yml')
+        content = {
+            'name': self.name,
+            'version': version,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'notes': self.notes,
+            'coefficients': self.coefficients.tolist(),
+            'rms_residual': self.rms_residual,
+            'max_residual': self.max_residual,
+            'data': {'inputs': self.inputs.tolist(), 'outputs': self.outputs.tolist()},
+        }
+        # write the whole file before it becomes visible to running shots
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            yaml.safe_dump(content, f, sort_keys=False)
+        os.replace(tmp_path, path)
+        logger.info(f'saved {self.name} calibration version {version} to {path}')
+        return path
+
+
+def fit_calibration(name, inputs, outputs, degree=6, notes=''):
+    """
+    Fit a polynomial to calibration measurements of curve ``name``.
+
+    Raises when most measurements lie outside the domain of the curve (e.g.
+    inputs in the wrong units), and warns when they do not cover the domain, or
+    when the fit is not monotonic there. Call ``save()`` on the result to use it
+    in subsequent shots.
+
+    Parameters
+    ----------
+    name : str
+        Name of the curve in ``CALIBRATIONS``.
+    inputs, outputs : array_like
+        Measured polynomial argument (e.g. optical frequency) and value (e.g.
+        control voltage).
+    degree : int
+        Degree of the polynomial.
+    notes : str
+        Description saved with the fit, e.g. what was measured and how.
+
+    Returns
+    -------
+    CalibrationFit
+    """
+    if name not in CALIBRATIONS:
+        raise ValueError(f'Unknown calibration {name!r}, expected one of {sorted(CALIBRATIONS)}')
+    inputs = np.asarray(inputs, dtype=float)
+    outputs = np.asarray(outputs, dtype=float)
+    if inputs.shape != outputs.shape or inputs.ndim != 1:
+        raise ValueError('Calibration inputs and outputs must be 1D arrays of the same length')
+    if len(inputs) <= degree:
+        raise ValueError(f'Need more than {degree} points for a degree {degree} fit, got {len(inputs)}')
+
+    curve = CALIBRATIONS[name]
+    low, high = np.asarray(curve.domain) + curve.offset
+    margin = 1e-9 * (high - low)
+    n_outside = np.count_nonzero((inputs < low - margin) | (inputs > high + margin))
+    if n_outside > len(inputs) / 2:
+        raise ValueError(
+            f'{name}: {n_outside} of {len(inputs)} measurements lie outside the domain '
+            f'[{low:.6g}, {high:.6g}] of the curve, are the inputs in the right units?'
+        )
+
+    fit = CalibrationFit(name, np.polyfit(inputs, outputs, degree), inputs, outputs, notes)
+    if inputs.min() > low or inputs.max() < high:
+        logger.warning(
+            f'{name}: measurements span [{inputs.min():.6g}, {inputs.max():.6g}], '
+            f'the fit is extrapolated over the domain [{low:.6g}, {high:.6g}]'
+        )
+    steps = np.diff(np.polyval(fit.coefficients, np.linspace(low, high, curve.TABLE_SIZE)))
+    if not (np.all(steps > 0) or np.all(steps < 0)):
+        logger.warning(f'{name}: fit is not monotonic over [{low:.6g}, {high:.6g}]')
+    return fit
+
+
+# f = np.poly1d(np.array([
+#     1.09188604e-15,
+#     1.23734055e-12,
+#     4.72307811e-10,
+#     1.31827284e-08,
+#    -1.21333912e-05,
+#    -1.42724971e-02,
+#    1.69243194e+00
+# ]))
+
+# 2024/01/04
+# f = np.poly1d(np.array([1.69904275e-15,
+#                         1.86873771e-12,
+#                         6.70317726e-10,
+#                         2.33845162e-08,
+#                         -1.52527834e-05,
+#                         -1.44239092e-02,
+#                         1.70416960e+00]))
+
+# 2024/11/11
+TA_FREQ = PolynomialCalibration(
+    'ta_freq',
+    [1.29077826e-15,
+     1.38450146e-12,
+     4.77126509e-10,
+     -1.66416905e-09,
+     -1.31919006e-05,
+     -1.39610019e-02,
+     1.67363876e+00],
+    domain=(-438, 121),
+    error=ValueError,
+    message="TA frequency detuning must be within [-438, 121] MHz",
+    offset=3,  # 10 # -6 # MHz measued using 0.1V ta AOM atom imaging response
+)
 
 
 def ta_freq_calib(detuning_mhz):
@@ -16,44 +408,15 @@ def ta_freq_calib(detuning_mhz):
     voltage
         Control voltage needed to produce desired optical frequency.
     '''
-    if not (-438 <= detuning_mhz <= 121):
-        raise ValueError("TA frequency detuning must be within [-438, 121] MHz")
-
-
-    # f = np.poly1d(np.array([
-    #     1.09188604e-15,
-    #     1.23734055e-12,
-    #     4.72307811e-10,
-    #     1.31827284e-08,
-    #    -1.21333912e-05,
-    #    -1.42724971e-02,
-    #    1.69243194e+00
-    # ]))
-
-    # 2024/01/04
-    # f = np.poly1d(np.array([1.69904275e-15,
-    #                         1.86873771e-12,
-    #                         6.70317726e-10,
-    #                         2.33845162e-08,
-    #                         -1.52527834e-05,
-    #                         -1.44239092e-02,
-    #                         1.70416960e+00]))
-
-    # 2024/11/11
-    f = np.poly1d(np.array([1.29077826e-15,
-                            1.38450146e-12,
-                            4.77126509e-10,
-                            -1.66416905e-09,
-                            -1.31919006e-05,
-                            -1.39610019e-02,
-                            1.67363876e+00]))
-
-    off_set_freq = 3 #10 #-6 # MHz measued using 0.1V ta AOM atom imaging response
-
-    return f(detuning_mhz + off_set_freq)
-
-
-def generate_ta_freq_calib_coeff():
+    return TA_FREQ(detuning_mhz)
+
+
+def ta_freq_from_voltage(voltage):
+    """Inverse of ``ta_freq_calib``: the TA detuning in MHz set by a VCO control voltage."""
+    return TA_FREQ.inverse(voltage)
+
+
+def generate_ta_freq_calib_coeff(save=False):
     ta_voltage = np.array([
         1.825,
         1.5,
@@ -172,34 +535,43 @@ def generate_ta_freq_calib_coeff():
     threefive_crossover_freq_mhz = 38 - 264  # relative to 4 -> 5 transition
     ta_freq_mhz = threefive_crossover_freq_mhz + reflaser_doublepass_freq_mhz + ta_switch_aom_freq_mhz - beat_note
 
-    coeff = np.polyfit(ta_freq_mhz, ta_voltage, 6)  # fitted to the 6th order
-    print(repr(coeff))
+    fit = fit_calibration('ta_freq', ta_freq_mhz, ta_voltage, notes='TA beat note vs VCO voltage')  # fitted to the 6th order
+    print(fit.report())
+    if save:
+        fit.save()
+    return fit
+
+
+# this detuning is relative to F = 3 -> F' = 4 tranisition
+# f = np.poly1d(np.array([ 3.05390232e-14,  2.18562217e-11,  5.45062179e-09,  4.01536932e-07,
+#    -3.64452729e-05, -3.21551810e-02,  2.24658348e+00]))
+
+#20241112
+REPUMP_FREQ = PolynomialCalibration(
+    'repump_freq',
+    [2.93833235e-14,
+     2.12699651e-11,
+     5.39636666e-09,
+     4.15169376e-07,
+     -3.41448762e-05,
+     -3.21482962e-02,
+     2.21019254e+00],
+    domain=(-275, 76),
+    error=RuntimeError,
+    message="Repump frequency detuning must be in the range of (-275MHz, 76MHz)",
+)
 
 
 def repump_freq_calib(detuning_mhz):
-    # this detuning is relative to F = 3 -> F' = 4 tranisition
-    # f = np.poly1d(np.array([ 3.05390232e-14,  2.18562217e-11,  5.45062179e-09,  4.01536932e-07,
-    #    -3.64452729e-05, -3.21551810e-02,  2.24658348e+00]))
+    return REPUMP_FREQ(detuning_mhz)
 
-    #20241112
-    f = np.poly1d(np.array([2.93833235e-14,
-                            2.12699651e-11,
-                            5.39636666e-09,
-                            4.15169376e-07,
-                            -3.41448762e-05,
-                            -3.21482962e-02,
-                            2.21019254e+00]))
 
+def repump_freq_from_voltage(voltage):
+    """Inverse of ``repump_freq_calib``: the repump detuning in MHz set by a VCO control voltage."""
+    return REPUMP_FREQ.inverse(voltage)
 
-    if (detuning_mhz < -275 or detuning_mhz > 76):
-        raise RuntimeError("Repump frequency detuning must be in the range of (-275MHz, 76MHz)")
-    else:
-        voltage = f(detuning_mhz)
 
-    return voltage
-
-
-def generate_repump_freq_calib_coeff():
+def generate_repump_freq_calib_coeff(save=False):
     repump_voltage = np.array([2.3,2,1,0,3,4,5,6,7,8,9,10]) # Volts
 
     # beat_note = np.array([
@@ -234,8 +606,11 @@ def generate_repump_freq_calib_coeff():
     ]) # Measured with frequency counter
     repump_frequency = -9.192e3 + 38 - 13 + 80 - (beat_note - 9.486e3) # MHz frequency relative to F = 3 -> F' = 4 transition 13 MHz, 3/5 cross over 38MHz, Switch AOM 80 MHz, 6S1/2 hyperfine splitting -9.192e3, LO = 9.486e3
 
-    coeff = np.polyfit(repump_frequency, repump_voltage, 6) # fitted to the 6th order
-    print(repr(coeff))
+    fit = fit_calibration('repump_freq', repump_frequency, repump_voltage, notes='repump beat note vs VCO voltage') # fitted to the 6th order
+    print(fit.report())
+    if save:
+        fit.save()
+    return fit
 
 def spec_freq_calib(mw_detuning):
     """ convert microwave detuning to spectrum card frequency """
@@ -292,20 +667,26 @@ def Ez_calib(shift):
     return voltage
 
 
-def tweezer_power_calib(power_W):
-    f = np.poly1d(np.array([-3.69348513e+00,  2.31281736e+01, -4.15014983e+01,  3.26061566e+01,
-       -1.20376660e+01,  2.30540602e+00,  3.74047483e-02]))
+TWEEZER_POWER = PolynomialCalibration(
+    'tweezer_power',
+    [-3.69348513e+00,  2.31281736e+01, -4.15014983e+01,  3.26061566e+01,
+     -1.20376660e+01,  2.30540602e+00,  3.74047483e-02],
+    domain=(0, 1),
+    error=RuntimeError,
+    message="Power must be in the range of (0, 1)",
+)
+
 
+def tweezer_power_calib(power_W):
+    return TWEEZER_POWER(power_W)
 
-    if (power_W < 0 or power_W > 1):
-        raise RuntimeError("Power must be in the range of (0, 1)")
-    else:
-        voltage = f(power_W)
 
-    return voltage
+def tweezer_power_from_voltage(voltage):
+    """Inverse of ``tweezer_power_calib``."""
+    return TWEEZER_POWER.inverse(voltage)
 
 
-def generate_tweezer_power_calib_coeff():
+def generate_tweezer_power_calib_coeff(save=False):
     power = np.array([
         6.5,
         6.54,
@@ -345,45 +726,55 @@ def generate_tweezer_power_calib_coeff():
     ]) # voltage
 
 
-    coeff = np.polyfit(power, voltage, 6) # fitted to the 6th order
-    print(repr(coeff))
-
+    # the curve takes the power relative to the maximum
+    fit = fit_calibration(
+        'tweezer_power',
+        power / power.max(),
+        voltage,
+        notes=f'tweezer power relative to {power.max()} W vs AOM voltage',
+    ) # fitted to the 6th order
+    print(fit.report())
+    if save:
+        fit.save()
+    return fit
+
+
+
+TA_AOM = PolynomialCalibration(
+    'ta_aom',
+    [11.80562729,
+     -22.27668541,
+     8.40931054,
+     6.91228052,
+     -5.98887408,
+     2.0012694 ,
+     0.0467131 ],
+    domain=(0, 1),
+    error=ValueError,
+    message="TA relative power must be within [0, 1]",
+)
+
+REPUMP_AOM = PolynomialCalibration(
+    'repump_aom',
+    [-4.37130432,
+     21.73516051,
+     -35.6730173 ,
+     26.8234801 ,
+     -10.09196713,
+     2.43904316,
+     0.05066173],
+    domain=(0, 1),
+    error=ValueError,
+    message="repump relative power must be within [0, 1]",
+)
 
 
 def ta_aom_calib(power):
-
-    if not (0 <= power <= 1):
-        raise ValueError("TA relative power must be within [0, 1]")
-
-
-    f = np.poly1d(np.array([
-         11.80562729,
-         -22.27668541,
-         8.40931054,
-         6.91228052,
-        -5.98887408,
-        2.0012694 ,
-        0.0467131 ]))
-
-    return f(power)
+    return TA_AOM(power)
 
 
 def repump_aom_calib(power):
-
-    if not (0 <= power <= 1):
-        raise ValueError("repump relative power must be within [0, 1]")
-
-
-    f = np.poly1d(np.array([
-        -4.37130432,
-        21.73516051,
-        -35.6730173 ,
-        26.8234801 ,
-       -10.09196713,
-       2.43904316,
-       0.05066173]))
-
-    return f(power)
+    return REPUMP_AOM(power)
 
 def img_z_ta_calib(power):
     #input: optical power, output: the AOM voltage at this optical power
@@ -0,0 +1,154 @@
+"""Merging of near-simultaneous updates on a clock line onto shared ticks.
+
+All outputs of the cards on a clock line (e.g. the NI 6739 analog outputs on
+``clockline_6739``) update on the ticks of that clock line, and two ticks must be
+at least ``1 / clock_limit`` apart. Updates of different channels a few
+microseconds apart, like an AOM amplitude set just before a pulse while another
+channel changes, therefore fail the compilation, and sequences have worked
+around that with hand-tuned offsets (``aom_analog_ctrl_anticipation`` in the
+Rydberg pulses).
+
+Here updates declare by how much they may be moved, either per call
+(``movable_constant``) or per output. Just before ``labscript.stop``,
+``coalesce_clocklines`` finds the groups of updates on each clock line that are
+closer together than its minimum interval and moves each group onto one shared
+tick, within the tolerances of its updates. Updates without a tolerance and the
+start and end of ramps are never moved. A group that cannot share a tick within
+the tolerances raises a ValueError naming its updates.
+
+So far only the AOM amplitude writes of ``RydLasers.do_rydberg_multipulses`` and
+``RydLasers.do_rydberg_pulse_short`` declare tolerances. All other updates, e.g.
+those of the D2 AOMs and the MOT, keep their times.
+"""
+from __future__ import annotations
+
+import logging
+import weakref
+from collections import defaultdict
+from typing import Any, Iterable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# per output: instruction time -> tolerance declared with movable_constant. Outputs
+# are created anew for every shot, so the entries go away with them.
+_declared_tolerances: weakref.WeakKeyDictionary[Any, dict[float, float]] = weakref.WeakKeyDictionary()
+
+
+def movable_constant(output, t: float, value: float, tolerance: float, units=None) -> None:
+    """``output.constant(t, value)``, which may be moved by up to ``tolerance`` to share a clock tick."""
+    if tolerance < 0:
+        raise ValueError(f'Tolerance must be nonnegative, got {tolerance}')
+    output.constant(t, value, units=units)
+    _declared_tolerances.setdefault(output, {})[round(t, 10)] = tolerance
+
+
+def coalesce(outputs: Iterable[Any], min_interval: float, tolerances: dict[str, float] | None = None) -> dict[str, int]:
+    """Move the updates of ``outputs``, all on one clock line, onto ticks ``min_interval`` apart.
+
+    Parameters
+    ----------
+    outputs : iterable
+        Outputs on the clock line, with labscript instruction tables.
+    min_interval : float
+        Minimum time between two ticks of the clock line.
+    tolerances : dict, optional
+        Maximum shift of the updates of an output, by output name, for updates
+        without a tolerance of their own. Outputs not listed are not moved.
+
+    Returns
+    -------
+    dict
+        Number of moved updates per output name, for outputs that had any.
+    """
+    outputs = list(outputs)
+    tolerances = tolerances or {}
+    # smallest tolerance of the updates at each time, and who updates then
+    time_tolerances: dict[float, float] = {}
+    names: dict[float, list[str]] = defaultdict(list)
+    ramps = []
+    for output in outputs:
+        declared = _declared_tolerances.get(output, {})
+        default = tolerances.get(output.name, 0)
+        for t, instruction in output.instructions.items():
+            if isinstance(instruction, dict):
+                ramps.append((instruction['initial time'], instruction['end time']))
+                fixed_times = (t, round(instruction['end time'], 10))
+                time_tolerances.update(dict.fromkeys(fixed_times, 0))
+                for t_fixed in fixed_times:
+                    names[t_fixed].append(output.name)
+            else:
+                tolerance = declared.get(t, default)
+                time_tolerances[t] = min(time_tolerances.get(t, tolerance), tolerance)
+                names[t].append(output.name)
+    if len(time_tolerances) < 2:
+        return {}
+
+    times = np.array(sorted(time_tolerances))
+    tols = np.array([time_tolerances[t] for t in times])
+    for start, end in ramps:
+        tols[(times > start) & (times < end)] = 0
+
+    ticks = {}
+    # groups of updates each closer than min_interval to the previous one
+    breaks = np.flatnonzero(np.diff(times) >= min_interval - 1e-12) + 1
+    for group in np.split(np.arange(len(times)), breaks):
+        if len(group) < 2 or not tols[group].any():
+            # nothing to move; labscript reports fixed updates that are too close
+            continue
+        group_times = times[group]
+        earliest = (group_times - tols[group]).max()
+        latest = (group_times + tols[group]).min()
+        if earliest > latest + 1e-12:
+            updates = ', '.join(f'{"/".join(names[t])} at {t}' for t in group_times)
+            raise ValueError(
+                f'Updates closer than the minimum clock line interval of {min_interval} s cannot be '
+                f'moved onto one tick within their tolerances: {updates}'
+            )
+        # the tick within the tolerances moving the updates the least
+        tick = round(float(np.clip((group_times[0] + group_times[-1]) / 2, earliest, latest)), 10)
+        ticks.update((float(t), tick) for t in group_times if t != tick)
+
+    moved = {}
+    for output in outputs:
+        instructions = output.instructions
+        to_move = [t for t in instructions if t in ticks and not isinstance(instructions[t], dict)]
+        for t in to_move:
+            value = instructions.pop(t)
+            tick = ticks[t]
+            if instructions.get(tick, value) != value:
+                raise ValueError(
+                    f'{output.name}: updates at {t} and {tick} would share a clock tick with different values'
+                )
+            instructions[tick] = value
+        if to_move:
+            moved[output.name] = len(to_move)
+    return moved
+
+
+def coalesce_clocklines(outputs: Iterable[Any], tolerances: dict[str, float] | None = None) -> dict[str, int]:
+    """Coalesce the updates of ``outputs`` on each of their clock lines, see ``coalesce``.
+
+    Outputs are grouped by the parent of their parent device, if it has a
+    ``clock_limit``: the clock line of the card of an output. The pulseblaster
+    direct outputs are grouped as well, on the internal clock line of the
+    pulseblaster (or the pulseblaster itself with the recording backend), whose
+    much shorter minimum interval only merges updates a few tens of nanoseconds
+    apart. Outputs whose grandparent has no ``clock_limit`` are skipped.
+    """
+    by_clockline = defaultdict(list)
+    for output in outputs:
+        if not isinstance(getattr(output, 'instructions', None), dict):
+            continue
+        clockline = getattr(getattr(output, 'parent_device', None), 'parent_device', None)
+        if getattr(clockline, 'clock_limit', None):
+            by_clockline[clockline].append(output)
+
+    moved = {}
+    for clockline, clockline_outputs in by_clockline.items():
+        clockline_moved = coalesce(clockline_outputs, 1 / clockline.clock_limit, tolerances)
+        if clockline_moved:
+            logger.info(f'{clockline.name}: moved {sum(clockline_moved.values())} updates onto shared ticks')
+        moved |= clockline_moved
+    return moved
@@ -0,0 +1,32 @@
+"""Shot file for the tests.
+
+Several modules read globals when they are imported (``spectrum_manager`` reads
+``TW_y_use_dds``, ...), so a shot with the default globals is loaded before the
+test modules are collected. Each test then gets a fresh shot of its own.
+"""
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from labscriptlib.shot_globals import write_offline_shot
+
+_collection_dir = None
+
+
+def pytest_configure(config):
+    global _collection_dir
+    _collection_dir = tempfile.mkdtemp(prefix='labscriptlib-tests-')
+    write_offline_shot(Path(_collection_dir) / 'collection.h5')
+
+
+def pytest_unconfigure(config):
+    if _collection_dir is not None:
+        shutil.rmtree(_collection_dir, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def offline_shot(tmp_path):
+    """Path of a shot with the default globals, loaded for the duration of the test."""
+    return write_offline_shot(tmp_path / 'shot.h5')
@@ -1,21 +1,116 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Callable
+
 import labscript
-import labscript_devices as labscript_devices
-import labscript_devices.FunctionRunner
-import labscript_devices.FunctionRunner.labscript_devices
-from labscript import AnalogIn, AnalogOut, ClockLine, DigitalOut, Shutter
-from labscript_devices.NI_DAQmx.models.NI_PXIe_6363 import NI_PXIe_6363
-from labscript_devices.PulseBlasterESRPro500 import PulseBlasterESRPro500
-from labscript_devices.PrawnBlaster.labscript_devices import PrawnBlaster
-from user_devices.DDS.AD9914 import AD9914
-
-from user_devices.DDS.AD_DDS import AD_DDS
-# from user_devices.spcm.Spectrum_sequence import Spectrum # Use Spectrum.py for when we don't run tweezers or when we run sequence mode. This is the old Spectrum.py code before we added fifo capability
-from user_devices.spcm.Spectrum import Spectrum # Use Spectrum.py for fifo mode or sequence mode. This doesn't work when we don't run tweezers.
-# TODO need to fix the issues in Spectrum for it to be able to run when we don't assign any waveform to specturm card
-
-from user_devices.manta419b.manta419b import Manta419B  # noqa:F401
-from user_devices.kinetix.Kinetix import Kinetix  # noqa:F401
-from user_devices.NI_PXIe_6739 import NI_PXIe_6739
+
+
+def hardware_backend() -> SimpleNamespace:
+    """Device classes of the lab hardware.
+
+    Imported only when the connection table is built with them, so that the
+    sequences can also be built with another backend (see
+    labscriptlib.recording_devices) on machines without the device drivers.
+    """
+    import labscript_devices.FunctionRunner.labscript_devices  # noqa:F401
+    from labscript import AnalogIn, AnalogOut, ClockLine, DigitalOut, Shutter
+    from labscript_devices.NI_DAQmx.models.NI_PXIe_6363 import NI_PXIe_6363
+    from labscript_devices.PulseBlasterESRPro500 import PulseBlasterESRPro500
+    from labscript_devices.PrawnBlaster.labscript_devices import PrawnBlaster
+    from user_devices.DDS.AD9914 import AD9914
+
+    from user_devices.DDS.AD_DDS import AD_DDS
+    # from user_devices.spcm.Spectrum_sequence import Spectrum # Use Spectrum.py for when we don't run tweezers or when we run sequence mode. This is the old Spectrum.py code before we added fifo capability
+    from user_devices.spcm.Spectrum import Spectrum # Use Spectrum.py for fifo mode or sequence mode. This doesn't work when we don't run tweezers.
+    # TODO need to fix the issues in Spectrum for it to be able to run when we don't assign any waveform to specturm card
+
+    from user_devices.manta419b.manta419b import Manta419B
+    from user_devices.kinetix.Kinetix import Kinetix
+    from user_devices.NI_PXIe_6739 import NI_PXIe_6739
+
+    return SimpleNamespace(
+        AnalogIn=AnalogIn,
+        AnalogOut=AnalogOut,
+        ClockLine=ClockLine,
+        DigitalOut=DigitalOut,
+        Shutter=Shutter,
+        NI_PXIe_6363=NI_PXIe_6363,
+        PulseBlasterESRPro500=PulseBlasterESRPro500,
+        PrawnBlaster=PrawnBlaster,
+        AD9914=AD9914,
+        AD_DDS=AD_DDS,
+        Spectrum=Spectrum,
+        Manta419B=Manta419B,
+        Kinetix=Kinetix,
+        NI_PXIe_6739=NI_PXIe_6739,
+    )
+
+
+class DeviceSpec:
+    """A device of the connection table: its class and constructor arguments.
+
+    Arguments referring to other devices are ``DeviceSpec``s or ``DeviceAttribute``s
+    (e.g. ``pb.pseudoclock``), resolved to the built devices when this one is built.
+    """
+
+    def __init__(self, class_name: str, args: tuple, kwargs: dict[str, Any]):
+        self.class_name = class_name
+        self.args = args
+        self.kwargs = kwargs
+
+    def __getattr__(self, name: str) -> DeviceAttribute:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return DeviceAttribute(self, name)
+
+
+@dataclass(frozen=True)
+class DeviceAttribute:
+    spec: DeviceSpec
+    name: str
+
+
+class _SpecRecorder:
+    """Stands in for a backend in LabDevices._declare, recording specs instead of creating devices."""
+
+    def __init__(self):
+        self.specs: list[DeviceSpec] = []
+
+    def __getattr__(self, class_name: str) -> Callable[..., DeviceSpec]:
+        if class_name.startswith('_'):
+            raise AttributeError(class_name)
+
+        def record(*args, **kwargs) -> DeviceSpec:
+            spec = DeviceSpec(class_name, args, kwargs)
+            self.specs.append(spec)
+            return spec
+        return record
+
+
+# classes of the outputs declared together with their card, see LabDevices.initialize
+_CARD_OUTPUT_CLASSES = ('AnalogOut', 'DigitalOut', 'Shutter')
+
+# (named specs, all specs in declaration order), recorded once per process
+_connection_table_specs: tuple[dict[str, DeviceSpec], list[DeviceSpec]] | None = None
+
+
+def connection_table_specs() -> tuple[dict[str, DeviceSpec], list[DeviceSpec]]:
+    """Specs of the devices declared in LabDevices._declare.
+
+    Returns the specs of the devices available as attributes of ``devices``, by
+    name, and the specs of all devices (including the clock lines and NI cards)
+    in the order they are declared.
+    """
+    global _connection_table_specs
+    if _connection_table_specs is None:
+        recorder = _SpecRecorder()
+        table = LabDevices()
+        table._declare(recorder)
+        _connection_table_specs = (dict(vars(table)), recorder.specs)
+    return _connection_table_specs
+
 
 # please name devices with lower_case_with_underscores (uwave_absorp_switch)
 # NOT Capitalized_Words_With_Underscores
@@ -25,26 +120,121 @@ class LabDevices():
         pass
 
     def __getattr__(self, name):
-        raise AttributeError(f'Device {name} not defined. Did you forget to call initialize()?')
+        # only called for devices not built yet
+        specs = vars(self).get('_specs')
+        if specs is None:
+            raise AttributeError(f'Device {name} not defined. Did you forget to call initialize()?')
+        if name not in specs:
+            raise AttributeError(f'Device {name} not defined in the connection table')
+        return self._build(specs[name])
 
     def initialized(self) -> bool:
         return hasattr(self, 'pb')
 
-    def initialize(self):
+    def reset(self) -> None:
+        """Forget the devices, before building the next shot in the same process."""
+        vars(self).clear()
+
+    def initialize(self, backend=None, lazy=True):
+        """Create the devices.
+
+        Parameters
+        ----------
+        backend: optional
+            Namespace of the device classes to build the devices from, e.g. a
+            labscriptlib.recording_devices.RecordingBackend. Defaults to the
+            lab hardware (hardware_backend()).
+        lazy: bool
+            Only build the pulseblaster now (``labscript.start()`` needs the master
+            pseudoclock), and every other device, with the clock lines and cards it
+            depends on, when it is first accessed. Shots using a few channels then
+            do not build the whole connection table. With ``lazy=False`` all
+            devices are built now, in the order they are declared, as needed to
+            compile the connection table itself.
+
+        BLACS leaves the channels of an NI card that a shot does not declare in
+        their manual front panel state. So that every shot drives all channels of
+        the cards it uses (to 0 if unused), building a card also builds all analog
+        and digital outputs and shutters declared on it. Devices a lazy shot never
+        accesses are left out of the shot altogether and keep their manual state
+        in BLACS: cards none of whose channels are used (all channels of the NI
+        6739 when no analog output is used), the DDSs, the spectrum cards and the
+        cameras. Pulseblaster flags not declared in a shot are low.
+        """
         print('Initializing connection table')
-
-        pb = PulseBlasterESRPro500(name='pb', board_number=0)
+        if backend is None:
+            backend = hardware_backend()
+        self.reset()
+        self._specs, all_specs = connection_table_specs()
+        self._names = {spec: name for name, spec in self._specs.items()}
+        self._card_outputs: dict[DeviceSpec, list[DeviceSpec]] = {}
+        for spec in all_specs:
+            card = spec.kwargs.get('parent_device')
+            if spec.class_name in _CARD_OUTPUT_CLASSES and isinstance(card, DeviceSpec):
+                self._card_outputs.setdefault(card, []).append(spec)
+        self._backend = backend
+        self._built: dict[DeviceSpec, Any] = {}
+        self._build_hooks: list[Callable[[str, Any], None]] = []
+
+        for spec in [self._specs['pb']] if lazy else all_specs:
+            self._build(spec)
+
+    def built_devices(self) -> dict[str, Any]:
+        """Devices built so far, by name."""
+        return {name: vars(self)[name] for name in vars(self).get('_specs', ()) if name in vars(self)}
+
+    def add_build_hook(self, hook: Callable[[str, Any], None]) -> None:
+        """Call ``hook(name, device)`` for every device built from now on, until the next initialize()."""
+        self._build_hooks.append(hook)
+
+    def _build(self, spec: DeviceSpec):
+        if spec in self._built:
+            return self._built[spec]
+        args = self._resolve(spec.args)
+        kwargs = self._resolve(spec.kwargs)
+        # building the card of an output builds the output as well
+        if spec in self._built:
+            return self._built[spec]
+
+        device = getattr(self._backend, spec.class_name)(*args, **kwargs)
+        self._built[spec] = device
+        name = self._names.get(spec)
+        if name is not None:
+            setattr(self, name, device)
+            for hook in self._build_hooks:
+                hook(name, device)
+        for output in self._card_outputs.get(spec, ()):
+            self._build(output)
+        return device
+
+    def _resolve(self, value):
+        if isinstance(value, DeviceSpec):
+            return self._build(value)
+        if isinstance(value, DeviceAttribute):
+            return getattr(self._build(value.spec), value.name)
+        if isinstance(value, dict):
+            return {key: self._resolve(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return type(value)(self._resolve(item) for item in value)
+        return value
+
+    def _declare(self, backend):
+        """The connection table: every device, created from ``backend``.
+
+        Run once per process with a recording backend, see connection_table_specs().
+        """
+        pb = backend.PulseBlasterESRPro500(name='pb', board_number=0)
         self.pb = pb
         # pb = PrawnBlaster(name='pb', com_port='COM4', num_pseudoclocks=2)
 
-        clockline_6363 = ClockLine(
+        clockline_6363 = backend.ClockLine(
             name='clockline_6363',
             pseudoclock=pb.pseudoclock,
             connection='flag 16',
         )
         # clockline_6363 = pb.clocklines[0] # for PrawnBlaster
 
-        ni_6363_0 = NI_PXIe_6363(
+        ni_6363_0 = backend.NI_PXIe_6363(
             name='ni_6363_0',
             parent_device=clockline_6363,
             clock_terminal='/ni_6363_0/PFI0',
@@ -52,31 +242,31 @@ class LabDevices():
             acquisition_rate=2.5e5
         )
 
-        self.x_coil_feedback_off = DigitalOut(
+        self.x_coil_feedback_off = backend.DigitalOut(
             name='x_coil_feedback_off',
             parent_device=ni_6363_0,
             connection='port0/line4',
         )
 
-        self.y_coil_feedback_off = DigitalOut(
+        self.y_coil_feedback_off = backend.DigitalOut(
             name='y_coil_feedback_off',
             parent_device=ni_6363_0,
             connection='port0/line12',
         )
 
-        self.z_coil_feedback_off = DigitalOut(
+        self.z_coil_feedback_off = backend.DigitalOut(
             name='z_coil_feedback_off',
             parent_device=ni_6363_0,
             connection='port0/line14',
         )
 
-        self.uwave_dds_switch = DigitalOut(
+        self.uwave_dds_switch = backend.DigitalOut(
             name='uwave_dds_switch',
             parent_device=ni_6363_0,
             connection='port0/line3',
         )
 
-        self.uwave_absorp_switch = DigitalOut(
+        self.uwave_absorp_switch = backend.DigitalOut(
             name='uwave_absorp_switch',
             parent_device = pb.direct_outputs,
             connection='flag 8',
@@ -93,42 +283,42 @@ class LabDevices():
         repump_shutter_on_t = 3.442e-3
         repump_shutter_delays = (repump_shutter_on_t, repump_shutter_off_t)
 
-        self.ta_shutter = Shutter(
+        self.ta_shutter = backend.Shutter(
             name='ta_shutter',
             parent_device=ni_6363_0,
             connection='port0/line5',
             delay=ta_shutter_delays,
             open_state=1,
         )
-        self.repump_shutter = Shutter(
+        self.repump_shutter = backend.Shutter(
             name='repump_shutter',
             parent_device=ni_6363_0,
             connection='port0/line6',
             delay=repump_shutter_delays,
             open_state=1,
         )
-        self.mot_xy_shutter = Shutter(
+        self.mot_xy_shutter = backend.Shutter(
             name='mot_xy_shutter',
             parent_device=ni_6363_0,
             connection='port0/line7',
             delay=ta_shutter_delays,
             open_state=1,
         )
-        self.mot_z_shutter = Shutter(
+        self.mot_z_shutter = backend.Shutter(
             name='mot_z_shutter',
             parent_device=ni_6363_0,
             connection='port0/line8',
             delay=ta_shutter_delays,
             open_state=1,
         )
-        self.img_xy_shutter = Shutter(
+        self.img_xy_shutter = backend.Shutter(
             name='img_xy_shutter',
             parent_device=ni_6363_0,
             connection='port0/line9',
             delay=ta_shutter_delays,
             open_state=1,
         )
-        self.img_z_shutter = Shutter(
+        self.img_z_shutter = backend.Shutter(
             name='img_z_shutter',
             parent_device=ni_6363_0,
             connection='port0/line10',
@@ -136,80 +326,80 @@ class LabDevices():
             open_state=1,
         )
 
-        self.uv_switch = DigitalOut(
+        self.uv_switch = backend.DigitalOut(
             name='uv_switch',
             parent_device=ni_6363_0,
             connection='port0/line11',
         )
 
-        self.ta_aom_digital = DigitalOut(
+        self.ta_aom_digital = backend.DigitalOut(
             name='ta_aom_digital',
             parent_device=ni_6363_0,
             connection='port0/line0',
         )
 
-        self.repump_aom_digital = DigitalOut(
+        self.repump_aom_digital = backend.DigitalOut(
             name='repump_aom_digital',
             parent_device=ni_6363_0,
             connection='port0/line1',
         )
 
-        self.tweezer_aom_digital = DigitalOut(
+        self.tweezer_aom_digital = backend.DigitalOut(
             name='tweezer_aom_digital',
             parent_device = pb.direct_outputs,
             connection='flag 12',
         )
 
-        self.servo_1064_aom_digital = DigitalOut(
+        self.servo_1064_aom_digital = backend.DigitalOut(
             name='servo_1064_aom_digital',
             parent_device = pb.direct_outputs,
             connection='flag 13',
         )
 
-        self.servo_456_aom_digital = DigitalOut(
+        self.servo_456_aom_digital = backend.DigitalOut(
             name='servo_456_aom_digital',
             parent_device = pb.direct_outputs,
             connection='flag 14',
         )
 
 
-        self.pulse_456_aom_digital = DigitalOut(
+        self.pulse_456_aom_digital = backend.DigitalOut(
             name='pulse_456_aom_digital',
             parent_device = pb.direct_outputs,
             connection='flag 15',
         )
 
-        self.pulse_1064_aom_digital = DigitalOut(
+        self.pulse_1064_aom_digital = backend.DigitalOut(
             name='pulse_1064_aom_digital',
             parent_device = pb.direct_outputs,
             connection='flag 10',
         )
 
-        self.local_addr_1064_aom_digital = DigitalOut(
+        self.local_addr_1064_aom_digital = backend.DigitalOut(
             name='local_addr_1064_aom_digital',
             parent_device = pb.direct_outputs,
             connection='flag 11',
         )
 
-        self.pulse_local_addr_1064_aom_digital = DigitalOut(
+        self.pulse_local_addr_1064_aom_digital = backend.DigitalOut(
             name='pulse_local_addr_1064_aom_digital',
             parent_device=pb.direct_outputs,
             connection='flag 20',
         )
 
-        self.ta_relock = DigitalOut(
+        self.ta_relock = backend.DigitalOut(
             name='ta_relock',
             parent_device=ni_6363_0,
             connection='port0/line16',
         )
 
-        self.dispenser_off_trigger = DigitalOut(
+        self.dispenser_off_trigger = backend.DigitalOut(
             name='dispenser_off_trigger',
             parent_device=ni_6363_0,
             connection='port0/line17',
         )
 
-        self.optical_pump_shutter = Shutter(
+        self.optical_pump_shutter = backend.Shutter(
             name='optical_pump_shutter',
             parent_device=ni_6363_0,
             connection='port0/line19',
@@ -217,13 +407,13 @@ class LabDevices():
             open_state=1,
         )
 
-        self.mmwave_switch = DigitalOut(
+        self.mmwave_switch = backend.DigitalOut(
             name='mmwave_switch',
             parent_device = pb.direct_outputs,
             connection='flag 18',
         )
 
-        self.blue_456_shutter = Shutter(
+        self.blue_456_shutter = backend.Shutter(
             name='blue_456_shutter',
             parent_device=ni_6363_0,
             connection='port0/line18',
@@ -232,16 +422,16 @@ class LabDevices():
         )
 
         # dummy channel. Not connected to anything but enable/ disable to meet the even-number-channel requirement
-        self.digital_out_ch26 = DigitalOut(
+        self.digital_out_ch26 = backend.DigitalOut(
             name='digital_out_ch26',
             parent_device=ni_6363_0,
             connection='port0/line26',
         )
 
-        clockline_6739 = ClockLine(name='clockline_6739', pseudoclock=pb.pseudoclock, connection='flag 17')
+        clockline_6739 = backend.ClockLine(name='clockline_6739', pseudoclock=pb.pseudoclock, connection='flag 17')
         # clockline_6739 = pb.clocklines[1]# for PrawnBlaster
 
-        ni_6739_0 = NI_PXIe_6739(
+        ni_6739_0 = backend.NI_PXIe_6739(
             name='ni_6739_0',
             parent_device=clockline_6739,
             clock_terminal='/ni_6739_0/PFI0',
@@ -249,62 +439,62 @@ class LabDevices():
         )
 
         # G&H AOM driver AM inputs cannot exceed 1 V
-        self.ta_aom_analog = AnalogOut(
+        self.ta_aom_analog = backend.AnalogOut(
             name='ta_aom_analog',
             parent_device=ni_6739_0,
             connection='ao0',
             limits=(0, 1),
         )
-        self.repump_aom_analog = AnalogOut(
+        self.repump_aom_analog = backend.AnalogOut(
             name='repump_aom_analog',
             parent_device=ni_6739_0,
             connection='ao1',
             limits=(0, 1),
         )
 
-        self.ta_vco = AnalogOut(
+        self.ta_vco = backend.AnalogOut(
             name='ta_vco',
             parent_device=ni_6739_0,
             connection='ao2'
         )
-        self.repump_vco = AnalogOut(
+        self.repump_vco = backend.AnalogOut(
             name='repump_vco',
             parent_device=ni_6739_0,
             connection='ao3'
         )
-        self.mot_coil_current_ctrl = AnalogOut(
+        self.mot_coil_current_ctrl = backend.AnalogOut(
             name='mot_coil_current_ctrl',
             parent_device=ni_6739_0,
             connection='ao4'
         )
-        self.x_coil_current = AnalogOut(
+        self.x_coil_current = backend.AnalogOut(
             name='x_coil_current',
             parent_device=ni_6739_0,
             connection='ao5'
         )
-        self.y_coil_current = AnalogOut(
+        self.y_coil_current = backend.AnalogOut(
             name='y_coil_current',
             parent_device=ni_6739_0,
             connection='ao6'
         )
-        self.z_coil_current = AnalogOut(
+        self.z_coil_current = backend.AnalogOut(
             name='z_coil_current',
             parent_device=ni_6739_0,
             connection='ao7'
         )
-        self.tweezer_aom_analog = AnalogOut(
+        self.tweezer_aom_analog = backend.AnalogOut(
             name='tweezer_aom_analog',
             parent_device=ni_6739_0,
             connection='ao8',
             limits=(0, 1)
         )
-        self.pulse_local_addr_1064_aom_analog = AnalogOut(
+        self.pulse_local_addr_1064_aom_analog = backend.AnalogOut(
             name='pulse_local_addr_1064_aom_analog',
             parent_device=ni_6739_0,
             connection='ao9',
             limits=(0, 1)
         )
-        self.servo_456_aom_analog = AnalogOut(
+        self.servo_456_aom_analog = backend.AnalogOut(
             name='notconnected_servo_456_aom_analog',
             parent_device=ni_6739_0,
             connection='ao10',
@@ -312,105 +502,105 @@ class LabDevices():
         )
 
         #Mirror 1 is upstream mirror 2 is downstream
-        self.mirror_456_1_v = AnalogOut(
+        self.mirror_456_1_v = backend.AnalogOut(
             name='mirror_456_1_v',
             parent_device=ni_6739_0,
             connection='ao11',
             limits=(0, 10),
         )
 
-        self.mirror_456_1_h = AnalogOut(
+        self.mirror_456_1_h = backend.AnalogOut(
             name='mirror_456_1_h',
             parent_device=ni_6739_0,
             connection='ao12',
             limits=(0, 10),
         )
 
-        self.mirror_456_2_v = AnalogOut(
+        self.mirror_456_2_v = backend.AnalogOut(
             name='mirror_456_2_v',
             parent_device=ni_6739_0,
             connection='ao13',
             limits=(0, 10),
         )
 
-        self.mirror_456_2_h = AnalogOut(
+        self.mirror_456_2_h = backend.AnalogOut(
             name='mirror_456_2_h',
             parent_device=ni_6739_0,
             connection='ao14',
             limits=(0, 10),
         )
 
-        self.mirror_1064_1_v = AnalogOut(
+        self.mirror_1064_1_v = backend.AnalogOut(
             name='mirror_1064_1_v',
             parent_device=ni_6739_0,
             connection='ao19',
             limits=(0, 10),
         )
 
-        self.mirror_1064_1_h = AnalogOut(
+        self.mirror_1064_1_h = backend.AnalogOut(
             name='mirror_1064_1_h',
             parent_device=ni_6739_0,
             connection='ao18',
             limits=(0, 10),
         )
 
-        self.mirror_1064_2_v = AnalogOut(
+        self.mirror_1064_2_v = backend.AnalogOut(
             name='mirror_1064_2_v',
             parent_device=ni_6739_0,
             connection='ao21',
             limits=(0, 10),
         )
 
-        self.mirror_1064_2_h = AnalogOut(
+        self.mirror_1064_2_h = backend.AnalogOut(
             name='mirror_1064_2_h',
             parent_device=ni_6739_0,
             connection='ao20',
             limits=(0, 10),
         )
 
-        self.pulse_456_aom_analog = AnalogOut(
+        self.pulse_456_aom_analog = backend.AnalogOut(
             name='pulse_456_aom_analog',
             parent_device=ni_6739_0,
             connection='ao15',
             limits=(0, 1)
         )
 
-        self.local_addr_1064_aom_analog = AnalogOut(
+        self.local_addr_1064_aom_analog = backend.AnalogOut(
             name='local_addr_1064_aom_analog',
             parent_device=ni_6739_0,
             connection='ao16',
             limits=(0, 1)
         )
 
-        self.pulse_1064_aom_analog = AnalogOut(
+        self.pulse_1064_aom_analog = backend.AnalogOut(
             name='pulse_1064_aom_analog',
             parent_device=ni_6739_0,
             connection='ao17',
             limits=(0, 1)
         )
 
-        self.local_addr_piezo_mirror_x1 = AnalogOut(
+        self.local_addr_piezo_mirror_x1 = backend.AnalogOut(
             name='local_addr_piezo_mirror_x1',
             parent_device=ni_6739_0,
             connection='ao32',
             limits=(-10, 10)
         )
 
-        self.local_addr_piezo_mirror_x2 = AnalogOut(
+        self.local_addr_piezo_mirror_x2 = backend.AnalogOut(
             name='local_addr_piezo_mirror_x2',
             parent_device=ni_6739_0,
             connection='ao33',
             limits=(-10, 10)
         )
 
-        self.local_addr_piezo_mirror_y1 = AnalogOut(
+        self.local_addr_piezo_mirror_y1 = backend.AnalogOut(
             name='local_addr_piezo_mirror_y1',
             parent_device=ni_6739_0,
             connection='ao34',
             limits=(-10, 10)
         )
 
-        self.local_addr_piezo_mirror_y2 = AnalogOut(
+        self.local_addr_piezo_mirror_y2 = backend.AnalogOut(
             name='local_addr_piezo_mirror_y2',
             parent_device=ni_6739_0,
             connection='ao35',
@@ -420,49 +610,49 @@ class LabDevices():
         #==============================================================================
         # Electrodes
         #==============================================================================
-        self.electrode_T1 = AnalogOut(
+        self.electrode_T1 = backend.AnalogOut(
             name='electrode_T1',
             parent_device=ni_6739_0,
             connection='ao22'
         )
 
-        self.electrode_T2 = AnalogOut(
+        self.electrode_T2 = backend.AnalogOut(
             name='electrode_T2',
             parent_device=ni_6739_0,
             connection='ao23'
         )
 
-        self.electrode_T3 = AnalogOut(
+        self.electrode_T3 = backend.AnalogOut(
             name='electrode_T3',
             parent_device=ni_6739_0,
             connection='ao24'
         )
 
-        self.electrode_T4 = AnalogOut(
+        self.electrode_T4 = backend.AnalogOut(
             name='electrode_T4',
             parent_device=ni_6739_0,
             connection='ao25'
         )
 
-        self.electrode_B1 = AnalogOut(
+        self.electrode_B1 = backend.AnalogOut(
             name='electrode_B1',
             parent_device=ni_6739_0,
             connection='ao26'
         )
 
-        self.electrode_B2 = AnalogOut(
+        self.electrode_B2 = backend.AnalogOut(
             name='electrode_B2',
             parent_device=ni_6739_0,
             connection='ao27'
         )
 
-        self.electrode_B3 = AnalogOut(
+        self.electrode_B3 = backend.AnalogOut(
             name='electrode_B3',
             parent_device=ni_6739_0,
             connection='ao28'
         )
 
-        self.electrode_B4 = AnalogOut(
+        self.electrode_B4 = backend.AnalogOut(
             name='electrode_B4',
             parent_device=ni_6739_0,
             connection='ao29'
@@ -476,13 +666,13 @@ class LabDevices():
         # Analog Inputs
         #==============================================================================
 
-        self.monitor_1064 = AnalogIn(
+        self.monitor_1064 = backend.AnalogIn(
             name='monitor_1064',
             parent_device=ni_6363_0,
             connection='ai0',
         )
 
-        self.monitor_456 = AnalogIn(
+        self.monitor_456 = backend.AnalogIn(
             name='monitor_456',
             parent_device=ni_6363_0,
             connection='ai1',
@@ -495,7 +685,7 @@ class LabDevices():
 
         # use line21 for local address manta camera
 
-        self.manta419b_mot = Manta419B(
+        self.manta419b_mot = backend.Manta419B(
             'manta419b_mot',
             parent_device=ni_6363_0,
             connection="port0/line2",
@@ -509,14 +699,14 @@ class LabDevices():
         #     BIAS_port=54324,
         # )
 
-        self.manta419b_la_coll = Manta419B(
+        self.manta419b_la_coll = backend.Manta419B(
             'manta419b_la_coll',
             parent_device=ni_6363_0,
             connection="port0/line21",
             BIAS_port=54325,
         )
 
-        self.manta419b_la_focal = Manta419B(
+        self.manta419b_la_focal = backend.Manta419B(
             'manta419b_la_focal',
             parent_device=ni_6363_0,
             connection="port0/line22",
@@ -530,7 +720,7 @@ class LabDevices():
         #     BIAS_port=54323,
         # )
 
-        self.kinetix = Kinetix(
+        self.kinetix = backend.Kinetix(
             name='kinetix',
             parent_device=ni_6363_0,
             connection='port0/line15',
@@ -541,7 +731,7 @@ class LabDevices():
         # Spectrum Instrumentation Cards for microwaves
         #================================================================================
 
-        self.spectrum_uwave = Spectrum(
+        self.spectrum_uwave = backend.Spectrum(
             name='spectrum_uwave',
             parent_device=clockline_6363,
             trigger={'device': pb.direct_outputs, 'connection': 'flag 19'},
@@ -555,7 +745,7 @@ class LabDevices():
         # Spectrum Instrumentation Cards
         #==============================================================================
 
-        self.spectrum_0 = Spectrum(
+        self.spectrum_0 = backend.Spectrum(
             name='spectrum_0',
             parent_device=clockline_6363,
             trigger={'device': ni_6363_0, 'connection': 'port0/line20'},
@@ -565,7 +755,7 @@ class LabDevices():
         )
 
         # connected to pulseblaster
-        self.spectrum_la = Spectrum(
+        self.spectrum_la = backend.Spectrum(
             name='spectrum_la',
             parent_device= clockline_6363,
             trigger={'device': pb.direct_outputs, 'connection': 'flag 9'},
@@ -577,8 +767,8 @@ class LabDevices():
         # #==============================================================================
         # # Y AOD DDS: AD9914 0
         # #==============================================================================
-        ad99140 = AD9914('AD99140', parent_device=clockline_6363, com_port=54322)
-        self.dds0 = AD_DDS(
+        ad99140 = backend.AD9914('AD99140', parent_device=clockline_6363, com_port=54322)
+        self.dds0 = backend.AD_DDS(
             name='dds0',
             parent_device=ad99140,
             connection='p0',
@@ -598,8 +788,8 @@ class LabDevices():
         # #==============================================================================
 
         # commenting out because 9914 temporarily not working 4/7
-        ad9914_1 = AD9914('AD9914_1', parent_device=clockline_6363, com_port=54320)
-        self.dds1 = AD_DDS(
+        ad9914_1 = backend.AD9914('AD9914_1', parent_device=clockline_6363, com_port=54320)
+        self.dds1 = backend.AD_DDS(
             name='dds1',
             parent_device=ad9914_1,
             connection='p1',
@@ -638,7 +828,7 @@ devices = LabDevices()
 
 # for connection table compilation
 if __name__ == '__main__':
-    devices.initialize()
+    devices.initialize(lazy=False)
     labscript.start()
 
     # relock the TA
@@ -3,14 +3,17 @@ from .field_control import BField, EField
 from .lasers import (
     D2Config,
     D2Lasers,
+    D2Pulse,
+    D2PulsePlanner,
     ParityProjectionConfig,
     PointingConfig,
     RydLasers,
     ShutterConfig,
+    ShutterScheduler,
     TweezerLaser,
     LocalAddressLaser,
 )
-from .microwaves import Microwave
+from .microwaves import Microwave, MMWaveSequencer, SpectrumSegmentCache
 from .uv import UVLamps
 
 __all__ = [
@@ -18,12 +21,17 @@ __all__ = [
     'Camera',
     'D2Config',
     'D2Lasers',
+    'D2Pulse',
+    'D2PulsePlanner',
     'EField',
     'Microwave',
+    'MMWaveSequencer',
+    'SpectrumSegmentCache',
     'ParityProjectionConfig',
     'PointingConfig',
     'RydLasers',
     'ShutterConfig',
+    'ShutterScheduler',
     'TweezerLaser',
     'LocalAddressLaser',
     'UVLamps',
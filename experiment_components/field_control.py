@@ -3,6 +3,7 @@ from typing import ClassVar, Literal
 
 import numpy as np
 from numpy.typing import NDArray
+from scipy.interpolate import CubicSpline
 
 from labscript import AnalogOut, DigitalOut
 from labscriptlib.calibration import (
@@ -13,11 +14,23 @@ from labscriptlib.calibration import (
     Ez_calib,
 )
 from labscriptlib.connection_table import devices
+from labscriptlib.ramp_compiler import adaptive_ramp
 
 
 logger = logging.getLogger(__name__)
 
 
+def _sample_and_hold(t_rel, duration, samples, samplerate):
+    """Custom ramp function playing back samples taken at ``samplerate``.
+
+    labscript evaluates ramps in the middle of each clock period,
+    ``t_rel = (k + 0.5) / samplerate``, so sample ``k`` is the one whose period
+    contains ``t_rel``.
+    """
+    index = np.floor(np.asarray(t_rel) * samplerate + 1e-9).astype(int)
+    return samples[np.clip(index, 0, len(samples) - 1)]
+
+
 class BField:
     """Controls for magnetic field generation and manipulation.
 
@@ -191,7 +204,10 @@ class BField:
         """
         # require field changes to be programmed in sequence
         if t <= self.t_last_change:
-            raise ValueError
+            raise ValueError(
+                f'Bias field ramp at t = {t} does not start after the previous field change, '
+                f'which ends at {self.t_last_change}'
+            )
 
         # bias_field_vector should be a tuple of the form (x,y,z)
         # Need to start the ramp earlier if the voltage changes sign
@@ -232,7 +248,8 @@ class BField:
                     coil_ramp_start_times[i], voltage_vector[i], component=i
                 )
             else:
-                self.current_outputs[i].ramp(
+                adaptive_ramp(
+                    self.current_outputs[i],
                     coil_ramp_start_times[i],
                     duration=dur,
                     initial=self.bias_voltages[i],
@@ -313,17 +330,67 @@ class BField:
 
         return radial_coords[..., np.newaxis] * great_circle_points_cartesian
 
-    def ramp_bias_field_slerp(
+    @classmethod
+    def bias_field_path(
+            cls,
+            waypoints,
+            ramp_progress,
+            path: Literal['linear', 'slerp', 'spline'] = 'slerp',
+    ) -> NDArray:
+        """
+        Evaluate a path through bias field waypoints.
+
+        Parameters
+        ----------
+        waypoints : array_like, shape (n_waypoints, 3)
+            Fields in Cartesian coordinates, including the starting point. The path
+            passes through them at equally spaced values of `ramp_progress`.
+        ramp_progress : array_like, shape (n_points,)
+            Progress parameter from 0 (first waypoint) to 1 (last waypoint).
+        path : {'linear', 'slerp', 'spline'}
+            How to go between waypoints: straight lines, great circle arcs with
+            linearly varying radius (see `_slerp_ramp`), or a cubic spline through
+            all waypoints.
+
+        Returns
+        -------
+        ndarray, shape (n_points, 3)
+        """
+        waypoints = np.asarray(waypoints, dtype=float)
+        ramp_progress = np.asarray(ramp_progress, dtype=float)
+        knots = np.linspace(0, 1, len(waypoints))
+
+        if path == 'linear':
+            return np.stack(
+                [np.interp(ramp_progress, knots, waypoints[:, i]) for i in range(3)],
+                axis=-1,
+            )
+        if path == 'spline':
+            return CubicSpline(knots, waypoints, axis=0)(ramp_progress)
+        if path == 'slerp':
+            segment = np.clip(np.searchsorted(knots, ramp_progress, side='right') - 1, 0, len(knots) - 2)
+            segment_progress = (ramp_progress - knots[segment]) * (len(knots) - 1)
+            points = np.empty(ramp_progress.shape + (3,))
+            for i in np.unique(segment):
+                in_segment = segment == i
+                points[in_segment] = cls._slerp_ramp(
+                    waypoints[i], waypoints[i + 1], segment_progress[in_segment]
+                )
+            return points
+        raise ValueError(f'Unknown bias field path {path}')
+
+    def ramp_bias_field_trajectory(
             self,
             t,
             duration,
-            final_bias_field: tuple[float, float, float],
-            sample_points: int = 11,
+            control_voltages,
     ):
         """
-        Ramp the bias field to a final value over a specified duration.
-        The ramp linearly interpolates between initial and final fields
-        in polar coordinates in the plane defined by the two endpoint fields.
+        Play a precomputed trajectory of coil control voltages.
+
+        The voltages are sampled uniformly over the ramp and sent as one waveform
+        segment per coil, so the number of Python calls does not grow with the
+        number of points.
 
         Parameters
         ----------
@@ -331,33 +398,110 @@ class BField:
             The time at which to start the ramp (in seconds).
         duration : float
             The duration of the ramp (in seconds).
-        final_bias_field : tuple or array-like
-            The final bias field values in Cartesian coordinates.
+        control_voltages : array_like, shape (n_points, 3)
+            Coil control voltages at times ``np.linspace(t, t + duration, n_points)``.
+            The first point should be the current bias voltages; each point is held
+            until the next one.
+
+        Returns
+        -------
+        float
+            End time of the ramp.
         """
         if t <= self.t_last_change:
             raise ValueError
-        if duration / (sample_points - 1) < 2.5e-6:
-            raise ValueError(f'Ramp sample rate too fast: {duration=}, {sample_points=}')
+        control_voltages = np.asarray(control_voltages, dtype=float)
+        n_points = len(control_voltages)
+        if n_points < 2:
+            raise ValueError('A trajectory needs at least its start and end point')
+        if duration / (n_points - 1) < 2.5e-6:
+            raise ValueError(f'Ramp sample rate too fast: {duration=}, {n_points=}')
+        self._check_voltage_limits(control_voltages)
+
+        samplerate = (n_points - 1) / duration
+        for i, current_output in enumerate(self.current_outputs):
+            current_output.customramp(
+                t,
+                duration,
+                _sample_and_hold,
+                control_voltages[:, i],
+                samplerate,
+                samplerate=samplerate,
+            )
+
+        endtime = t + duration
+        self.t_last_change = endtime
+        self.bias_voltages = tuple(control_voltages[-1])
+
+        return endtime
+
+    def ramp_bias_field_path(
+            self,
+            t,
+            duration,
+            waypoints,
+            path: Literal['linear', 'slerp', 'spline'] = 'slerp',
+            sample_points: int = 11,
+    ):
+        """
+        Ramp the bias field from its current value through waypoints.
 
-        ramp_progress = np.linspace(0, 1, sample_points)[1:]
-        times = np.linspace(t, t + duration, sample_points)[1:]
+        Parameters
+        ----------
+        t : float
+            The time at which to start the ramp (in seconds).
+        duration : float
+            The duration of the ramp (in seconds).
+        waypoints : array_like, shape (n_waypoints, 3)
+            Fields to go through after the current one, in Cartesian coordinates.
+            The last one is the final field.
+        path : {'linear', 'slerp', 'spline'}
+            Interpolation between waypoints, see `bias_field_path`.
+        sample_points : int
+            Number of points of the ramp, including its start.
 
+        Returns
+        -------
+        float
+            End time of the ramp.
+        """
         initial_bias_field = voltages_to_bfield(self.bias_voltages)
-        field_points = self._slerp_ramp(initial_bias_field, final_bias_field, ramp_progress)
+        waypoints = np.vstack([initial_bias_field, np.reshape(waypoints, (-1, 3))])
+        ramp_progress = np.linspace(0, 1, sample_points)
+
+        field_points = self.bias_field_path(waypoints, ramp_progress, path)
         control_voltages = bfield_to_voltages(field_points)
+        # the trajectory starts exactly where the coils are
+        control_voltages[0] = self.bias_voltages
         if np.any(control_voltages[-1] / self.bias_voltages < 0):
             logger.warning('Switching bias coil drive sign')
-        self._check_voltage_limits(control_voltages)
 
-        for time, control_voltages_single in zip(times, control_voltages):
-            for i, current_output in enumerate(self.current_outputs):
-                current_output.constant(time, control_voltages_single[i])
+        return self.ramp_bias_field_trajectory(t, duration, control_voltages)
 
-        endtime = t + duration
-        self.t_last_change = endtime
-        self.bias_voltages = control_voltages[-1]
+    def ramp_bias_field_slerp(
+            self,
+            t,
+            duration,
+            final_bias_field: tuple[float, float, float],
+            sample_points: int = 11,
+    ):
+        """
+        Ramp the bias field to a final value over a specified duration.
+        The ramp linearly interpolates between initial and final fields
+        in polar coordinates in the plane defined by the two endpoint fields.
 
-        return endtime
+        Parameters
+        ----------
+        t : float
+            The time at which to start the ramp (in seconds).
+        duration : float
+            The duration of the ramp (in seconds).
+        final_bias_field : tuple or array-like
+            The final bias field values in Cartesian coordinates.
+        """
+        return self.ramp_bias_field_path(
+            t, duration, [final_bias_field], path='slerp', sample_points=sample_points,
+        )
 
     def switch_mot_coils(self, t):
         """Switch the MOT coils on or off.
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import copy
+import itertools
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Flag, auto
 from typing import ClassVar, Literal
 
@@ -9,10 +11,15 @@ import labscript
 import numpy as np
 
 from labscriptlib.calibration import (
+    REPUMP_FREQ,
+    TA_FREQ,
     repump_freq_calib,
     ta_freq_calib,
 )
+from labscriptlib.clockline_coalescer import movable_constant
 from labscriptlib.connection_table import devices
+from labscriptlib.pulse_train import PulseTrain, emit_pulse_trains
+from labscriptlib.ramp_compiler import adaptive_ramp
 from labscriptlib.spectrum_manager import spectrum_manager
 from labscriptlib.spectrum_manager_fifo import spectrum_manager_fifo
 from labscriptlib.shot_globals import shot_globals
@@ -108,6 +115,187 @@ class ShutterConfig(Flag):
             return cls.NONE
 
 
+class ShutterScheduler:
+    """Timing of the D2 shutters, with their history indexed by ``ShutterConfig`` bit position.
+
+    A transition to a new configuration happens at the earliest time, not before
+    the requested one, at which every shutter that changes satisfies
+
+    - an opening shutter has been closed for at least ``min_off_time``,
+    - a closing shutter has been open for at least ``min_on_time``.
+
+    The transition time is the maximum over these lower bounds, so it satisfies
+    all of them. Shutters open at the transition time, and start closing
+    ``turn_off_time`` before it so that they are closed by then.
+    """
+
+    def __init__(
+            self,
+            shutters: dict[ShutterConfig, labscript.Shutter],
+            min_off_time: float,
+            min_on_time: float,
+            turn_off_time: float,
+    ):
+        """
+        Parameters
+        ----------
+        shutters: dict
+            Shutter device for each basic (single bit) ``ShutterConfig``
+        min_off_time, min_on_time, turn_off_time: float
+            Timing constraints of the shutters, see ``D2Lasers``
+        """
+        n_shutters = len(shutters)
+        self.shutters = [shutters[ShutterConfig(1 << i)] for i in range(n_shutters)]
+        self.bits = 1 << np.arange(n_shutters)
+        self.min_off_time = min_off_time
+        self.min_on_time = min_on_time
+        self.turn_off_time = turn_off_time
+
+        self.state = ShutterConfig.NONE
+        self.last_open_t = np.zeros(n_shutters)
+        self.last_close_t = np.zeros(n_shutters)
+
+    def _mask(self, config: ShutterConfig):
+        return (config.value & self.bits) != 0
+
+    def earliest(self, t, new_config: ShutterConfig) -> float:
+        """Earliest time not before ``t`` at which the shutters can change from the current state to ``new_config``."""
+        changed = self.state ^ new_config
+        opening = self._mask(changed & new_config)
+        closing = self._mask(changed & self.state)
+        return float(max(
+            t,
+            np.max(self.last_close_t[opening] + self.min_off_time, initial=-np.inf),
+            np.max(self.last_open_t[closing] + self.min_on_time + self.turn_off_time, initial=-np.inf),
+        ))
+
+    def schedule_train(self, times, configs) -> np.ndarray:
+        """Schedule a sequence of shutter transitions and emit all their shutter events.
+
+        A transition that has to wait for the shutters delays all following ones
+        by the same amount, so the requested spacing between transitions is kept.
+
+        Parameters
+        ----------
+        times: array_like
+            Requested transition times, increasing
+        configs: sequence of ShutterConfig
+            Shutter configuration after each transition
+
+        Returns
+        -------
+        ndarray
+            Actual transition times
+        """
+        times = np.asarray(times, dtype=float)
+        actual = np.empty_like(times)
+        delay = 0
+        event_times, event_shutters, event_opens = [], [], []
+        for i, (t, config) in enumerate(zip(times, configs)):
+            t_transition, opening, closing = self.advance(t + delay, config)
+            delay = t_transition - t
+            actual[i] = t_transition
+
+            event_shutters += [opening, closing]
+            event_times += [
+                np.full(len(opening), t_transition),
+                np.full(len(closing), t_transition - self.turn_off_time),
+            ]
+            event_opens += [np.ones(len(opening), bool), np.zeros(len(closing), bool)]
+
+        if event_shutters:
+            self._emit(
+                np.concatenate(event_times), np.concatenate(event_shutters), np.concatenate(event_opens)
+            )
+        return actual
+
+    def advance(self, t, new_config: ShutterConfig):
+        """Record the transition to ``new_config`` as early as possible from ``t``, without emitting it.
+
+        Returns
+        -------
+        t_transition: float
+            Transition time
+        opening, closing: ndarray
+            Bit positions of the shutters that open and close
+        """
+        t_transition = self.earliest(t, new_config)
+        changed = self.state ^ new_config
+        opening = np.flatnonzero(self._mask(changed & new_config))
+        closing = np.flatnonzero(self._mask(changed & self.state))
+        self.last_open_t[opening] = t_transition
+        self.last_close_t[closing] = t_transition - self.turn_off_time
+        self.state = new_config
+        return t_transition, opening, closing
+
+    def copy(self) -> ShutterScheduler:
+        """Scheduler with the same shutter history, for trying out schedules."""
+        other = copy.copy(self)
+        other.last_open_t = self.last_open_t.copy()
+        other.last_close_t = self.last_close_t.copy()
+        return other
+
+    def transition(self, t, new_config: ShutterConfig) -> float:
+        """Change to ``new_config`` as early as possible from ``t``, returning the transition time."""
+        return float(self.schedule_train([t], [new_config])[0])
+
+    def _emit(self, times, shutter_indices, opens):
+        for t, index, is_open in zip(times.tolist(), shutter_indices.tolist(), opens.tolist()):
+            if is_open:
+                self.shutters[index].open(t)
+            else:
+                self.shutters[index].close(t)
+
+
+@dataclass
+class D2Pulse:
+    """A D2 light pulse for ``D2PulsePlanner``, with the arguments of ``D2Lasers.do_pulse``.
+
+    Attributes:
+        dur (float): Duration of the pulse
+        shutter_config (ShutterConfig): Shutter configuration for the pulse
+        ta_power (float): Power level for the TA beam (0 to 1)
+        repump_power (float): Power level for the repump beam (0 to 1)
+        delay (float): Minimum time from the end of the previous pulse to the start of this one
+        ta_detuning (float, optional): TA detuning to ramp to before the pulse
+        repump_detuning (float, optional): Repump detuning to ramp to before the pulse
+        require_closed (ShutterConfig, optional): Shutters that must be closed during the
+            pulse even if their beam is off, e.g. ``ShutterConfig.REPUMP`` to not rely on the
+            repump AOM alone for extinction
+    """
+    dur: float
+    shutter_config: ShutterConfig
+    ta_power: float
+    repump_power: float
+    delay: float = 0
+    ta_detuning: float | None = None
+    repump_detuning: float | None = None
+    require_closed: ShutterConfig = ShutterConfig.NONE
+
+
+@dataclass
+class _PlannedPulse:
+    pulse: D2Pulse
+    shutter_config: ShutterConfig
+    t_start: float
+    t_transition: float | None = None
+    ta_ramp: bool = False
+    repump_ramp: bool = False
+
+    @property
+    def t_end(self):
+        return self.t_start + self.pulse.dur
+
+
+@dataclass
+class _PartialPlan:
+    scheduler: ShutterScheduler
+    ta_freq: float
+    repump_freq: float
+    t_end: float
+    pulses: list[_PlannedPulse] = field(default_factory=list)
+
+
 @dataclass
 class D2Config:
     ta_power: float
@@ -136,7 +324,7 @@ class D2Lasers:
         CONST_MIN_SHUTTER_OFF_TIME (float): Minimum time for shutter off-on cycle (6.28e-3 s)
         CONST_MIN_SHUTTER_ON_TIME (float): Minimum time for shutter to stay on (3.6e-3 s)
     """
-    shutter_config: ShutterConfig
+    shutter_scheduler: ShutterScheduler
 
     CONST_TA_VCO_RAMP_TIME: ClassVar[float] = (
         1.2e-4
@@ -202,9 +390,20 @@ class D2Lasers:
         # update_shutters compares with self.shutter_config to decide what
         # changes to make. Do not call self.update_shutters(self.shutter_config),
         # nothing will happen.
-        self.shutter_config = ShutterConfig.NONE
-        self.last_shutter_open_t = np.zeros(7)
-        self.last_shutter_close_t = np.zeros(7)
+        self.shutter_scheduler = ShutterScheduler(
+            {
+                ShutterConfig.TA: devices.ta_shutter,
+                ShutterConfig.REPUMP: devices.repump_shutter,
+                ShutterConfig.MOT_XY: devices.mot_xy_shutter,
+                ShutterConfig.MOT_Z: devices.mot_z_shutter,
+                ShutterConfig.IMG_XY: devices.img_xy_shutter,
+                ShutterConfig.IMG_Z: devices.img_z_shutter,
+                ShutterConfig.OPTICAL_PUMPING: devices.optical_pump_shutter,
+            },
+            min_off_time=self.CONST_MIN_SHUTTER_OFF_TIME,
+            min_on_time=self.CONST_MIN_SHUTTER_ON_TIME,
+            turn_off_time=self.CONST_SHUTTER_TURN_OFF_TIME,
+        )
         _ = self.update_shutters(t + D2Lasers.CONST_SHUTTER_TURN_ON_TIME, ShutterConfig.MOT_FULL)
 
         # If do_mot is the first thing that is called, these initializations
@@ -236,12 +435,14 @@ class D2Lasers:
             return t
         else:
             duration = max(self.CONST_TA_VCO_RAMP_TIME, duration)
-            devices.ta_vco.ramp(
+            adaptive_ramp(
+                devices.ta_vco,
                 t,
                 duration=duration,
-                initial=ta_freq_calib(self.ta_freq),
-                final=ta_freq_calib(final),
+                initial=self.ta_freq,
+                final=final,
                 samplerate=3e5,
+                calibration=TA_FREQ.interpolate,
             )
             self.ta_freq = final
             return t + duration
@@ -267,12 +468,14 @@ class D2Lasers:
             return t
         else:
             duration = max(self.CONST_TA_VCO_RAMP_TIME, duration)
-            devices.repump_vco.ramp(
+            adaptive_ramp(
+                devices.repump_vco,
                 t,
                 duration=duration,
-                initial=repump_freq_calib(self.repump_freq),
-                final=repump_freq_calib(final),
+                initial=self.repump_freq,
+                final=final,
                 samplerate=3e5,
+                calibration=REPUMP_FREQ.interpolate,
             )
             self.repump_freq = final
             return t + duration
@@ -373,11 +576,17 @@ class D2Lasers:
             samplerate=1e5,
         )
 
+    @property
+    def shutter_config(self) -> ShutterConfig:
+        """Current shutter configuration"""
+        return self.shutter_scheduler.state
+
     def update_shutters(self, t, new_shutter_config: ShutterConfig):
         """Update the shutter configuration of the laser system.
 
-        Manages the opening and closing of various shutters based on the new configuration.
-        Ensures proper timing between shutter operations to maintain system stability.
+        Opens and closes shutters as needed for the new configuration, delaying the
+        change until the shutter minimum on and off times are respected, see
+        ``ShutterScheduler``.
 
         Args:
             t (float): Time to update the shutter configuration
@@ -386,54 +595,7 @@ class D2Lasers:
         Returns:
             float: Updated time after all shutter operations are complete
         """
-        basic_shutters: list[ShutterConfig] = [
-            ShutterConfig.TA,
-            ShutterConfig.REPUMP,
-            ShutterConfig.MOT_XY,
-            ShutterConfig.MOT_Z,
-            ShutterConfig.IMG_XY,
-            ShutterConfig.IMG_Z,
-            ShutterConfig.OPTICAL_PUMPING,
-        ]
-
-        shutter_dict: dict[ShutterConfig, labscript.Shutter] = {
-            ShutterConfig.TA: devices.ta_shutter,
-            ShutterConfig.REPUMP: devices.repump_shutter,
-            ShutterConfig.MOT_XY: devices.mot_xy_shutter,
-            ShutterConfig.MOT_Z: devices.mot_z_shutter,
-            ShutterConfig.IMG_XY: devices.img_xy_shutter,
-            ShutterConfig.IMG_Z: devices.img_z_shutter,
-            ShutterConfig.OPTICAL_PUMPING: devices.optical_pump_shutter,
-        }
-
-        changed_shutters = self.shutter_config ^ new_shutter_config
-
-        shutters_to_open = changed_shutters & new_shutter_config
-        open_bool_list = [(shutter in shutters_to_open) for shutter in basic_shutters]
-        shutters_to_close = changed_shutters & self.shutter_config
-        close_bool_list = [(shutter in shutters_to_close) for shutter in basic_shutters]
-
-        # if the last shutter is closed and now needs to be opened, open it after CONST_MIN_SHUTTER_OFF_TIME
-        if any(t - self.last_shutter_close_t * open_bool_list < self.CONST_MIN_SHUTTER_OFF_TIME):
-            t = max(self.last_shutter_close_t * open_bool_list) + self.CONST_MIN_SHUTTER_OFF_TIME
-        #TODO: Double check that this actually still works robustly...
-        # if the last shutter is opened and now needs to be closed, close it after CONST_MIN_SHUTTER_ON_TIME
-        # subtract CONST_SHUTTER_TURN_OFF_TIME because in do_pulse, shutter time is updated after adding CONST_SHUTTER_TURN_OFF_TIME
-        elif any (t - self.CONST_SHUTTER_TURN_OFF_TIME - self.last_shutter_open_t * close_bool_list < self.CONST_MIN_SHUTTER_ON_TIME):
-            t = max(self.last_shutter_open_t * close_bool_list) + self.CONST_MIN_SHUTTER_ON_TIME + self.CONST_SHUTTER_TURN_OFF_TIME
-
-        for shutter in basic_shutters:
-            if shutter in shutters_to_open:
-                shutter_dict[shutter].open(t)
-                # record the last time the shutter was opened
-                self.last_shutter_open_t[basic_shutters.index(shutter)] = t
-            if shutter in shutters_to_close:
-                shutter_dict[shutter].close(t - self.CONST_SHUTTER_TURN_OFF_TIME)
-                # record the last time the shutter was closed
-                self.last_shutter_close_t[basic_shutters.index(shutter)] = t - self.CONST_SHUTTER_TURN_OFF_TIME
-
-        self.shutter_config = new_shutter_config
-        return t
+        return self.shutter_scheduler.transition(t, new_shutter_config)
 
     def do_pulse(
         self,
@@ -521,6 +683,25 @@ class D2Lasers:
 
         return t, t_aom_start
 
+    def do_pulses(self, t, pulses: list[D2Pulse], close_all_shutters: bool = False):
+        """Perform a train of pulses, planning all shutter changes together.
+
+        See ``D2PulsePlanner``, which typically gives a shorter sequence than
+        successive ``do_pulse`` calls.
+
+        Args:
+            t (float): Earliest start time of the first pulse
+            pulses (list[D2Pulse]): Pulses to perform in order
+            close_all_shutters (bool, optional): Whether to close all shutters after the last pulse
+
+        Returns:
+            tuple[float, list[float]]: (End time of the train, AOM start time of each pulse)
+        """
+        planner = D2PulsePlanner(self)
+        for pulse in pulses:
+            planner.add(pulse)
+        return planner.execute(t, close_all_shutters=close_all_shutters)
+
     def reset_to_mot_freq(self, t):
         """Reset laser frequencies to MOT operation values.
 
@@ -601,6 +782,179 @@ class D2Lasers:
         return t, t_aom_start
 
 
+class D2PulsePlanner:
+    """Schedules a train of D2 pulses with as little shutter dead time as possible.
+
+    ``D2Lasers.do_pulse`` decides on shutter changes one pulse at a time, and pads
+    every change with the shutter turn on time, so a sequence of pulses collects
+    dead time. The planner looks at the whole train instead. A shutter only
+    has to be in the requested position if light goes through it, so an upstream
+    (TA or repump) shutter may be left open or closed while its beam is off, unless
+    the pulse lists it in ``require_closed``. Directional shutters always follow the
+    request.
+
+    Among these choices, the planner finds the shutter configurations that end the
+    train earliest, timing the shutter changes with the ``ShutterScheduler``
+    constraints. It goes through the pulses in order, keeping every partial plan
+    that no other one dominates, i.e. ends no earlier with the same shutters open
+    and each shutter last moved no earlier. Later shutter changes can only be
+    delayed by a later end or a later shutter history, so the earliest complete
+    plan is among those kept. Frequency ramps are done while the shutters move.
+
+    Example::
+
+        planner = D2PulsePlanner(d2_lasers)
+        planner.add(D2Pulse(op_time, ShutterConfig.OPTICAL_PUMPING_FULL, op_ta_power, op_repump_power))
+        planner.add(D2Pulse(kill_time, ShutterConfig.OPTICAL_PUMPING_TA, 1, 0, ta_detuning=0))
+        planner.add(D2Pulse(img_time, ShutterConfig.IMG_FULL, 1, 1, ta_detuning=img_detuning))
+        t, t_aom_starts = planner.execute(t, close_all_shutters=True)
+    """
+    d2_lasers: D2Lasers
+    pulses: list[D2Pulse]
+
+    def __init__(self, d2_lasers: D2Lasers):
+        self.d2_lasers = d2_lasers
+        self.pulses = []
+
+    def add(self, pulse: D2Pulse):
+        """Append a pulse to the train."""
+        self.pulses.append(pulse)
+
+    @staticmethod
+    def allowed_configs(pulse: D2Pulse) -> list[ShutterConfig]:
+        """Shutter configurations that let the same light through as the requested one during ``pulse``."""
+        beams = ((ShutterConfig.TA, pulse.ta_power), (ShutterConfig.REPUMP, pulse.repump_power))
+        free_beams = [beam for beam, power in beams if power == 0 and not beam & pulse.require_closed]
+        fixed = pulse.shutter_config & ~pulse.require_closed
+        for beam in free_beams:
+            fixed &= ~beam
+        configs = []
+        for n_open in range(len(free_beams) + 1):
+            for open_beams in itertools.combinations(free_beams, n_open):
+                config = fixed
+                for beam in open_beams:
+                    config |= beam
+                configs.append(config)
+        return configs
+
+    def plan(self, t) -> list[_PlannedPulse]:
+        """Shutter configuration and timing of each pulse, without emitting anything."""
+        d2 = self.d2_lasers
+        plans = [_PartialPlan(d2.shutter_scheduler.copy(), d2.ta_freq, d2.repump_freq, t)]
+        for pulse in self.pulses:
+            plans = self._nondominated([
+                self._extend(plan, pulse, config)
+                for plan in plans
+                for config in self.allowed_configs(pulse)
+            ])
+        return min(plans, key=lambda plan: plan.t_end).pulses
+
+    @staticmethod
+    def _nondominated(plans: list[_PartialPlan]) -> list[_PartialPlan]:
+        """Partial plans not dominated by another one with the same shutter state."""
+        def constraints(plan):
+            # what the following pulses depend on: the end of the plan, when each
+            # open shutter opened and when each closed shutter closed
+            scheduler = plan.scheduler
+            is_open = scheduler._mask(scheduler.state)
+            return np.concatenate(([plan.t_end], np.where(is_open, scheduler.last_open_t, scheduler.last_close_t)))
+
+        kept: dict[ShutterConfig, list[tuple[_PartialPlan, np.ndarray]]] = {}
+        # a dominating plan sorts before the plans it dominates
+        for plan, key in sorted(((plan, constraints(plan)) for plan in plans), key=lambda item: tuple(item[1])):
+            same_state = kept.setdefault(plan.scheduler.state, [])
+            if not any(np.all(other_key <= key) for _, other_key in same_state):
+                same_state.append((plan, key))
+        return [plan for same_state in kept.values() for plan, _ in same_state]
+
+    @staticmethod
+    def _extend(plan: _PartialPlan, pulse: D2Pulse, config: ShutterConfig) -> _PartialPlan:
+        scheduler = plan.scheduler.copy()
+        t_start = plan.t_end + pulse.delay
+        ta_ramp = pulse.ta_detuning is not None and pulse.ta_detuning != plan.ta_freq
+        repump_ramp = pulse.repump_detuning is not None and pulse.repump_detuning != plan.repump_freq
+        if ta_ramp or repump_ramp:
+            t_start = max(t_start, plan.t_end + D2Lasers.CONST_TA_VCO_RAMP_TIME)
+
+        t_transition = None
+        if config != scheduler.state:
+            # the AOMs are off while the shutters move, so only after the previous pulse
+            t_transition, _, _ = scheduler.advance(
+                max(t_start, plan.t_end + D2Lasers.CONST_SHUTTER_TURN_ON_TIME), config
+            )
+            t_start = t_transition
+
+        planned = _PlannedPulse(pulse, config, t_start, t_transition, ta_ramp, repump_ramp)
+        return _PartialPlan(
+            scheduler,
+            pulse.ta_detuning if ta_ramp else plan.ta_freq,
+            pulse.repump_detuning if repump_ramp else plan.repump_freq,
+            planned.t_end,
+            plan.pulses + [planned],
+        )
+
+    def execute(self, t, close_all_shutters: bool = False):
+        """Plan the pulses added so far and emit them.
+
+        Args:
+            t (float): Earliest start time of the first pulse
+            close_all_shutters (bool, optional): Whether to close all shutters after the last pulse
+
+        Returns:
+            tuple[float, list[float]]: (End time of the train, AOM start time of each pulse)
+        """
+        d2 = self.d2_lasers
+        planned = self.plan(t)
+        self.pulses = []
+
+        transitions = [p for p in planned if p.t_transition is not None]
+        if transitions:
+            d2.shutter_scheduler.schedule_train(
+                [p.t_transition for p in transitions], [p.shutter_config for p in transitions]
+            )
+
+        # since when each beam is known to be off, to not switch it off twice before a shutter transition
+        ta_off_since = repump_off_since = None
+        for i, p in enumerate(planned):
+            pulse = p.pulse
+            if p.t_transition is not None:
+                t_off = p.t_transition - D2Lasers.CONST_SHUTTER_TURN_ON_TIME
+                if ta_off_since is None or ta_off_since > t_off:
+                    d2.ta_aom_off(t_off)
+                if repump_off_since is None or repump_off_since > t_off:
+                    d2.repump_aom_off(t_off)
+            if p.ta_ramp:
+                d2.ramp_ta_freq(p.t_start - D2Lasers.CONST_TA_VCO_RAMP_TIME, D2Lasers.CONST_TA_VCO_RAMP_TIME, pulse.ta_detuning)
+            if p.repump_ramp:
+                d2.ramp_repump_freq(p.t_start - D2Lasers.CONST_TA_VCO_RAMP_TIME, D2Lasers.CONST_TA_VCO_RAMP_TIME, pulse.repump_detuning)
+
+            if pulse.ta_power != 0:
+                d2.ta_aom_on(p.t_start, pulse.ta_power)
+                ta_off_since = None
+            if pulse.repump_power != 0:
+                d2.repump_aom_on(p.t_start, pulse.repump_power)
+                repump_off_since = None
+
+            # a beam that stays on into an immediately following pulse is not switched off in between
+            following = planned[i + 1].pulse if i + 1 < len(planned) else None
+            continues = following is not None and planned[i + 1].t_start == p.t_end
+            if not (continues and following.ta_power != 0):
+                d2.ta_aom_off(p.t_end)
+                ta_off_since = p.t_end if ta_off_since is None else ta_off_since
+            if not (continues and following.repump_power != 0):
+                d2.repump_aom_off(p.t_end)
+                repump_off_since = p.t_end if repump_off_since is None else repump_off_since
+
+        if planned:
+            t = planned[-1].t_end
+        if close_all_shutters:
+            t += D2Lasers.CONST_SHUTTER_TURN_OFF_TIME
+            t = d2.update_shutters(t, ShutterConfig.NONE)
+            d2.ta_aom_on(t, 1)
+            d2.repump_aom_on(t, 1)
+        return t, [p.t_start for p in planned]
+
+
 class TweezerLaser:
     """Controls for the optical tweezer laser system.
 
@@ -744,8 +1098,9 @@ class TweezerLaser:
         Returns:
             float: End time of the ramp
         """
-        devices.tweezer_aom_analog.ramp(
-            t, duration=dur, initial=self.tweezer_power, final=final_power, samplerate=1e5
+        adaptive_ramp(
+            devices.tweezer_aom_analog,
+            t, duration=dur, initial=self.tweezer_power, final=final_power, samplerate=1e5,
         )
         self.tweezer_power = final_power
         return t + dur
@@ -1323,6 +1678,36 @@ class RydLasers:
 
         return t, t_aom_start
 
+    def rydberg_pulse_train(
+            self,
+            starts,
+            durations,
+            pre_padding_1064=0,
+            post_padding_1064=0,
+            just_456: bool = False,
+    ):
+        """Switch the 456 and 1064 pulse AOMs digitally for a train of pulses.
+
+        The pulses are emitted in bulk and checked against the PulseBlaster
+        instruction spacing, see ``labscriptlib.pulse_train``. The AOM analog
+        controls and the shutter have to be set up by the caller.
+
+        Parameters
+        ----------
+        starts, durations: array_like
+            Start time and duration of each 456 pulse
+        pre_padding_1064, post_padding_1064: array_like
+            Time by which each 1064 pulse starts before and ends after the 456 pulse
+        just_456: bool
+            Only pulse the 456 AOM
+        """
+        trains = [PulseTrain.from_pulses(devices.pulse_456_aom_digital, starts, durations)]
+        if not just_456:
+            trains.append(PulseTrain.from_pulses(
+                devices.pulse_1064_aom_digital, starts, durations, pre_padding_1064, post_padding_1064,
+            ))
+        emit_pulse_trains(trains, min_spacing=1 / devices.pb.clock_limit)
+
     def do_rydberg_multipulses(self, t,
                                n_pulses,
                                pulse_dur,
@@ -1332,20 +1717,30 @@ class RydLasers:
                                just_456=False,
                                long_1064 = False,
                                close_shutter=False):
+        """Do ``n_pulses`` equally spaced Rydberg pulses, see ``rydberg_pulse_train``.
 
-        pulse_start_times = []
-
+        Returns
+        -------
+        t_end, pulse_start_times: tuple[float, ndarray]
+            End time of the sequence and start time of each 456 pulse
+        """
         # turn analog on earlier than the digital
         # workaround for timing limitation on pulseblaster due to labscript
         # https://groups.google.com/g/labscriptsuite/c/QdW6gUGNwQ0
         aom_analog_ctrl_anticipation = 15e-6
+        # the analog controls may move to share a 6739 clock tick, as long as they stay ahead of the digital
+        analog_tolerance = aom_analog_ctrl_anticipation / 2
         extra_time_1064 = self.CONST_EXTRA_TIME_1064 * int(long_1064)
 
         if not self.shutter_open:
             if power_1064 != 0:
-                devices.pulse_1064_aom_analog.constant(t - aom_analog_ctrl_anticipation, power_1064)
+                movable_constant(
+                    devices.pulse_1064_aom_analog, t - aom_analog_ctrl_anticipation, power_1064, analog_tolerance,
+                )
             if power_456 != 0:
-                devices.pulse_456_aom_analog.constant(t - aom_analog_ctrl_anticipation, power_456)
+                movable_constant(
+                    devices.pulse_456_aom_analog, t - aom_analog_ctrl_anticipation, power_456, analog_tolerance,
+                )
                 t = self.update_blue_456_shutter(t,"open")
             # Turn off AOMs while waiting for shutter to fully open
             self.pulse_456_aom_off(t - self.CONST_SHUTTER_TURN_ON_TIME, digital_only=True)
@@ -1353,43 +1748,22 @@ class RydLasers:
                 self.pulse_1064_aom_on(t , power_1064, digital_only=True)
                 # self.pulse_1064_aom_on(t- self.CONST_SHUTTER_TURN_ON_TIME, power_1064)
 
-        for i in range(n_pulses):
-            is_first = (i == 0)
-            is_last = (i == n_pulses - 1)
-
-            if just_456:
-                self.pulse_456_aom_on(t, power_456, digital_only=True)
-                # print(i, ' pulse start time:', t)
-                t += pulse_dur
-                self.pulse_456_aom_off(t, digital_only=True)
-                t+= pulse_wait_dur
-            else:
-                
-                if is_first:
-                    # extra_time_1064_i = extra_time_1064
-                    # extra_time_1064_f = 0
-                    extra_time_1064_i = 0.35e-6
-                    extra_time_1064_f = 0.15e-6
-                elif is_last:
-                    # extra_time_1064_i = 0.25e-6
-                    # extra_time_1064_f = extra_time_1064 - 0.25e-6
-                    extra_time_1064_i = 0.35e-6
-                    extra_time_1064_f = 0.15e-6
-                else:
-                    extra_time_1064_i = 0.25e-6
-                    extra_time_1064_f = 0
-                    
-                self.pulse_456_aom_on(t, power_456, digital_only=True)
-                self.pulse_1064_aom_on(t - extra_time_1064_i, power_1064, digital_only=True)
-                t += pulse_dur
-                self.pulse_456_aom_off(t, digital_only=True)
-                self.pulse_1064_aom_off(t + extra_time_1064_f, digital_only=True) #+ extra_time_1064
-                
-                t += pulse_wait_dur
-
-            pulse_start_times.append(t - pulse_wait_dur - pulse_dur)
+        pulse_start_times = t + np.arange(n_pulses) * (pulse_dur + pulse_wait_dur)
+        if n_pulses > 0:
+            # the 1064 pulses are padded more at the ends of the train than in the middle
+            pre_padding_1064 = np.full(n_pulses, 0.25e-6)
+            post_padding_1064 = np.zeros(n_pulses)
+            pre_padding_1064[[0, -1]] = 0.35e-6
+            post_padding_1064[[0, -1]] = 0.15e-6
+            self.rydberg_pulse_train(
+                pulse_start_times, pulse_dur, pre_padding_1064, post_padding_1064, just_456=just_456,
+            )
             if just_456:
-                self.pulse_1064_aom_off(t + extra_time_1064, digital_only=True)
+                # the 1064 stays on through the first pulse and its wait
+                self.pulse_1064_aom_off(
+                    pulse_start_times[0] + pulse_dur + pulse_wait_dur + extra_time_1064, digital_only=True,
+                )
+            t = pulse_start_times[-1] + pulse_dur + pulse_wait_dur
 
         self.pulse_1064_aom_off(t + aom_analog_ctrl_anticipation)
         if close_shutter:
@@ -1397,9 +1771,8 @@ class RydLasers:
                 t = self.update_blue_456_shutter(t,"close")
             self.pulse_456_aom_on(t, 1)
             # self.pulse_1064_aom_on(t,1)
-            t_end = t
 
-        return t_end, pulse_start_times
+        return t, pulse_start_times
 
     def do_rydberg_pulse_short(
             self,
@@ -1429,6 +1802,8 @@ class RydLasers:
         # https://groups.google.com/g/labscriptsuite/c/QdW6gUGNwQ0
         # must be longer (25e-6) when doing gs push out to avoid error from NI analog channels being too close in time to each other
         aom_analog_ctrl_anticipation = 45e-6
+        # the analog controls may move to share a 6739 clock tick, as long as they stay ahead of the digital
+        analog_tolerance = aom_analog_ctrl_anticipation / 2
         extra_time_1064 = self.CONST_EXTRA_TIME_1064 * int(long_1064)
         if not self.shutter_open:
             if power_456 != 0:
@@ -1437,7 +1812,9 @@ class RydLasers:
             self.pulse_456_aom_off(t - self.CONST_SHUTTER_TURN_ON_TIME, digital_only=True)
 
         if power_456 != 0:
-            devices.pulse_456_aom_analog.constant(t - aom_analog_ctrl_anticipation, power_456)
+            movable_constant(
+                devices.pulse_456_aom_analog, t - aom_analog_ctrl_anticipation, power_456, analog_tolerance,
+            )
             self.pulse_456_aom_on(t, power_456, digital_only=True)
 
         if in_dipole_trap:
@@ -1447,7 +1824,9 @@ class RydLasers:
                 raise ValueError("Can't switch from dipole trap to nonzero power with a short pulse")
         else:
             if power_1064 != 0:
-                devices.pulse_1064_aom_analog.constant(t - aom_analog_ctrl_anticipation, power_1064)
+                movable_constant(
+                    devices.pulse_1064_aom_analog, t - aom_analog_ctrl_anticipation, power_1064, analog_tolerance,
+                )
                 if long_1064:
                     self.pulse_1064_aom_on(t - extra_time_1064, power_1064, digital_only=True)
                 else:
@@ -1457,7 +1836,7 @@ class RydLasers:
         t += dur
 
         self.pulse_456_aom_off(t, digital_only=True)
-        devices.pulse_456_aom_analog.constant(t + aom_analog_ctrl_anticipation, 0)
+        movable_constant(devices.pulse_456_aom_analog, t + aom_analog_ctrl_anticipation, 0, analog_tolerance)
 
         if in_dipole_trap:
             self.pulse_1064_aom_on(t, 1, digital_only=True)
@@ -1466,7 +1845,7 @@ class RydLasers:
                 self.pulse_1064_aom_off(t + extra_time_1064, digital_only=True)
             else:
                 self.pulse_1064_aom_off(t, digital_only=True)
-            devices.pulse_1064_aom_analog.constant(t + aom_analog_ctrl_anticipation, 0)
+            movable_constant(devices.pulse_1064_aom_analog, t + aom_analog_ctrl_anticipation, 0, analog_tolerance)
 
         if close_shutter:
             if power_456 != 0:
@@ -1,5 +1,9 @@
+from dataclasses import dataclass
+from functools import lru_cache
+import hashlib
+import logging
 from pathlib import Path
-from typing import ClassVar, Optional
+from typing import Any, ClassVar, Optional
 
 from labscript import compiler as ls_compiler
 from labscriptlib.calibration import spec_freq_calib
@@ -7,6 +11,150 @@ from labscriptlib.connection_table import devices
 from labscriptlib.shot_globals import shot_globals
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def comb_amplitudes(n_tones: int) -> tuple[float, ...]:
+    """Amplitudes of an ``n_tones`` mm-wave comb that cannot clip for any phases.
+
+    A single tone uses 0.965, since the amplitude cannot be 1 due to a bug in
+    the spectrum card server (at most 0.99). For more tones the amplitudes sum
+    to 1, so the peak of the waveform stays in range for all tone phases.
+    """
+    if n_tones < 1:
+        raise ValueError("A mm-wave pulse needs at least one tone")
+    if n_tones == 1:
+        return (0.965,)
+    return (1 / n_tones,) * n_tones
+
+
+def segment_key(method: str, params: dict[str, Any]) -> str:
+    """Content address of a spectrum card segment.
+
+    Segments with the same key produce the same samples on the same channel.
+    Array parameters (frequencies, phases, sample arrays) are hashed by their
+    bytes, so waveforms given by samples are matched as well as those given by
+    parameters. The start time and loop count are not part of the key.
+    """
+    digest = hashlib.sha1(method.encode())
+    for name, value in sorted(params.items()):
+        digest.update(name.encode())
+        if isinstance(value, (list, tuple, np.ndarray)):
+            array = np.ascontiguousarray(value)
+            digest.update(str(array.dtype).encode() + str(array.shape).encode())
+            digest.update(array.tobytes())
+        else:
+            digest.update(repr(value).encode())
+    return digest.hexdigest()
+
+
+@dataclass
+class _Segment:
+    method: str
+    t: float
+    duration: float
+    loops: int
+    ch: int
+    key: str
+    params: dict[str, Any]
+
+
+class SpectrumSegmentCache:
+    """Deduplicates the segments sent to a spectrum card in sequence mode.
+
+    ``single_freq``, ``comb`` and ``sweep`` calls are collected instead of sent
+    to the card right away. On ``flush`` the segments are sent in time order,
+    and runs of identical segments (same content address, see ``segment_key``)
+    played back to back on a channel are sent as one segment with more loops,
+    i.e. a single step of the card's sequence table. Repeats that are not
+    contiguous, as in Ramsey and echo sequences, are counted in the logged
+    statistics.
+
+    One cache is kept per card and shot file, see ``for_card``. Segments still
+    queued when the sequence stops would never reach the card, which
+    ``check_flushed`` reports.
+    """
+
+    _caches: ClassVar[dict[tuple[str, str], 'SpectrumSegmentCache']] = {}
+
+    def __init__(self, card):
+        self.card = card
+        self._segments: list[_Segment] = []
+
+    @classmethod
+    def for_card(cls, card) -> 'SpectrumSegmentCache':
+        """Cache of ``card`` for the shot being compiled.
+
+        Caches of earlier shots (e.g. of a shot that failed before flushing) are dropped.
+        """
+        shot = str(ls_compiler.hdf5_filename)
+        for cache_key in [key for key in cls._caches if key[0] != shot]:
+            del cls._caches[cache_key]
+        cache_key = (shot, card.name)
+        if cache_key not in cls._caches:
+            cls._caches[cache_key] = cls(card)
+        return cls._caches[cache_key]
+
+    @classmethod
+    def check_flushed(cls):
+        """Raise if a cache of the shot being compiled still holds queued segments."""
+        shot = str(ls_compiler.hdf5_filename)
+        for (cache_shot, card_name), cache in cls._caches.items():
+            if cache_shot == shot and cache._segments:
+                raise RuntimeError(
+                    f'{card_name}: {len(cache._segments)} queued segments were never sent to the card, '
+                    f'call Microwave.reset_spectrum before stopping the sequence'
+                )
+
+    def add(self, method: str, t: float, duration: float, ch: int, loops: int = 1, **params):
+        """Queue a call ``card.<method>(t, duration=duration, ch=ch, loops=loops, **params)``."""
+        key = segment_key(method, dict(params, duration=duration, ch=ch))
+        self._segments.append(_Segment(method, t, duration, loops, ch, key, params))
+
+    def single_freq(self, t, duration, ch, loops=1, **params):
+        self.add('single_freq', t, duration, ch, loops, **params)
+
+    def comb(self, t, duration, ch, loops=1, **params):
+        self.add('comb', t, duration, ch, loops, **params)
+
+    def sweep(self, t, duration, ch, loops=1, **params):
+        self.add('sweep', t, duration, ch, loops, **params)
+
+    def merged(self) -> list[_Segment]:
+        """Queued segments with contiguous repeats merged into loops, sorted by time and channel."""
+        merged: list[_Segment] = []
+        last_by_ch: dict[int, _Segment] = {}
+        for segment in sorted(self._segments, key=lambda segment: (segment.t, segment.ch)):
+            last = last_by_ch.get(segment.ch)
+            if last is not None:
+                last_end = round(last.t + last.duration * last.loops, 10)
+                if last.key == segment.key and last_end == round(segment.t, 10):
+                    last.loops += segment.loops
+                    continue
+            last_by_ch[segment.ch] = _Segment(**vars(segment))
+            merged.append(last_by_ch[segment.ch])
+        return merged
+
+    def flush(self):
+        """Send the queued segments to the card and clear the queue."""
+        merged = self.merged()
+        for segment in merged:
+            getattr(self.card, segment.method)(
+                segment.t,
+                duration=segment.duration,
+                ch=segment.ch,
+                loops=segment.loops,
+                **segment.params,
+            )
+        if self._segments:
+            n_distinct = len({(segment.ch, segment.key) for segment in self._segments})
+            logger.info(
+                f'{self.card.name}: {len(self._segments)} segments requested, {len(merged)} sent, '
+                f'{n_distinct} distinct waveforms'
+            )
+        self._segments.clear()
+
 
 class Microwave:
     """Controls for microwave wave generation and manipulation.
@@ -42,6 +190,7 @@ class Microwave:
         self.uwave_dds_switch_on = True
         self.uwave_absorp_switch_on = False
         self.spectrum_uwave_power = -1
+        self.segments = SpectrumSegmentCache.for_card(devices.spectrum_uwave)
         # dBm power set at the input of dds switch, this power is set
         # to below the amplifier damage threshold
         devices.uwave_dds_switch.go_high(t)
@@ -86,6 +235,7 @@ class Microwave:
             ext_clock_freq=10,
             export_data=shot_globals.mmwave_export_spectrum_segments,
             export_path=str(hdf5_path.parent),
+            smart_programming=True,
         )
 
     def do_pulse(self, t, dur, detuning: Optional[float] = None):
@@ -109,7 +259,7 @@ class Microwave:
         self.uwave_absorp_switch_on = True
 
         pulse_detuning = self.mw_detuning if detuning is None else detuning
-        devices.spectrum_uwave.single_freq(
+        self.segments.single_freq(
             t,# - self.CONST_SPECTRUM_CARD_OFFSET,
             duration=dur,
             freq=spec_freq_calib(pulse_detuning),
@@ -152,8 +302,8 @@ class Microwave:
             The final mm-wave frequency is then mm-wave LO frequency + IF frequency
         phase: float
             Phase of the waveform at the beginning of the pulse, in degrees.
-            For phase coherence between pulses, one must manually compute
-            the accumulated phase between the pulses.
+            For phase coherence between pulses, use ``MMWaveSequencer``, which
+            computes the accumulated phase between the pulses.
 
         Returns
         -------
@@ -175,19 +325,14 @@ class Microwave:
         pulse_detuning = self.mmwave_spcm_freq if detuning is None else detuning
         pulse_detuning = ensure_list(pulse_detuning)
         phase = [0]*len(pulse_detuning) if phase is None else phase
-        if len(pulse_detuning) == 1:
-            amplitude = 0.965
-        elif len(pulse_detuning) == 2:
-            amplitude = [0.5,0.5]
-        else:
-            raise ValueError("This function cannot handle more than two tones now. Need optimized phases and duration for that. ")
-    
+        amplitude = comb_amplitudes(len(pulse_detuning))
+
         if shot_globals.do_mmwave_pulse:
-            devices.spectrum_uwave.comb(
+            self.segments.comb(
                 t0,
                 duration=duration,
                 freqs=pulse_detuning,
-                amplitudes=ensure_list(amplitude),#0.965,#0.98,  # the amplitude cannot be 1 due to bug in spectrum card server, at most 0.99
+                amplitudes=list(amplitude),
                 phases=ensure_list(phase),
                 ch=1,
                 loops=1,
@@ -219,7 +364,7 @@ class Microwave:
         self.uwave_absorp_switch_on = True
 
         total_dur = dur + dur_between_pulse
-        devices.spectrum_uwave.single_freq(
+        self.segments.single_freq(
             t - self.CONST_SPECTRUM_CARD_OFFSET,
             duration=total_dur,
             freq=spec_freq_calib(self.mw_detuning),
@@ -260,7 +405,7 @@ class Microwave:
         t += self.CONST_SPECTRUM_CARD_OFFSET
         devices.uwave_absorp_switch.go_high(t)
         self.uwave_absorp_switch_on = True
-        devices.spectrum_uwave.sweep(
+        self.segments.sweep(
             t - self.CONST_SPECTRUM_CARD_OFFSET,
             duration=dur,
             start_freq=spec_freq_calib(start_freq),
@@ -282,7 +427,8 @@ class Microwave:
         """Reset the spectrum card by sending a dummy segment.
 
         Due to spectrum card behavior, two pulses are required to properly stop
-        the card. This method sends a dummy segment and stops the card.
+        the card. This method sends the queued pulses of the shot, then a dummy
+        segment, and stops the card.
 
         Args:
             t (float): Time to perform the reset
@@ -290,6 +436,7 @@ class Microwave:
         Returns:
             float: End time after reset is complete
         """
+        self.segments.flush()
         # dummy segment ####
         devices.spectrum_uwave.single_freq(
             t, duration=100e-6, freq=10**6, amplitude=0.99, phase=0, ch=0, loops=1
@@ -301,3 +448,106 @@ class Microwave:
         devices.spectrum_uwave.stop()
 
         return t
+
+
+class MMWaveSequencer:
+    """Phase-coherent mm-wave pulses with the phase bookkeeping done for the caller.
+
+    Each tone has a reference time; a pulse with phase ``phi`` on a tone of
+    frequency ``f`` is emitted with phase ``phi + 360 * ((t - t_ref) * f mod 1)``,
+    i.e. as if the tone had been running continuously since ``t_ref``. Pulses are
+    collected by ``add_pulse`` and their phases computed in one pass by ``flush``,
+    which then emits all segments to the spectrum card.
+
+    Times passed to the sequencer are the times at the atoms; the segments are
+    sent ``card_delay`` earlier to make up for the spectrum card latency.
+    """
+
+    def __init__(self, microwave: Microwave, t_ref: float, card_delay: float = 0):
+        """
+        Parameters
+        ----------
+        microwave: Microwave
+            Microwave system emitting the pulses
+        t_ref: float
+            Default reference time of all tones
+        card_delay: float
+            Delay between the spectrum card trigger and its output
+        """
+        self.microwave = microwave
+        self.t_ref = t_ref
+        self.card_delay = card_delay
+        self.tone_references: dict[float, float] = {}
+
+        self._starts: list[float] = []
+        self._durations: list[float] = []
+        self._freqs: list[np.ndarray] = []
+        self._phases: list[np.ndarray] = []
+        self._keep_switch_on: list[bool] = []
+
+    def set_reference(self, t: float, freqs=None):
+        """Restart the phase clock of the given tones (all tones if None) at ``t``."""
+        if freqs is None:
+            self.t_ref = t
+            self.tone_references.clear()
+        else:
+            self.tone_references.update(dict.fromkeys(np.atleast_1d(freqs).tolist(), t))
+
+    def add_pulse(self, t: float, duration: float, freqs, phases=0, keep_switch_on: bool = False) -> float:
+        """Queue a pulse of one or more tones.
+
+        Parameters
+        ----------
+        t: float
+            Start time of the pulse at the atoms
+        duration: float
+            Duration of the pulse
+        freqs: float or array_like
+            Spectrum card output frequency of each tone, in Hz
+        phases: float or array_like
+            Phase of each tone in its rotating frame, in degrees
+        keep_switch_on: bool
+            Leave the mm-wave switch on after the pulse
+
+        Returns
+        -------
+        float
+            End time of the pulse
+        """
+        freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+        self._starts.append(t)
+        self._durations.append(duration)
+        self._freqs.append(freqs)
+        self._phases.append(np.broadcast_to(np.asarray(phases, dtype=float), freqs.shape))
+        self._keep_switch_on.append(keep_switch_on)
+        return t + duration
+
+    def phases(self) -> list[np.ndarray]:
+        """Phases in degrees of the tones of each queued pulse, including the accrued phase."""
+        if not self._starts:
+            return []
+        n_tones = [len(freqs) for freqs in self._freqs]
+        freqs = np.concatenate(self._freqs)
+        pulse_starts = np.repeat(self._starts, n_tones)
+        t_refs = np.array([self.tone_references.get(f, self.t_ref) for f in freqs.tolist()])
+        accrued = 360 * (((pulse_starts - t_refs) * freqs) % 1)
+        return np.split(np.concatenate(self._phases) + accrued, np.cumsum(n_tones)[:-1])
+
+    def flush(self):
+        """Emit all queued pulses and clear the queue."""
+        for start, duration, freqs, phases, keep_switch_on in zip(
+                self._starts, self._durations, self._freqs, self.phases(), self._keep_switch_on,
+        ):
+            self.microwave.do_mmwave_pulse(
+                start - self.card_delay,
+                duration,
+                detuning=freqs.tolist(),
+                phase=phases.tolist(),
+                keep_switch_on=keep_switch_on,
+                switch_offset=self.card_delay,
+            )
+        self._starts.clear()
+        self._durations.clear()
+        self._freqs.clear()
+        self._phases.clear()
+        self._keep_switch_on.clear()
@@ -1,6 +1,19 @@
+import itertools
+import types
+
+import numpy as np
 import pytest
 
-from labscriptlib.experiment_components.lasers import RydLasers, PointingConfig
+from labscriptlib.experiment_components.lasers import (
+    D2Lasers,
+    D2Pulse,
+    D2PulsePlanner,
+    PointingConfig,
+    RydLasers,
+    ShutterConfig,
+    ShutterScheduler,
+)
+from labscriptlib.experiment_components.lasers import _PartialPlan
 
 
 @pytest.fixture
@@ -16,3 +29,142 @@ def rydlasers():
 
 class TestRydLasers:
     pass
+
+
+class FakeShutter:
+    def __init__(self):
+        self.events = []
+
+    def open(self, t):
+        self.events.append(('open', t))
+
+    def close(self, t):
+        self.events.append(('close', t))
+
+
+@pytest.fixture
+def scheduler():
+    basic_shutters = [
+        ShutterConfig.TA,
+        ShutterConfig.REPUMP,
+        ShutterConfig.MOT_XY,
+        ShutterConfig.MOT_Z,
+        ShutterConfig.IMG_XY,
+        ShutterConfig.IMG_Z,
+        ShutterConfig.OPTICAL_PUMPING,
+    ]
+    return ShutterScheduler(
+        {shutter: FakeShutter() for shutter in basic_shutters},
+        min_off_time=6e-3,
+        min_on_time=4e-3,
+        turn_off_time=2e-3,
+    )
+
+
+class TestShutterScheduler:
+    def test_open_waits_for_min_off_time(self, scheduler):
+        scheduler.transition(0.1, ShutterConfig.MOT_FULL)
+        t_close = scheduler.transition(0.2, ShutterConfig.NONE)
+        assert scheduler.transition(t_close + 1e-3, ShutterConfig.TA) == pytest.approx(t_close - 2e-3 + 6e-3)
+
+    def test_close_waits_for_min_on_time(self, scheduler):
+        scheduler.transition(0.1, ShutterConfig.TA)
+        assert scheduler.transition(0.101, ShutterConfig.NONE) == pytest.approx(0.1 + 4e-3 + 2e-3)
+
+    def test_both_constraints_hold(self, scheduler):
+        scheduler.transition(0.1, ShutterConfig.TA)
+        scheduler.transition(0.2, ShutterConfig.REPUMP)
+        # TA closed at 0.198 can reopen at 0.204, REPUMP opened at 0.2 can be closed by 0.206
+        t = scheduler.transition(0.201, ShutterConfig.TA)
+        assert t == pytest.approx(0.2 + 4e-3 + 2e-3)
+
+    def test_train_keeps_spacing(self, scheduler):
+        times = scheduler.schedule_train(
+            [0.1, 0.101, 0.2], [ShutterConfig.TA, ShutterConfig.NONE, ShutterConfig.REPUMP]
+        )
+        np.testing.assert_allclose(np.diff(times), [6e-3, 0.099], atol=1e-12)
+        ta_shutter = scheduler.shutters[0]
+        assert ta_shutter.events == [('open', 0.1), ('close', times[1] - 2e-3)]
+
+
+class TestD2PulsePlanner:
+    @pytest.fixture
+    def planner(self, scheduler):
+        scheduler.transition(0.1, ShutterConfig.MOT_FULL)
+        d2 = types.SimpleNamespace(shutter_scheduler=scheduler, ta_freq=0, repump_freq=0)
+        return D2PulsePlanner(d2)
+
+    def test_repump_shutter_stays_open_while_repump_off(self, planner):
+        planner.add(D2Pulse(1e-3, ShutterConfig.OPTICAL_PUMPING_FULL, 0.5, 1))
+        planner.add(D2Pulse(1e-3, ShutterConfig.OPTICAL_PUMPING_TA, 1, 0))
+        pump, kill = planner.plan(0.2)
+        assert kill.shutter_config == ShutterConfig.OPTICAL_PUMPING_FULL
+        assert kill.t_transition is None
+        assert kill.t_start == pump.t_end
+
+    def test_required_closed_shutter(self, planner):
+        planner.add(D2Pulse(1e-3, ShutterConfig.OPTICAL_PUMPING_FULL, 0.5, 1))
+        planner.add(D2Pulse(1e-3, ShutterConfig.OPTICAL_PUMPING_TA, 1, 0, require_closed=ShutterConfig.REPUMP))
+        _, kill = planner.plan(0.2)
+        assert kill.shutter_config == ShutterConfig.OPTICAL_PUMPING_TA
+        assert kill.t_transition is not None
+
+    def test_frequency_ramp_overlaps_shutter_motion(self, planner):
+        planner.add(D2Pulse(1e-3, ShutterConfig.IMG_FULL, 1, 1, ta_detuning=-10))
+        (pulse,) = planner.plan(0.2)
+        assert pulse.ta_ramp
+        assert pulse.t_start == pytest.approx(0.2 + D2Lasers.CONST_SHUTTER_TURN_ON_TIME)
+
+    def test_not_slower_than_pulse_by_pulse(self, planner):
+        pulses = [
+            D2Pulse(1e-3, ShutterConfig.MOT_REPUMP, 0, 1),
+            D2Pulse(1e-3, ShutterConfig.MOT_TA, 1, 0),
+            D2Pulse(1e-3, ShutterConfig.MOT_FULL, 1, 1),
+        ]
+        for pulse in pulses:
+            planner.add(pulse)
+        planned = planner.plan(0.2)
+        # the upstream shutters never need to move, so the pulses follow each other directly
+        assert all(p.t_transition is None for p in planned)
+        assert planned[-1].t_end == pytest.approx(0.2 + 3e-3)
+
+    def test_earliest_end_over_all_configs(self, planner):
+        pulses = [
+            D2Pulse(1e-3, ShutterConfig.OPTICAL_PUMPING_FULL, 0, 1),
+            D2Pulse(0.5e-3, ShutterConfig.IMG_TA, 1, 0, delay=2e-3),
+            D2Pulse(2e-3, ShutterConfig.MOT_REPUMP, 0, 1),
+            D2Pulse(1e-3, ShutterConfig.OPTICAL_PUMPING_TA, 1, 0, delay=1e-3),
+        ]
+        for pulse in pulses:
+            planner.add(pulse)
+
+        d2 = planner.d2_lasers
+        earliest = np.inf
+        for configs in itertools.product(*map(planner.allowed_configs, pulses)):
+            plan = _PartialPlan(d2.shutter_scheduler.copy(), d2.ta_freq, d2.repump_freq, 0.2)
+            for pulse, config in zip(pulses, configs):
+                plan = planner._extend(plan, pulse, config)
+            earliest = min(earliest, plan.t_end)
+        assert planner.plan(0.2)[-1].t_end == earliest
+
+    def test_beams_switched_off_once_before_transition(self, scheduler):
+        class RecordingD2:
+            def __init__(self):
+                self.shutter_scheduler = scheduler
+                self.ta_freq = self.repump_freq = 0
+                self.calls = []
+
+            def __getattr__(self, name):
+                return lambda t, *args: self.calls.append((name, t))
+
+        scheduler.transition(0.1, ShutterConfig.MOT_FULL)
+        d2 = RecordingD2()
+        planner = D2PulsePlanner(d2)
+        planner.add(D2Pulse(1e-3, ShutterConfig.MOT_FULL, 1, 1))
+        planner.add(D2Pulse(1e-3, ShutterConfig.IMG_FULL, 1, 1))
+        first, second = planner.plan(0.2)
+        assert second.t_transition - D2Lasers.CONST_SHUTTER_TURN_ON_TIME == first.t_end
+        planner.execute(0.2)
+
+        offs = [call for call in d2.calls if call[0] in ('ta_aom_off', 'repump_aom_off')]
+        assert len(offs) == len(set(offs)) == 4
@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+
+from labscriptlib.experiment_components.microwaves import (
+    MMWaveSequencer,
+    SpectrumSegmentCache,
+    comb_amplitudes,
+    segment_key,
+)
+
+
+class FakeMicrowave:
+    def __init__(self):
+        self.pulses = []
+
+    def do_mmwave_pulse(self, t0, duration, detuning=None, phase=None, keep_switch_on=False, switch_offset=0):
+        self.pulses.append(dict(
+            t0=t0, duration=duration, detuning=detuning, phase=phase,
+            keep_switch_on=keep_switch_on, switch_offset=switch_offset,
+        ))
+
+
+class FakeCard:
+    name = 'fake_card'
+
+    def __init__(self):
+        self.calls = []
+
+    def single_freq(self, t, **kwargs):
+        self.calls.append(('single_freq', t, kwargs))
+
+    def comb(self, t, **kwargs):
+        self.calls.append(('comb', t, kwargs))
+
+
+class TestCombAmplitudes:
+    def test_single_tone(self):
+        assert comb_amplitudes(1) == (0.965,)
+
+    @pytest.mark.parametrize('n_tones', [2, 3, 7])
+    def test_multi_tone_cannot_clip(self, n_tones):
+        amplitudes = comb_amplitudes(n_tones)
+        assert len(amplitudes) == n_tones
+        assert sum(amplitudes) == pytest.approx(1)
+
+    def test_no_tones(self):
+        with pytest.raises(ValueError):
+            comb_amplitudes(0)
+
+
+class TestMMWaveSequencer:
+    def test_phase_accrual(self):
+        microwave = FakeMicrowave()
+        sequencer = MMWaveSequencer(microwave, t_ref=1.0, card_delay=1e-5)
+        freq = 1e8 + 1234.5
+        t_end = sequencer.add_pulse(1.0, 2e-6, freq, phases=0)
+        sequencer.add_pulse(t_end + 3.7e-6, 4e-6, freq, phases=90)
+        sequencer.flush()
+
+        first, second = microwave.pulses
+        assert first['t0'] == pytest.approx(1.0 - 1e-5)
+        assert first['switch_offset'] == 1e-5
+        assert first['phase'] == pytest.approx([0])
+        expected = 90 + 360 * (((t_end + 3.7e-6 - 1.0) * freq) % 1)
+        assert second['phase'] == pytest.approx([expected])
+
+    def test_flush_clears_queue(self):
+        microwave = FakeMicrowave()
+        sequencer = MMWaveSequencer(microwave, t_ref=0)
+        sequencer.add_pulse(1e-3, 1e-6, [1e8, 1.1e8])
+        sequencer.flush()
+        sequencer.flush()
+        assert len(microwave.pulses) == 1
+        assert microwave.pulses[0]['detuning'] == [1e8, 1.1e8]
+
+    def test_per_tone_reference(self):
+        microwave = FakeMicrowave()
+        sequencer = MMWaveSequencer(microwave, t_ref=0)
+        sequencer.set_reference(0.5, freqs=1.1e8)
+        sequencer.add_pulse(0.75 + 1.3e-9, 1e-6, [1e8, 1.1e8], phases=[10, 20])
+        sequencer.flush()
+
+        phases = np.array(microwave.pulses[0]['phase'])
+        expected = [
+            10 + 360 * (((0.75 + 1.3e-9) * 1e8) % 1),
+            20 + 360 * (((0.25 + 1.3e-9) * 1.1e8) % 1),
+        ]
+        np.testing.assert_allclose(phases, expected)
+
+
+class TestSpectrumSegmentCache:
+    def test_segment_key(self):
+        params = dict(duration=1e-6, ch=1, freqs=[1e8, 1.1e8], phases=[0, 90])
+        assert segment_key('comb', params) == segment_key('comb', dict(params, freqs=np.array([1e8, 1.1e8])))
+        assert segment_key('comb', params) != segment_key('comb', dict(params, phases=[0, 91]))
+        assert segment_key('comb', params) != segment_key('single_freq', params)
+
+    def test_contiguous_repeats_become_loops(self):
+        card = FakeCard()
+        cache = SpectrumSegmentCache(card)
+        for i in range(3):
+            cache.single_freq(1e-3 + i * 2e-6, 2e-6, ch=0, freq=1e8, amplitude=0.99, phase=0)
+        cache.single_freq(1e-3 + 10e-6, 2e-6, ch=0, freq=1e8, amplitude=0.99, phase=0)
+        cache.single_freq(1e-3 + 12e-6, 2e-6, ch=0, freq=1e8, amplitude=0.99, phase=90)
+        cache.flush()
+
+        assert [(t, kwargs['loops']) for _, t, kwargs in card.calls] == [
+            (1e-3, 3), (1e-3 + 10e-6, 1), (1e-3 + 12e-6, 1),
+        ]
+
+    def test_channels_are_separate(self):
+        card = FakeCard()
+        cache = SpectrumSegmentCache(card)
+        cache.comb(0, 1e-6, ch=1, freqs=[1e8], amplitudes=[0.965], phases=[0])
+        cache.comb(0, 1e-6, ch=0, freqs=[1e8], amplitudes=[0.965], phases=[0])
+        cache.comb(1e-6, 1e-6, ch=1, freqs=[1e8], amplitudes=[0.965], phases=[0])
+        cache.flush()
+        cache.flush()
+
+        assert [(kwargs['ch'], kwargs['loops']) for _, _, kwargs in card.calls] == [(0, 1), (1, 2)]
+
+    def test_channels_interleaved_in_time(self):
+        card = FakeCard()
+        cache = SpectrumSegmentCache(card)
+        for i in range(2):
+            cache.single_freq(i * 2e-6, 1e-6, ch=0, freq=1e8, amplitude=0.99, phase=0)
+            cache.single_freq(i * 2e-6, 2e-6, ch=1, freq=1e8, amplitude=0.99, phase=0)
+            cache.single_freq(i * 2e-6 + 1e-6, 1e-6, ch=0, freq=1e8, amplitude=0.99, phase=0)
+        cache.flush()
+
+        assert [(t, kwargs['ch'], kwargs['loops']) for _, t, kwargs in card.calls] == [(0, 0, 4), (0, 1, 2)]
+
+        cache.single_freq(0, 1e-6, ch=1, freq=1e8, amplitude=0.99, phase=0)
+        cache.single_freq(1e-6, 1e-6, ch=0, freq=1e8, amplitude=0.99, phase=0)
+        cache.single_freq(2e-6, 1e-6, ch=1, freq=1e8, amplitude=0.99, phase=0)
+        card.calls.clear()
+        cache.flush()
+        assert [(t, kwargs['ch']) for _, t, kwargs in card.calls] == [(0, 1), (1e-6, 0), (2e-6, 1)]
+
+    def test_check_flushed(self):
+        card = FakeCard()
+        cache = SpectrumSegmentCache.for_card(card)
+        cache.single_freq(0, 1e-6, ch=0, freq=1e8, amplitude=0.99, phase=0)
+        with pytest.raises(RuntimeError, match='fake_card: 1 queued segments'):
+            SpectrumSegmentCache.check_flushed()
+        cache.flush()
+        SpectrumSegmentCache.check_flushed()
@@ -0,0 +1,284 @@
+"""Streaming of tweezer comb moves through the spectrum card FIFO.
+
+A rearrangement move sweeps every tone of a tweezer comb from its start to its
+end frequency. Precomputing the whole waveform into card memory does not scale
+to long moves on both channels, so a move is described here by a few parameters
+(a ``CombStream`` of static and moving ``CombSegment``s) and its samples are
+generated in chunks while the card plays the previous ones:
+
+- ``CombStream.chunks`` yields int16 chunks of the waveform, with static
+  segments rendered by ``waveform_synthesis.CombSynthesizer``. The phase of every
+  tone is continuous across segment boundaries, so static -> moving -> static
+  has no phase jumps.
+- ``prefetch`` computes the next chunks in a background thread (double
+  buffering), so the FIFO is refilled while the current chunk is transferred.
+
+At compile time only the stream descriptor is saved to the shot file (see
+``CombStream.save``); the card driver loads it with ``CombStream.load`` and
+streams ``prefetch(stream.chunks(chunk_size))`` into the FIFO. A driver that does
+so reports it with a true ``supports_fifo_streams`` attribute; the current
+Spectrum driver does not, so ``SpectrumManagerFifo.move_tweezers`` refuses to
+compile moves for it.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import ClassVar, Iterator, Literal
+
+import h5py
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from labscriptlib.waveform_synthesis import CombSynthesizer
+
+RampType = Literal['static', 'linear', 'min_jerk']
+
+
+def _ramp_profile(ramp: RampType, x: NDArray) -> NDArray:
+    """Fraction ``s(x)`` of the sweep completed at fraction ``x`` of the duration."""
+    if ramp == 'static':
+        return np.zeros_like(x)
+    if ramp == 'linear':
+        return x
+    if ramp == 'min_jerk':
+        return x**3 * (10 - 15 * x + 6 * x**2)
+    raise ValueError(f'Unknown ramp type {ramp!r}')
+
+
+def _ramp_integral(ramp: RampType, x: NDArray) -> NDArray:
+    """Integral of ``_ramp_profile`` from 0 to ``x``."""
+    if ramp == 'static':
+        return np.zeros_like(x)
+    if ramp == 'linear':
+        return x**2 / 2
+    if ramp == 'min_jerk':
+        return x**4 * (2.5 - 3 * x + x**2)
+    raise ValueError(f'Unknown ramp type {ramp!r}')
+
+
+@dataclass(frozen=True)
+class CombSegment:
+    """Part of a stream in which all tones hold or sweep together.
+
+    Attributes
+    ----------
+    duration : float
+        Duration of the segment, in s.
+    freqs_start, freqs_end : ndarray
+        Tone frequencies at the start and end of the segment, in Hz.
+    amplitudes_start, amplitudes_end : ndarray
+        Relative tone amplitudes, ramped with the same profile as the frequencies.
+    phases : ndarray
+        Tone phases at the start of the segment, in degrees.
+    ramp : {'static', 'linear', 'min_jerk'}
+        Sweep profile. ``min_jerk`` has zero velocity and acceleration at both
+        ends, which keeps the atoms in the moving tweezers.
+    """
+    duration: float
+    freqs_start: NDArray
+    freqs_end: NDArray
+    amplitudes_start: NDArray
+    amplitudes_end: NDArray
+    phases: NDArray
+    ramp: RampType = 'linear'
+
+    def cycles(self, t: NDArray) -> NDArray:
+        """Phase of each tone at times ``t`` since the segment start, in cycles, shape ``(len(t), n_tones)``."""
+        x = (np.asarray(t) / self.duration)[:, None]
+        sweep = (self.freqs_end - self.freqs_start) * self.duration * _ramp_integral(self.ramp, x)
+        return self.phases / 360 + self.freqs_start * np.asarray(t)[:, None] + sweep
+
+    def amplitudes(self, t: NDArray) -> NDArray:
+        x = (np.asarray(t) / self.duration)[:, None]
+        return self.amplitudes_start + (self.amplitudes_end - self.amplitudes_start) * _ramp_profile(self.ramp, x)
+
+    @property
+    def end_phases(self) -> NDArray:
+        """Tone phases at the end of the segment, in degrees."""
+        return 360 * np.mod(self.cycles(np.array([self.duration]))[0], 1)
+
+
+@dataclass
+class CombStream:
+    """Sequence of comb segments streamed on one channel, with continuous tone phases.
+
+    Built from the comb playing before the stream, then extended with ``hold``
+    and ``move``::
+
+        stream = CombStream(ch=0, sample_rate=625e6, freqs=f0, amplitudes=a0, phases=p0)
+        stream.hold(10e-6).move(f1, 200e-6, ramp='min_jerk').hold(10e-6)
+    """
+    CHUNK_SIZE: ClassVar[int] = 2**16
+    """Default number of samples per chunk"""
+
+    ch: int
+    sample_rate: float
+    freqs: NDArray
+    amplitudes: NDArray
+    phases: NDArray
+    segments: list[CombSegment] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.freqs = np.atleast_1d(np.asarray(self.freqs, dtype=float))
+        self.amplitudes = np.broadcast_to(np.asarray(self.amplitudes, dtype=float), self.freqs.shape).copy()
+        self.phases = np.broadcast_to(np.asarray(self.phases, dtype=float), self.freqs.shape).copy()
+
+    @property
+    def duration(self) -> float:
+        return sum(segment.duration for segment in self.segments)
+
+    @property
+    def n_samples(self) -> int:
+        return sum(self._segment_samples())
+
+    @property
+    def end_phases(self) -> NDArray:
+        """Tone phases after the last segment, in degrees."""
+        return self.segments[-1].end_phases if self.segments else self.phases
+
+    def hold(self, duration: float) -> CombStream:
+        """Append a static segment at the current frequencies."""
+        return self._append(duration, self.freqs, self.amplitudes, 'static')
+
+    def move(
+            self,
+            freqs_end: ArrayLike,
+            duration: float,
+            amplitudes_end: ArrayLike | None = None,
+            ramp: RampType = 'min_jerk',
+    ) -> CombStream:
+        """Append a sweep of all tones to ``freqs_end`` (Hz) and optionally ``amplitudes_end``."""
+        freqs_end = np.asarray(freqs_end, dtype=float)
+        if freqs_end.shape != self.freqs.shape:
+            raise ValueError(f'Cannot move {len(self.freqs)} tones to {freqs_end.size} frequencies')
+        amplitudes_end = self.amplitudes if amplitudes_end is None else np.broadcast_to(
+            np.asarray(amplitudes_end, dtype=float), self.freqs.shape,
+        )
+        return self._append(duration, freqs_end, amplitudes_end, ramp)
+
+    def _append(self, duration, freqs_end, amplitudes_end, ramp) -> CombStream:
+        if duration <= 0:
+            raise ValueError(f'Segment duration must be positive, got {duration}')
+        # the segment must cover whole samples for the next one to start on the
+        # sample grid with the phases computed here
+        duration = round(duration * self.sample_rate) / self.sample_rate
+        segment = CombSegment(
+            duration, self.freqs, np.array(freqs_end), self.amplitudes, np.array(amplitudes_end),
+            self.end_phases, ramp,
+        )
+        self.segments.append(segment)
+        self.freqs = segment.freqs_end
+        self.amplitudes = segment.amplitudes_end
+        return self
+
+    def _segment_samples(self) -> list[int]:
+        return [round(segment.duration * self.sample_rate) for segment in self.segments]
+
+    def full_scale(self) -> float:
+        """Scale from relative amplitude to int16 such that no sample can clip."""
+        peak = max(
+            max(np.abs(segment.amplitudes_start).sum(), np.abs(segment.amplitudes_end).sum())
+            for segment in self.segments
+        )
+        return np.iinfo(np.int16).max / max(peak, 1)
+
+    def chunks(self, chunk_size: int | None = None) -> Iterator[NDArray[np.int16]]:
+        """Generate the samples of the stream in int16 chunks of ``chunk_size`` samples.
+
+        The last chunk may be shorter. Chunks do not cross segment boundaries.
+        Static segments are rendered by ``CombSynthesizer``; moving segments,
+        whose frequencies change from sample to sample, are evaluated directly.
+        """
+        chunk_size = self.CHUNK_SIZE if chunk_size is None else chunk_size
+        scale = self.full_scale()
+        for segment, n_samples in zip(self.segments, self._segment_samples()):
+            if segment.ramp == 'static':
+                synthesizer = CombSynthesizer(
+                    segment.freqs_start, segment.amplitudes_start, segment.phases, self.sample_rate,
+                )
+                for start in range(0, n_samples, chunk_size):
+                    yield synthesizer.render(min(chunk_size, n_samples - start), start=start, full_scale=scale)
+                continue
+            for start in range(0, n_samples, chunk_size):
+                t = np.arange(start, min(start + chunk_size, n_samples)) / self.sample_rate
+                cycles = np.mod(segment.cycles(t), 1)
+                waveform = (segment.amplitudes(t) * np.cos(2 * np.pi * cycles)).sum(axis=1)
+                yield np.round(scale * waveform).astype(np.int16)
+
+    def save(self, group: h5py.Group) -> None:
+        """Save the stream descriptor (not the samples) to ``group``."""
+        group.attrs['ch'] = self.ch
+        group.attrs['sample_rate'] = self.sample_rate
+        group.attrs['ramps'] = [segment.ramp for segment in self.segments]
+        group['durations'] = [segment.duration for segment in self.segments]
+        for name in ('freqs_start', 'freqs_end', 'amplitudes_start', 'amplitudes_end', 'phases'):
+            group[name] = np.array([getattr(segment, name) for segment in self.segments])
+
+    @classmethod
+    def load(cls, group: h5py.Group) -> CombStream:
+        ramps = [ramp.decode() if isinstance(ramp, bytes) else str(ramp) for ramp in group.attrs['ramps']]
+        segments = [
+            CombSegment(float(duration), *arrays, ramp)
+            for duration, *arrays, ramp in zip(
+                group['durations'][()],
+                group['freqs_start'][()], group['freqs_end'][()],
+                group['amplitudes_start'][()], group['amplitudes_end'][()],
+                group['phases'][()],
+                ramps,
+            )
+        ]
+        first, last = segments[0], segments[-1]
+        stream = cls(
+            int(group.attrs['ch']), float(group.attrs['sample_rate']),
+            first.freqs_start, first.amplitudes_start, first.phases,
+        )
+        stream.segments = segments
+        stream.freqs = last.freqs_end
+        stream.amplitudes = last.amplitudes_end
+        return stream
+
+
+def prefetch(chunks: Iterator[NDArray], depth: int = 2) -> Iterator[NDArray]:
+    """Iterate over ``chunks`` while a background thread computes the following ones.
+
+    With the default ``depth`` of 2 this is double buffering: one chunk is handed
+    to the card while the next one is being generated. Exceptions raised by the
+    generator are re-raised in the consumer.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    return
+            put(done)
+        except BaseException as e:
+            put(e)
+
+    thread = threading.Thread(target=produce, name='fifo-prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,77 @@
+"""Removal of instructions that do not change an output.
+
+The component classes each keep track of their own part of the state, so the
+same value is often set several times: ``D2Lasers.__init__`` sets the MOT powers
+and frequencies that ``do_mot`` sets again, ``aom_on`` re-raises lines that are
+already high, ``do_pulse`` re-zeros AOMs that are off, ... Every such instruction
+costs a clock tick, and ticks closer together than the clock line allows fail
+the compilation.
+
+Components add instructions out of time order (shutters open before the
+requested time, pulses are scheduled around a reference, ...), so redundant
+instructions cannot be recognized when they are added. Instead, the instruction
+table of every output is checked once, just before ``labscript.stop``: scalar
+instructions equal to the value the output already holds are dropped. Ramps are
+barriers, since the output holds the end of the ramp afterwards; the instruction
+following a ramp is always kept.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+_UNSET = object()
+
+
+def redundant_times(instructions: dict[float, Any]) -> list[float]:
+    """Times of the scalar instructions that repeat the value held at that time.
+
+    The first instruction and the first one after each ramp (dict instruction)
+    are never redundant.
+    """
+    redundant = []
+    held = _UNSET
+    for t in sorted(instructions):
+        instruction = instructions[t]
+        if isinstance(instruction, dict):
+            held = _UNSET
+        elif held is not _UNSET and instruction == held:
+            redundant.append(t)
+        else:
+            held = instruction
+    return redundant
+
+
+def prune_redundant_instructions(outputs: Iterable[Any]) -> dict[str, int]:
+    """Remove the redundant instructions of ``outputs``, e.g. ``devices.built_devices().values()``.
+
+    Only outputs with a labscript instruction table (analog and digital outputs,
+    shutters) are changed; other devices are skipped.
+
+    Returns
+    -------
+    dict
+        Number of removed instructions per output name, for outputs that had any.
+    """
+    removed = {}
+    n_instructions = 0
+    for output in outputs:
+        instructions = getattr(output, 'instructions', None)
+        if not isinstance(instructions, dict) or not hasattr(output, 'ramp_limits'):
+            continue
+        n_instructions += len(instructions)
+        times = redundant_times(instructions)
+        for t in times:
+            del instructions[t]
+        if times:
+            removed[output.name] = len(times)
+
+    if removed:
+        most = sorted(removed.items(), key=lambda item: item[1], reverse=True)[:5]
+        logger.info(
+            f'removed {sum(removed.values())} of {n_instructions} instructions not changing the output, '
+            f'most on {", ".join(f"{name} ({n})" for name, n in most)}'
+        )
+    return removed
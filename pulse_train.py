@@ -0,0 +1,125 @@
+"""Digital pulse trains emitted as arrays.
+
+Lifetime and echo sequences switch the same AOMs thousands of times. Calling
+``go_high``/``go_low`` per pulse costs a Python call and labscript's per
+instruction checks each time, and a too-short pulse or gap only shows up as an
+error from the PulseBlaster when the shot is compiled. Here the pulses are
+described by arrays of start times and durations (with optional per-pulse padding),
+all edges are checked against the PulseBlaster instruction spacing at once, and
+the instructions are added to the outputs in bulk.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+from labscript import DigitalOut, LabscriptError, compiler
+from numpy.typing import ArrayLike, NDArray
+
+
+@dataclass
+class PulseTrain:
+    """Pulses on a single digital output.
+
+    Attributes
+    ----------
+    output : labscript.DigitalOut
+        Output switched by the pulses.
+    on_times, off_times : ndarray
+        Rising and falling edges, increasing.
+    """
+    output: object
+    on_times: NDArray
+    off_times: NDArray
+
+    @classmethod
+    def from_pulses(
+            cls,
+            output,
+            starts: ArrayLike,
+            durations: ArrayLike,
+            pre_padding: ArrayLike = 0,
+            post_padding: ArrayLike = 0,
+    ) -> PulseTrain:
+        """Pulses from ``starts - pre_padding`` to ``starts + durations + post_padding``.
+
+        ``durations`` and the paddings are broadcast against ``starts``. Pulses
+        must not overlap; pulses that touch are merged into one.
+        """
+        starts = np.asarray(starts, dtype=float)
+        on_times = starts - np.broadcast_to(pre_padding, starts.shape)
+        off_times = starts + np.broadcast_to(durations, starts.shape) + np.broadcast_to(post_padding, starts.shape)
+
+        if np.any(off_times <= on_times):
+            i = np.flatnonzero(off_times <= on_times)[0]
+            raise ValueError(f'Pulse {i} on {output.name} at t = {starts[i]} has no positive length')
+        overlapping = np.flatnonzero(on_times[1:] < off_times[:-1])
+        if len(overlapping):
+            i = overlapping[0]
+            raise ValueError(
+                f'Pulses {i} and {i + 1} on {output.name} overlap: '
+                f'{off_times[i]} > {on_times[i + 1]}'
+            )
+        touching = np.flatnonzero(on_times[1:] == off_times[:-1])
+        return cls(output, np.delete(on_times, touching + 1), np.delete(off_times, touching))
+
+    @property
+    def edges(self) -> NDArray:
+        return np.concatenate([self.on_times, self.off_times])
+
+
+def check_min_spacing(trains: list[PulseTrain], min_spacing: float) -> None:
+    """Raise ValueError if two distinct edges of ``trains`` are closer than ``min_spacing``.
+
+    All trains are assumed to be on the same pseudoclock, whose instructions
+    must be at least ``min_spacing`` apart. Simultaneous edges share an
+    instruction and are allowed.
+    """
+    # labscript rounds instruction times to 0.1 ns
+    times = np.unique(np.round(np.concatenate([train.edges for train in trains]), 10))
+    gaps = np.diff(times)
+    too_close = np.flatnonzero(gaps < min_spacing - 1e-12)
+    if len(too_close):
+        i = too_close[0]
+        raise ValueError(
+            f'{len(too_close)} pulse edges are closer than the minimum instruction spacing of '
+            f'{min_spacing} s, first at t = {times[i]} ({gaps[i]} s apart)'
+        )
+
+
+def emit_pulse_trains(trains: list[PulseTrain], min_spacing: float) -> None:
+    """Check the spacing of ``trains`` and add their edges to the outputs.
+
+    Edges on plain ``DigitalOut``s are added directly to their instruction tables,
+    with the checks of ``Output.add_instruction`` done on the whole arrays. Other
+    outputs (e.g. shutters, which add their delays in ``add_instruction``), and
+    trains that collide with existing instructions, go through ``go_high``/``go_low``
+    so that labscript reports the collision.
+    """
+    check_min_spacing(trains, min_spacing)
+    for train in trains:
+        _emit(train)
+
+
+def _emit(train: PulseTrain) -> None:
+    output = train.output
+    on_times = np.round(train.on_times, 10).tolist()
+    off_times = np.round(train.off_times, 10).tolist()
+
+    bulk = type(output) is DigitalOut
+    if bulk:
+        if not compiler.start_called:
+            raise LabscriptError('Cannot add instructions prior to calling start()')
+        instructions = output.instructions
+        t0 = getattr(output, 't0', 0)
+        if on_times and on_times[0] < t0:
+            raise ValueError(f'{output.name}: pulse at t = {on_times[0]} before the start of the shot at {t0}')
+        bulk = instructions.keys().isdisjoint(on_times) and instructions.keys().isdisjoint(off_times)
+
+    if bulk:
+        instructions.update(dict.fromkeys(on_times, 1))
+        instructions.update(dict.fromkeys(off_times, 0))
+    else:
+        for t_on, t_off in zip(on_times, off_times):
+            output.go_high(t_on)
+            output.go_low(t_off)
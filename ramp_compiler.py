@@ -0,0 +1,148 @@
+"""Adaptive compilation of analog ramps.
+
+labscript expands a ramp into one sample per clock tick at its sample rate, so a
+10 ms ramp at 100 kHz costs a thousand instructions on the NI 6739 no matter how
+much the output actually changes. The outputs are sample-and-hold, so the same
+waveform can be produced to within a voltage tolerance with far fewer held steps:
+the functions here evaluate the target curve (e.g. a calibration applied to a
+linear detuning ramp) on the original sample grid, then greedily merge
+consecutive samples into steps that stay within ``tolerance`` of the curve.
+
+The last step always holds the exact final value, so the state tracked by the
+callers (``self.ta_freq = final``, ...) matches the hardware after the ramp.
+For that final step, the greedy merge of the preceding samples gives the fewest
+steps possible on the grid.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Callable
+
+import numpy as np
+from numpy.typing import NDArray
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOLERANCE = 1e-3
+"""Maximum deviation in volts of the held steps from the target curve (about 3 LSB of the NI 6739)"""
+
+
+def compile_hold_steps(
+        target: Callable[[NDArray], NDArray],
+        duration: float,
+        samplerate: float,
+        tolerance: float = DEFAULT_TOLERANCE,
+) -> tuple[NDArray, NDArray]:
+    """Minimal set of held steps reproducing ``target`` to within ``tolerance``.
+
+    Parameters
+    ----------
+    target : callable
+        Vectorized function of the time since the start of the ramp, returning
+        the output value.
+    duration : float
+        Duration of the ramp.
+    samplerate : float
+        Sample rate of the equivalent fixed-rate ramp. Steps start on this grid,
+        so they are never shorter than ``1 / samplerate``.
+    tolerance : float
+        Maximum deviation of a held step from the target at the grid points it covers.
+
+    Returns
+    -------
+    step_times, step_values : ndarray
+        Start times (relative to the ramp start) and values of the steps. The
+        last value is ``target(duration)``.
+    """
+    if tolerance <= 0:
+        raise ValueError(f'Ramp tolerance must be positive, got {tolerance}')
+    n_samples = max(int(np.ceil(duration * samplerate)), 1)
+    grid = np.arange(n_samples) / samplerate
+    samples = np.asarray(target(grid), dtype=float)
+    final = float(target(np.array([duration]))[0])
+
+    # the last step holds the final value from the first sample of the trailing
+    # run that is within tolerance of it (or at least from the last sample)
+    outside = np.flatnonzero(np.abs(samples - final) > tolerance)
+    tail_start = min(outside[-1] + 1 if len(outside) else 0, n_samples - 1)
+
+    starts = []
+    values = []
+    i = 0
+    while i < tail_start:
+        end = _step_end(samples, i, tail_start, tolerance)
+        step = samples[i:end]
+        starts.append(i)
+        values.append((step.max() + step.min()) / 2)
+        i = end
+    starts.append(tail_start)
+    values.append(final)
+    return grid[starts], np.array(values)
+
+
+def _step_end(samples: NDArray, start: int, stop: int, tolerance: float) -> int:
+    """End (exclusive) of the longest step from ``start`` whose spread stays within ``2 * tolerance``."""
+    window = 64
+    while True:
+        end = min(start + window, stop)
+        segment = samples[start:end]
+        spread = np.maximum.accumulate(segment) - np.minimum.accumulate(segment)
+        too_wide = np.flatnonzero(spread > 2 * tolerance)
+        if len(too_wide):
+            return start + too_wide[0]
+        if end == stop:
+            return stop
+        window *= 4
+
+
+def adaptive_ramp(
+        output,
+        t: float,
+        duration: float,
+        initial: float,
+        final: float,
+        samplerate: float,
+        calibration: Callable[[NDArray], NDArray] | None = None,
+        tolerance: float = DEFAULT_TOLERANCE,
+) -> float:
+    """Drop-in replacement for ``output.ramp`` emitting only the steps needed for ``tolerance``.
+
+    Ramps linearly from ``initial`` to ``final``. If ``calibration`` is given, the
+    ramp is linear in its argument (e.g. a detuning), and the output follows the
+    calibrated curve instead of a straight line between the calibrated endpoints.
+
+    Parameters
+    ----------
+    output : labscript.AnalogOut
+        Output to ramp.
+    t, duration : float
+        Start time and duration of the ramp.
+    initial, final : float
+        Endpoints of the ramp, in calibration input units if ``calibration`` is given.
+    samplerate : float
+        Sample rate the ramp would have as a fixed-rate ``ramp``.
+    calibration : callable, optional
+        Vectorized conversion from the ramped quantity to the output voltage,
+        e.g. one of the curves in ``labscriptlib.calibration``.
+    tolerance : float
+        Maximum deviation of the output voltage from the target curve.
+
+    Returns
+    -------
+    float
+        The ramp duration, like ``AnalogOut.ramp``.
+    """
+    def target(t_rel):
+        values = initial + (final - initial) * np.asarray(t_rel) / duration
+        if calibration is None:
+            return values
+        return calibration(values)
+
+    step_times, step_values = compile_hold_steps(target, duration, samplerate, tolerance)
+    for step_time, step_value in zip(step_times, step_values):
+        output.constant(t + step_time, step_value)
+    logger.debug(
+        f'{output.name}: ramp compiled to {len(step_times)} steps '
+        f'instead of {max(int(np.ceil(duration * samplerate)), 1)} samples'
+    )
+    return duration
@@ -0,0 +1,329 @@
+"""Hardware-free stand-ins for the devices of the connection table.
+
+``LabDevices.initialize(backend=RecordingBackend())`` builds the connection table
+from the classes here instead of the labscript device classes, so sequences can
+be built (and timed) on any machine, without the lab's device drivers or a
+labscript compilation. The devices accept the same constructor arguments and
+output calls as the real ones and record every call:
+
+- outputs keep a labscript-style ``instructions`` dict (time rounded to 0.1 ns
+  -> value, or a ramp dict with its ``clock rate``), so code that inspects
+  instructions, like ``output_ledger`` and the compile profiler, works unchanged;
+- all devices record their calls (``comb``, ``expose``, ``synthesize``, ...),
+  and ``RecordingBackend.events()`` returns everything recorded as one NumPy
+  structured array sorted by time.
+"""
+from __future__ import annotations
+
+import functools
+import logging
+from typing import Any, ClassVar
+
+import numpy as np
+from numpy.typing import NDArray
+
+logger = logging.getLogger(__name__)
+
+EVENT_DTYPE = np.dtype([
+    ('device', 'U64'),
+    ('method', 'U32'),
+    ('t', float),
+    ('duration', float),
+    ('value', float),
+])
+"""Fields of the recorded events; ``value`` is NaN for calls without a scalar value"""
+
+
+class RecordingDevice:
+    """Device that records the calls made on it.
+
+    Stands in for devices without outputs of their own (clock lines, NI cards, DDS boards).
+    """
+
+    def __init__(self, name: str, parent_device: RecordingDevice | None = None, connection: str | None = None,
+                 **properties):
+        self.name = name
+        self.parent_device = parent_device
+        self.connection = connection
+        self.properties = properties
+        self.child_devices: list[RecordingDevice] = []
+        # method, t, duration, value, and the full keyword arguments of each call
+        self.calls: list[tuple[str, float, float, float]] = []
+        self.call_kwargs: list[dict[str, Any]] = []
+        if parent_device is not None:
+            parent_device.child_devices.append(self)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.name!r})'
+
+    def _record(self, method: str, t: float, duration: float = 0, value: Any = np.nan, **kwargs) -> None:
+        if np.ndim(value) != 0:
+            kwargs['value'] = value
+            value = np.nan
+        self.calls.append((method, t, duration, value))
+        self.call_kwargs.append(kwargs)
+
+    def events(self) -> NDArray:
+        return np.array([(self.name, *call) for call in self.calls], dtype=EVENT_DTYPE)
+
+    @property
+    def n_instructions(self) -> int:
+        return len(self.calls)
+
+
+class RecordingPseudoclock(RecordingDevice):
+    """Stand-in for the PulseBlaster: a parent for clock lines and direct outputs."""
+    CLOCK_LIMIT: ClassVar[float] = 50e6
+    """Maximum instruction rate of the PulseBlaster ESR-PRO 500"""
+
+    def __init__(self, name: str, **properties):
+        super().__init__(name, **properties)
+        self.clock_limit = self.CLOCK_LIMIT
+        self.pseudoclock = RecordingDevice(f'{name}_pseudoclock', parent_device=self)
+        self.direct_outputs = RecordingDevice(f'{name}_direct_outputs', parent_device=self)
+
+
+class RecordingOutput(RecordingDevice):
+    """Output keeping a labscript-style instruction table."""
+    INSTRUCTION_METHODS: ClassVar[frozenset[str]] = frozenset()
+    """Methods whose calls are recorded as instructions rather than as separate events"""
+
+    t0: float = 0
+    ramp_limits: tuple = ()
+
+    def __init__(self, name, parent_device=None, connection=None, **properties):
+        super().__init__(name, parent_device, connection, **properties)
+        self.instructions: dict[float, Any] = {}
+
+    def add_instruction(self, t: float, instruction) -> None:
+        t = round(t, 10)
+        if t < self.t0:
+            raise ValueError(f'{self.name}: instruction at t = {t} before the start of the shot')
+        # like labscript: a scalar overwrites a scalar with a warning, ramps cannot be overwritten
+        previous = self.instructions.get(t, instruction)
+        if isinstance(previous, dict) or isinstance(instruction, dict):
+            if previous is not instruction:
+                raise ValueError(f'{self.name}: instruction at t = {t} collides with a ramp')
+        elif previous != instruction:
+            logger.warning(f'{self.name}: instruction at t = {t} overwritten from {previous} to {instruction}')
+        self.instructions[t] = instruction
+
+    def events(self) -> NDArray:
+        """Instructions (including those added directly to the table) and other recorded calls."""
+        instructions = [
+            (self.name, 'ramp', t, instruction['end time'] - instruction['initial time'], np.nan)
+            if isinstance(instruction, dict) else
+            (self.name, 'constant', t, 0, instruction)
+            for t, instruction in self.instructions.items()
+        ]
+        other_calls = [(self.name, *call) for call in self.calls if call[0] not in self.INSTRUCTION_METHODS]
+        return np.array(instructions + other_calls, dtype=EVENT_DTYPE)
+
+    @property
+    def n_instructions(self) -> int:
+        return len(self.instructions) + sum(call[0] not in self.INSTRUCTION_METHODS for call in self.calls)
+
+
+class RecordingDigitalOut(RecordingOutput):
+    INSTRUCTION_METHODS = frozenset({'go_high', 'go_low', 'enable', 'disable'})
+
+    def go_high(self, t):
+        self._record('go_high', t, value=1)
+        self.add_instruction(t, 1)
+
+    def go_low(self, t):
+        self._record('go_low', t, value=0)
+        self.add_instruction(t, 0)
+
+    def enable(self, t):
+        self.go_high(t)
+
+    def disable(self, t):
+        self.go_low(t)
+
+
+class RecordingShutter(RecordingDigitalOut):
+    """Shutter opening ``delay[0]`` and closing ``delay[1]`` before the requested time, like labscript's."""
+    INSTRUCTION_METHODS = RecordingDigitalOut.INSTRUCTION_METHODS | {'open', 'close'}
+
+    def __init__(self, name, parent_device=None, connection=None, delay=(0, 0), open_state=1, **properties):
+        super().__init__(name, parent_device, connection, **properties)
+        self.open_delay, self.close_delay = delay
+        self.open_state = open_state
+
+    def open(self, t):
+        self._record('open', t)
+        self.add_instruction(t - self.open_delay, self.open_state)
+
+    def close(self, t):
+        self._record('close', t)
+        self.add_instruction(t - self.close_delay, 1 - self.open_state)
+
+
+class RecordingAnalogOut(RecordingOutput):
+    INSTRUCTION_METHODS = frozenset({'constant', 'ramp', 'customramp', 'sine'})
+
+    def constant(self, t, value, units=None):
+        self._record('constant', t, value=value)
+        self.add_instruction(t, value)
+
+    def _add_ramp(self, method, t, duration, samplerate, description, **kwargs):
+        self._record(method, t, duration, **kwargs)
+        self.add_instruction(t, {
+            'description': description,
+            'initial time': t,
+            'end time': t + duration,
+            'clock rate': samplerate,
+            **kwargs,
+        })
+        return duration
+
+    def ramp(self, t, duration, initial, final, samplerate, units=None, truncation=1.):
+        return self._add_ramp('ramp', t, duration, samplerate, 'linear ramp', initial=initial, final=final)
+
+    def customramp(self, t, duration, function, *args, samplerate, units=None, truncation=1., **kwargs):
+        description = f'custom ramp: {getattr(function, "__name__", function)}'
+        return self._add_ramp('customramp', t, duration, samplerate, description)
+
+    def sine(self, t, duration, amplitude, angfreq, phase, dc_offset, samplerate, units=None, truncation=1.):
+        return self._add_ramp(
+            'sine', t, duration, samplerate, 'sine wave',
+            amplitude=amplitude, angfreq=angfreq, phase=phase, dc_offset=dc_offset,
+        )
+
+
+class RecordingAnalogIn(RecordingDevice):
+    def __init__(self, name, parent_device=None, connection=None, **properties):
+        super().__init__(name, parent_device, connection, **properties)
+        self.acquisitions: list[dict[str, Any]] = []
+
+    def acquire(self, label, start_time, end_time, wait_label='', scale_factor=None, units=None):
+        self._record('acquire', start_time, end_time - start_time, label=label)
+        self.acquisitions.append({'label': label, 'start_time': start_time, 'end_time': end_time})
+        return end_time - start_time
+
+
+class RecordingCamera(RecordingDevice):
+    """Stand-in for the Manta and Kinetix cameras."""
+
+    def __init__(self, name, parent_device=None, connection=None, **properties):
+        super().__init__(name, parent_device, connection, **properties)
+        self.exposures: list[dict[str, Any]] = []
+
+    def expose(self, name, t, frame_type='frame', exposure_time=0, **kwargs):
+        self._record('expose', t, exposure_time, label=name, frame_type=frame_type)
+        self.exposures.append({'name': name, 't': t, 'frame_type': frame_type, 'exposure_time': exposure_time})
+
+
+class RecordingSpectrum(RecordingDevice):
+    """Stand-in for a Spectrum Instrumentation AWG card, in sequence and FIFO mode."""
+
+    supports_fifo_streams: ClassVar[bool] = False
+    """Whether the driver plays fifo_streams; like the current Spectrum driver, it does not"""
+
+    def __init__(self, name, parent_device=None, trigger=None, **properties):
+        super().__init__(name, parent_device, **properties)
+        self.trigger = trigger
+        self.mode: dict[str, Any] = {}
+        self.flexible_loops: dict[str, float] = {}
+
+    def set_mode(self, **mode):
+        self.mode = mode
+        self._record('set_mode', 0, **mode)
+
+    def _segment(self, method, t, duration, loops=1, **kwargs):
+        self._record(method, t, duration * loops, loops=loops, **kwargs)
+        return t + duration * loops
+
+    def single_freq(self, t, duration, freq, amplitude, phase, ch, loops=1):
+        return self._segment('single_freq', t, duration, loops, freq=freq, amplitude=amplitude, phase=phase, ch=ch)
+
+    def comb(self, t, duration, freqs, amplitudes, phases, ch, loops=1):
+        return self._segment('comb', t, duration, loops, freqs=freqs, amplitudes=amplitudes, phases=phases, ch=ch)
+
+    def sweep(self, t, duration, start_freq, end_freq, amplitude, phase, ch, freq_ramp_type='linear', loops=1):
+        return self._segment(
+            'sweep', t, duration, loops, start_freq=start_freq, end_freq=end_freq, amplitude=amplitude,
+            phase=phase, ch=ch, freq_ramp_type=freq_ramp_type,
+        )
+
+    def sweep_comb(self, t, duration, start_freqs, end_freqs, amplitudes, phases, ch, loops=1, **ramp_types):
+        return self._segment(
+            'sweep_comb', t, duration, loops, start_freqs=start_freqs, end_freqs=end_freqs,
+            amplitudes=amplitudes, phases=phases, ch=ch, **ramp_types,
+        )
+
+    def fifo_multi_freq(self, t, duration, **kwargs):
+        return self._segment('fifo_multi_freq', t, duration, **kwargs)
+
+    def fifo_single_freq(self, t, duration, **kwargs):
+        return self._segment('fifo_single_freq', t, duration, **kwargs)
+
+    def start_flexible_loop(self, t, function, key, **kwargs):
+        if key in self.flexible_loops:
+            raise ValueError(f'{self.name}: flexible output key {key!r} already in use')
+        self.flexible_loops[key] = t
+        self._record('start_flexible_loop', t, key=key, function=function.__name__, **kwargs)
+
+    def stop_flexible_loop(self, t, key, fifo=False, extend=False):
+        t_start = self.flexible_loops.pop(key, None)
+        if t_start is None:
+            raise ValueError(f'{self.name}: no flexible loop {key!r} to stop')
+        self._record('stop_flexible_loop', t, t - t_start, key=key)
+        return t
+
+    def stop(self):
+        self._record('stop', np.nan)
+
+
+class RecordingDDS(RecordingDevice):
+    def synthesize(self, t, freq, amp, ph):
+        self._record('synthesize', t, value=freq, amp=amp, ph=ph)
+
+
+class RecordingBackend:
+    """Device classes for ``LabDevices.initialize``, recording into one place.
+
+    Attribute names match the device classes used in the connection table;
+    every device created through the backend is kept in ``devices``.
+    """
+    DEVICE_CLASSES: ClassVar[dict[str, type[RecordingDevice]]] = {
+        'PulseBlasterESRPro500': RecordingPseudoclock,
+        'PrawnBlaster': RecordingPseudoclock,
+        'ClockLine': RecordingDevice,
+        'NI_PXIe_6363': RecordingDevice,
+        'NI_PXIe_6739': RecordingDevice,
+        'DigitalOut': RecordingDigitalOut,
+        'Shutter': RecordingShutter,
+        'AnalogOut': RecordingAnalogOut,
+        'AnalogIn': RecordingAnalogIn,
+        'Manta419B': RecordingCamera,
+        'Kinetix': RecordingCamera,
+        'Spectrum': RecordingSpectrum,
+        'AD9914': RecordingDevice,
+        'AD_DDS': RecordingDDS,
+    }
+
+    def __init__(self):
+        self.devices: list[RecordingDevice] = []
+
+    def __getattr__(self, name: str):
+        try:
+            device_class = self.DEVICE_CLASSES[name]
+        except KeyError:
+            raise AttributeError(f'No recording stand-in for device class {name}') from None
+        return functools.partial(self._create, device_class)
+
+    def _create(self, device_class: type[RecordingDevice], *args, **kwargs) -> RecordingDevice:
+        device = device_class(*args, **kwargs)
+        self.devices.append(device)
+        return device
+
+    def events(self) -> NDArray:
+        """Everything recorded on all devices, sorted by time (calls without a time last)."""
+        events = np.concatenate([device.events() for device in self.devices] or [np.empty(0, EVENT_DTYPE)])
+        return events[np.argsort(events['t'], kind='stable')]
+
+    @property
+    def n_instructions(self) -> int:
+        return sum(device.n_instructions for device in self.devices)
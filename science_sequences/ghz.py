@@ -3,6 +3,7 @@ from __future__ import annotations
 from scipy.constants import pi
 import numpy as np
 
+from labscriptlib.experiment_components import MMWaveSequencer
 from labscriptlib.shot_globals import shot_globals
 from labscriptlib.standard_operations.rydberg import RydbergOperations
 
@@ -11,13 +12,18 @@ def science_sequence(func):
     def wrapped_sequence(self: GHZSequences, t):
         t_science, t_end = self._prep_science_and_readout(t)
         self.t0 = t_science
+        self.mmwave_sequencer = MMWaveSequencer(
+            self.Microwave_obj, t_science, card_delay=self.CONST_spectrum_card_delay,
+        )
         func(self, t_science)
+        self.mmwave_sequencer.flush()
         return t_end
     
     return wrapped_sequence
 
 class GHZSequences(RydbergOperations):
     t0: float
+    mmwave_sequencer: MMWaveSequencer
 
     def __init__(self, t):
         super(GHZSequences, self).__init__(t)
@@ -36,6 +42,8 @@ class GHZSequences(RydbergOperations):
         The Bloch sphere is oriented with initial state |e> along the north pole.
         The phase is reference to the fixed time self.t0,
         which is defined by the @science_sequence decorator.
+        The pulse is queued on self.mmwave_sequencer and emitted
+        at the end of the science sequence.
 
         Parameters
         ----------
@@ -48,20 +56,14 @@ class GHZSequences(RydbergOperations):
         """
         duration = rotation_angle_deg / 180 * shot_globals.mmwave_pi_pulse_t
 
-        pulse_frequency = shot_globals.mmwave_spectrum_freq
-        phase_accrual = 360 * (((t - self.t0) * pulse_frequency) % 1)
-        print(f"phase is {phase_accrual}")
-        _ = self.Microwave_obj.do_mmwave_pulse(
-            t - self.CONST_spectrum_card_delay,
+        return self.mmwave_sequencer.add_pulse(
+            t,
             duration,
-            detuning=pulse_frequency,
-            phase=(axis_azimuth_deg + phase_accrual),
+            freqs=shot_globals.mmwave_spectrum_freq,
+            phases=axis_azimuth_deg,
             keep_switch_on=keep_switch_on,
-            switch_offset=self.CONST_spectrum_card_delay,
         )
 
-        return t + duration
-
     def evolve(self, t, duration, echo: bool = False):
         if echo:
             t = t + duration / 2
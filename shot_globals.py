@@ -1,14 +1,17 @@
+import difflib
+import hashlib
+import json
+import os
 import re
 from importlib import resources as impresources
 from types import SimpleNamespace
-from typing import Any, TypedDict
+from typing import Any, Iterable, NamedTuple, TypedDict
 
 import h5py
 import numpy as np  # noqa:F401  # needed for correctly parsing call to eval below
 import yaml
 
 import labscriptlib
-import labscript_utils.shot_utils
 from labscript import compiler
 
 
@@ -28,11 +31,146 @@ loader.add_implicit_resolver(
 )
 
 
+DEFAULTS_FILE = impresources.files(labscriptlib) / 'defaults.yml'
+
+
 class ParameterSpec(TypedDict):
     value: Any
     unit: str
 
 
+class _CachedDefaults(NamedTuple):
+    mtime_ns: int
+    digest: str
+    spec: dict[str, dict[str, ParameterSpec]]
+    values: dict[str, Any]
+
+
+# runmanager keeps this module imported across shots, so parsing and evaluating
+# the defaults once per process (rather than once per shot) saves most of the
+# globals loading time in long scans
+_defaults_cache: dict[str, _CachedDefaults] = {}
+
+
+def _flatten_defaults(spec: dict[str, dict[str, ParameterSpec]]) -> dict[str, Any]:
+    '''
+    Map each global name to its value, evaluating values given as strings.
+    '''
+    flattened_defaults = dict()
+    for _, groupvars in spec.items():
+        for varname, var in groupvars.items():
+            if varname in flattened_defaults:
+                raise ValueError(f'Duplicated name {varname} in defaults')
+            var_value = var['value']
+            if isinstance(var_value, str):
+                flattened_defaults[varname] = eval(var_value)
+            else:
+                flattened_defaults[varname] = var_value
+    return flattened_defaults
+
+
+def load_defaults(path=DEFAULTS_FILE) -> tuple[dict[str, dict[str, ParameterSpec]], dict[str, Any]]:
+    '''
+    Parse a defaults file, returning both the grouped spec and the flattened, evaluated values.
+
+    Results are cached per process. The file is only re-read when its mtime changes,
+    and only re-parsed when its contents actually changed. Callers must not mutate the
+    returned dicts.
+    '''
+    key = os.fspath(path)
+    mtime_ns = os.stat(key).st_mtime_ns
+    cached = _defaults_cache.get(key)
+    if cached is not None and cached.mtime_ns == mtime_ns:
+        return cached.spec, cached.values
+
+    with open(key, 'rb') as f:
+        contents = f.read()
+    digest = hashlib.sha1(contents).hexdigest()
+    if cached is None or cached.digest != digest:
+        spec = yaml.load(contents, Loader=loader)
+        cached = _CachedDefaults(mtime_ns, digest, spec, _flatten_defaults(spec))
+    _defaults_cache[key] = cached._replace(mtime_ns=mtime_ns)
+    return cached.spec, cached.values
+
+
+class ShotGlobalsSnapshot:
+    '''
+    The globals of one shot, with one slot per global.
+
+    Concrete subclasses declaring the slots are compiled by GlobalsSchema, so reading a
+    global from a snapshot is a plain attribute load.
+    '''
+    __slots__ = ()
+
+    def __init__(self, values: dict[str, Any]) -> None:
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for names without a value in this shot
+        raise AttributeError(_missing_global_message(name, type(self).__slots__))
+
+
+class GlobalsSchema:
+    '''
+    Names and units of the globals of a shot: those with a default in defaults.yml,
+    and those declared on ShotGlobals that are only ever set in runmanager.
+
+    Compiled once per version of the defaults file, together with the snapshot class
+    holding the values of one shot.
+    '''
+
+    def __init__(self, spec: dict[str, dict[str, ParameterSpec]], declared: Iterable[str]) -> None:
+        self.units = {
+            varname: var['unit']
+            for groupvars in spec.values()
+            for varname, var in groupvars.items()
+        }
+        self.names = tuple(sorted(self.units.keys() | set(declared)))
+        self._name_set = frozenset(self.names)
+        self._names_by_lowercase = {name.lower(): name for name in self.names}
+        self._snapshot_class = type(
+            'ShotGlobalsSnapshot', (ShotGlobalsSnapshot,), {'__slots__': self.names}
+        )
+
+    def check_runmanager_globals(self, runmanager_globals: dict[str, Any]) -> None:
+        '''
+        Raise if a runmanager global is neither in defaults.yml nor declared on ShotGlobals,
+        e.g. because it is misspelled and would otherwise be silently ignored.
+        '''
+        unknown = [name for name in runmanager_globals if name not in self._name_set]
+        if not unknown:
+            return
+        messages = []
+        for name in unknown:
+            known_name = self._names_by_lowercase.get(name.lower())
+            if known_name is not None:
+                messages.append(f'{name} differs from {known_name} only in capitalization')
+                continue
+            message = f'{name} is unknown'
+            suggestions = difflib.get_close_matches(name, self.names, n=3)
+            if suggestions:
+                message += f' (did you mean {" or ".join(suggestions)}?)'
+            messages.append(message)
+        raise ValueError(
+            'runmanager globals must be in defaults.yml or declared on ShotGlobals: '
+            + '; '.join(messages)
+        )
+
+    def snapshot(self, values: dict[str, Any]) -> ShotGlobalsSnapshot:
+        return self._snapshot_class(values)
+
+
+def _missing_global_message(name: str, known_names: Iterable[str]) -> str:
+    if name in known_names:
+        return f'global {name} has no default and is not set in runmanager'
+    message = f'global {name} defined neither in defaults nor as a runmanager override'
+    suggestions = difflib.get_close_matches(name, known_names, n=3)
+    if suggestions:
+        message += f'; did you mean {" or ".join(suggestions)}?'
+    return message
+
+
 class ShotGlobals(SimpleNamespace):
     # declare globals here!
     do_mw_kill: bool
@@ -43,89 +181,191 @@ class ShotGlobals(SimpleNamespace):
     dp_img_tof_imaging_delay: float
     '''Time for killed F = 4 atoms to leave'''
 
+    # globals without a default, only ever set in runmanager
+    # runmanager globals neither declared here nor in defaults.yml are rejected when the shot loads
+    do_Efield_calib: bool
+    do_gs_pushout: bool
+    do_interaction_based_readout: bool
+    do_mmwave_pi_pi: bool
+    do_mmwave_spin_echo: bool
+    do_ryd_lifetime_check: bool
+    do_variable_rotation_parity_fringe: bool
+    drop_from_high_tw: bool
+    local_addr_piezo_return: bool
+    ryd_lifetime_multi_pulses: bool
+    ryd_pulses_at_end: bool
+    tweezer_recapture_high: bool
+    Efield_Vx: float
+    Efield_Vy: float
+    Efield_Vz: float
+    dp_state_sel_exp_time: float
+    dp_state_sel_ta_det: float
+    dp_state_sel_ta_power: float
+    gm_repump_detuning: float
+    gm_repump_power: float
+    gm_ta_detuning: float
+    gm_ta_power: float
+    gmc_dur: float
+    image_detuning: float
+    interaction_time: float
+    local_addr_piezo_dur_1h: float
+    local_addr_piezo_dur_1v: float
+    local_addr_piezo_dur_2h: float
+    local_addr_piezo_dur_2v: float
+    local_addr_piezo_voltage: float
+    mmwave_echo_pulse_phase: float
+    mmwave_pi_pulse_t: float
+    mmwave_ramsey_extraphase: float
+    mmwave_readout_pulse_phase: float
+    mmwave_switch_turn_on_buffer_time: float
+    ryd_E_shift_amp: float
+    ryd_E_shift_phi: float
+    ryd_E_shift_theta: float
+    ryd_life_wait_time: float
+    ryd_pulse_dur: float
+    ryd_state_wait_time: float
+    ryd_tweezer_drop_time: float
+    t_ramsey_wait: float
+    tw_manta_exposure_time: float
+
     def __init__(self) -> None:
         super().__init__()
         self._last_loaded_h5 = None
 
         self._runmanager_globals = dict()
         self._defaults = dict()
-        self._loaded_globals = dict()
+        self._schema = None
+        self._snapshot = ShotGlobalsSnapshot(dict())
+        self._n_runs = None
 
     def __getattr__(self, name: str) -> Any:
         '''
         Treat any unrecognized attributes as runmanager global names and try to access them.
         '''
+        self._load_shot()
+        return getattr(self._snapshot, name)
+
+    def _load_shot(self) -> None:
         # only load globals once per shot
         # note: we cannot cache globals naively (i.e. fetch once per instance of ShotGlobals)
         # because runmanager caches modules aggressively (in particular, unless the module is
         # edited or one clicks "Restart subprocess"), so one instance of ShotGlobals can persist
         # across multiple shots
-        if self._last_loaded_h5 != compiler.hdf5_filename:
-            self._runmanager_globals = labscript_utils.shot_utils.get_shot_globals(compiler.hdf5_filename)
-
-            inp_file = impresources.files(labscriptlib) / 'defaults.yml'
-            # with open('defaults.yml', 'r') as f:
-            with inp_file.open('r') as f:
-                self._defaults: dict[str, dict[str, ParameterSpec]] = yaml.load(f, Loader=loader)
-
-            flattened_defaults = dict()
-            for _, groupvars in self._defaults.items():
-                for varname, var in groupvars.items():
-                    if varname in flattened_defaults:
-                        raise ValueError(f'Duplicated name {varname} in defaults')
-                    var_value = var['value']
-                    if isinstance(var_value, str):
-                        flattened_defaults[varname] = eval(var_value)
-                    else:
-                        flattened_defaults[varname] = var_value
-                    #flattened_defaults[varname] = var['value']
-
-            self._loaded_globals = flattened_defaults | self._runmanager_globals
-            self._save_defaults_to_h5(flattened_defaults)
-            self._last_loaded_h5 = compiler.hdf5_filename
-
-        try:
-            return self._loaded_globals[name]
-        except KeyError:
-            raise AttributeError(f'global {name} defined neither in defaults nor as a runmanager override')
-
-    # pass in flattened defaults so we don't have to flatten a second time
-    def _save_defaults_to_h5(self, defaults_flattened):
-        '''
-        In the h5 file, create the following structure:
-
-        'default_params' (attrs: {global1: value1, ...})
-            Group1 (attrs: {global1: value1, ...})
-                'units' (attrs: {global1: unit1, ...})
-            Group2 (...)
-                'units' (...)
-            ...
-
-        where:
-        - groups:
-            Group1, Group2, ... consist of all groups spec'd in runmanager
-            together with all groups in the defaults file.
-        - group attrs
-            The group attributes
-        '''
+        if compiler.hdf5_filename is None:
+            raise RuntimeError(
+                'no shot loaded: globals are only available while a shot is compiled, '
+                'e.g. by runmanager or after write_offline_shot'
+            )
+        if self._last_loaded_h5 == compiler.hdf5_filename:
+            return
+
+        defaults, flattened_defaults = load_defaults()
+        if defaults is not self._defaults:
+            self._schema = GlobalsSchema(defaults, type(self).__annotations__)
+            self._defaults = defaults
+        # read what we need from the shot file and write the defaults snapshot in one go,
+        # since every open/close of the shot file goes over the network
         with h5py.File(compiler.hdf5_filename, 'r+') as f:
-            f.create_group('default_params')
-            defaults_h5group = f['default_params']
+            self._runmanager_globals = _read_runmanager_globals(f)
+            self._n_runs = int(f.attrs['n_runs'])
+            _write_default_params(f, self._defaults)
+
+        self._schema.check_runmanager_globals(self._runmanager_globals)
+        self._snapshot = self._schema.snapshot(flattened_defaults | self._runmanager_globals)
+        self._last_loaded_h5 = compiler.hdf5_filename
 
-            defaults_h5group.attrs.update(defaults_flattened)
-            for groupname, groupvars in self._defaults.items():
-                defaults_h5group.create_group(groupname)
-                subgroup = defaults_h5group[groupname]
+    def snapshot(self) -> ShotGlobalsSnapshot:
+        '''
+        All globals of the current shot as one object, for code reading many globals,
+        e.g. a whole sequence: reading a global from it is a plain attribute load instead
+        of going through the fallback of ShotGlobals each time.
 
-                defaults_values = {varname: vardict['value'] for varname, vardict in groupvars.items()}
-                defaults_units = {varname: vardict['unit'] for varname, vardict in groupvars.items()}
-                subgroup.attrs.update(defaults_values)
-                subgroup.create_group('units')
-                subgroup['units'].attrs.update(defaults_units)
+        Only valid for the shot it was taken in, so take it where the shot is compiled,
+        never at import time.
+        '''
+        self._load_shot()
+        return self._snapshot
+
+    def unit(self, name: str) -> str:
+        '''
+        Unit of a global as declared in defaults.yml.
+        '''
+        self._load_shot()
+        return self._schema.units[name]
 
     def get_n_runs(self) -> int:
-        with h5py.File(compiler.hdf5_filename, 'r') as f:
-            return f.attrs['n_runs']
+        self._load_shot()
+        return self._n_runs
+
+
+def _read_runmanager_globals(f: h5py.File) -> dict[str, Any]:
+    '''
+    Runmanager globals of an open shot file, converted the same way as
+    labscript_utils.shot_utils.get_shot_globals does.
+    '''
+    params = dict()
+    for name, value in f['globals'].attrs.items():
+        if isinstance(value, np.bool_):
+            value = bool(value)
+        if isinstance(value, h5py.Reference) and not value:
+            value = None
+        if isinstance(value, np.str_):
+            value = str(value)
+        if isinstance(value, bytes):
+            value = value.decode()
+        params[name] = value
+    return params
+
+
+def _write_default_params(f: h5py.File, defaults: dict[str, dict[str, ParameterSpec]]) -> None:
+    '''
+    Store the defaults used for this shot as a single JSON string dataset 'default_params',
+    holding the grouped spec exactly as in defaults.yml: {group: {global: {value, unit}}}.
+
+    Read it back with load_default_params.
+    '''
+    f.create_dataset('default_params', data=json.dumps(defaults))
+
+
+def load_default_params(h5_path) -> tuple[dict[str, dict[str, ParameterSpec]], dict[str, Any]]:
+    '''
+    Read the defaults a shot was compiled with.
+
+    Returns the grouped spec ({group: {global: {value, unit}}}) and the flattened,
+    evaluated values ({global: value}), like load_defaults. Also reads shots written
+    before the snapshot was a single dataset, when each group (with a 'units' subgroup)
+    was stored as attributes.
+    '''
+    with h5py.File(h5_path, 'r') as f:
+        stored = f['default_params']
+        if isinstance(stored, h5py.Dataset):
+            spec = json.loads(stored[()])
+        else:
+            spec = {
+                groupname: {
+                    varname: {'value': value, 'unit': group['units'].attrs[varname]}
+                    for varname, value in group.attrs.items()
+                }
+                for groupname, group in stored.items()
+            }
+    return spec, _flatten_defaults(spec)
+
+
+def write_offline_shot(h5_path, overrides: dict[str, Any] | None = None, n_runs: int = 1) -> str:
+    '''
+    Create a shot file as runmanager would, with the given globals overriding
+    the defaults, and make it the shot being compiled.
+
+    For building sequences without runmanager, e.g. with the recording backend
+    of labscriptlib.recording_devices. Returns the path of the shot file.
+    '''
+    with h5py.File(h5_path, 'w') as f:
+        f.attrs['n_runs'] = n_runs
+        group = f.create_group('globals')
+        for name, value in (overrides or dict()).items():
+            group.attrs[name] = value
+    compiler.hdf5_filename = os.fspath(h5_path)
+    return compiler.hdf5_filename
 
 
 shot_globals = ShotGlobals()
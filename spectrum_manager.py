@@ -7,17 +7,54 @@ Created on Aug 1st 2023
 @author: Michelle Wu
 """
 
+import logging
+
 import numpy as np
 
+from labscriptlib.spectrum_programming import CardProgram, fingerprint
 from labscriptlib.tweezers_phaseAmplitudeAdjustment import trap_phase, trap_amplitude
 from labscriptlib.connection_table import devices
 from labscriptlib.shot_globals import shot_globals
 
+logger = logging.getLogger(__name__)
+
 if not shot_globals.TW_y_use_dds:
     TW_y_channel = True  # use spectrum card instead of dds for tweezer y channel
 else:
     TW_y_channel = False  # use dds for tweezer y channel
 
+
+_comb_kwargs_cache: dict[str, dict] = {}
+
+
+def comb_kwargs(freqs, amplitude, duration, ch, phase=0) -> dict:
+    """Keyword arguments of a static comb on ``ch``, with freqs given in MHz.
+
+    A single tone uses ``amplitude`` and ``phase``; a comb of several tones the
+    calibrated phases and amplitudes from ``trap_phase`` and ``trap_amplitude``.
+    The result is cached by its inputs, so unchanged combs are not recomputed
+    from shot to shot.
+    """
+    freqs = np.asarray(freqs, dtype=float)
+    key = fingerprint([freqs, amplitude, duration, ch, phase])
+    if key not in _comb_kwargs_cache:
+        if len(freqs) == 1:
+            phases = [phase for _ in freqs]
+            amps = [amplitude for _ in freqs]
+        else:
+            logger.debug(f'comb freqs on ch{ch} = {freqs}')
+            phases = trap_phase(freqs)
+            amps = amplitude * trap_amplitude(freqs)
+        _comb_kwargs_cache[key] = {
+            'duration': duration,
+            'freqs': freqs * 1e6,
+            'amplitudes': amps,
+            'phases': phases,
+            'ch': ch,
+        }
+    return dict(_comb_kwargs_cache[key])
+
+
 class SpectrumManager:
     def __init__(self):
         # Flags for tweezer card (spectrum_0)
@@ -28,6 +65,10 @@ class SpectrumManager:
         self.local_addr_started = False
         self.local_addr_outputting = False
 
+        # programming of each card in the current shot, fingerprinted when the card is stopped
+        self.tw_program = None
+        self.la_program = None
+
         # Tweezer waveform keys / kwargs
         self.tw_x_key = None
         self.tw_y_key = None
@@ -105,7 +146,7 @@ class SpectrumManager:
             ]
 
         # set the card mode
-        devices.spectrum_0.set_mode(
+        mode = dict(
             replay_mode='sequence',
             channels=channel_setting,
             clock_freq=625,
@@ -114,6 +155,8 @@ class SpectrumManager:
             export_path=r'Z:\spectrum_testing_20230801',
             smart_programming=True,
         )
+        devices.spectrum_0.set_mode(**mode)
+        self.tw_program = CardProgram('spectrum_0', mode)
 
         # set the output settings
         SpectrumPhase = 0
@@ -126,44 +169,13 @@ class SpectrumManager:
                 np.round(TW_y_freqs * 1e6 * SpectrumDuration) / SpectrumDuration / 1e6
             )
 
-        if len(TW_x_freqs) == 1:  # TW_x single freq input
-            TW_x_phases = [SpectrumPhase for i in TW_x_freqs]
-            TW_x_amps = [TW_x_amplitude for i in TW_x_freqs]
-        else:  # TW_x multi-freq input
-            print(f'TW_x_freqs = {TW_x_freqs}')
-            TW_x_phases = trap_phase(TW_x_freqs)
-            TW_x_amps = TW_x_amplitude * trap_amplitude(
-                TW_x_freqs
-            )  # amplitude set to 0.99 to aviod calculation error
-
-        if TW_y_channel:
-            if len(TW_y_freqs) == 1:  # TW_y single freq input
-                TW_y_phases = [SpectrumPhase for i in TW_y_freqs]
-                TW_y_amps = [TW_y_amplitude for i in TW_y_freqs]
-            else:  # TW_y multi-freq input
-                TW_y_phases = trap_phase(TW_y_freqs)
-                TW_y_amps = TW_y_amplitude * trap_amplitude(
-                    TW_y_freqs
-                )  # amplitude set to 0.99 to aviod calculation error
-
         # instantiate dictionary to carry tweezer options
-        self.tw_x_kwargs = {
-            'duration': SpectrumDuration,
-            'freqs': TW_x_freqs * 1e6,
-            'amplitudes': TW_x_amps,
-            'phases': TW_x_phases,
-            'ch': 0,
-        }
+        # (amplitude set to 0.99 to aviod calculation error)
+        self.tw_x_kwargs = comb_kwargs(TW_x_freqs, TW_x_amplitude, SpectrumDuration, ch=0, phase=SpectrumPhase)
         self.tw_x_key = 'tw_x_comb'
 
         if TW_y_channel:
-            self.tw_y_kwargs = {
-                'duration': SpectrumDuration,
-                'freqs': TW_y_freqs * 1e6,
-                'amplitudes': TW_y_amps,
-                'phases': TW_y_phases,
-                'ch': 1,
-            }
+            self.tw_y_kwargs = comb_kwargs(TW_y_freqs, TW_y_amplitude, SpectrumDuration, ch=1, phase=SpectrumPhase)
             self.tw_y_key = 'tw_y_comb'
 
         self.tweezer_started = True
@@ -175,6 +187,7 @@ class SpectrumManager:
             'SpectrumManager: output must be stopped before card is stopped'
         )
         devices.spectrum_0.stop()
+        self.tw_program.save()
 
     def start_tweezers(self, t):
         assert self.tweezer_started, (
@@ -186,10 +199,12 @@ class SpectrumManager:
         devices.spectrum_0.start_flexible_loop(
             t, devices.spectrum_0.comb, self.tw_x_key, **self.tw_x_kwargs
         )
+        self.tw_program.start_loop(t, 'comb', self.tw_x_key, self.tw_x_kwargs)
         if TW_y_channel:
             devices.spectrum_0.start_flexible_loop(
                 t, devices.spectrum_0.comb, self.tw_y_key, **self.tw_y_kwargs
             )
+            self.tw_program.start_loop(t, 'comb', self.tw_y_key, self.tw_y_kwargs)
         self.tweezer_outputting = True
         return t
 
@@ -198,9 +213,11 @@ class SpectrumManager:
             'SpectrumManager: must run start() before stop()'
         )
         devices.spectrum_0.stop_flexible_loop(t, self.tw_x_key)
+        self.tw_program.stop_loop(t, self.tw_x_key)
         self.tw_x_key += '0'
         if TW_y_channel:
             devices.spectrum_0.stop_flexible_loop(t, self.tw_y_key)
+            self.tw_program.stop_loop(t, self.tw_y_key)
             self.tw_y_key += '0'
         self.tweezer_outputting = False
         return t
@@ -256,7 +273,7 @@ class SpectrumManager:
         ]
 
         # set the card mode
-        devices.spectrum_la.set_mode(
+        mode = dict(
             replay_mode='sequence',
             channels=channel_setting,
             clock_freq=625,
@@ -265,47 +282,18 @@ class SpectrumManager:
             export_path=r'Z:\spectrum_testing_20230801',
             smart_programming=True,
         )
+        devices.spectrum_la.set_mode(**mode)
+        self.la_program = CardProgram('spectrum_la', mode)
 
         # set the output settings
         SpectrumPhase = 0
         SpectrumDuration = LA_loopDuration
 
-        if len(LA_x_freqs) == 1:  # TW_x single freq input
-            LA_x_phases = [SpectrumPhase for i in LA_x_freqs]
-            LA_x_amps = [LA_x_amplitude for i in LA_x_freqs]
-        else:  # TW_x multi-freq input
-            print(f'LA_x_freqs = {LA_x_freqs}')
-            LA_x_phases = trap_phase(LA_x_freqs)
-            LA_x_amps = LA_x_amplitude * trap_amplitude(
-                LA_x_freqs
-            )  # amplitude set to 0.99 to aviod calculation error
-
-        if len(LA_y_freqs) == 1:  # TW_y single freq input
-            LA_y_phases = [SpectrumPhase for i in LA_y_freqs]
-            LA_y_amps = [LA_y_amplitude for i in LA_y_freqs]
-        else:  # TW_y multi-freq input
-            LA_y_phases = trap_phase(LA_y_freqs)
-            LA_y_amps = LA_y_amplitude * trap_amplitude(
-                LA_y_freqs
-            )  # amplitude set to 0.99 to aviod calculation error
-
         # instantiate dictionary to carry tweezer options
-        self.la_x_kwargs = {
-            'duration': SpectrumDuration,
-            'freqs': LA_x_freqs * 1e6,
-            'amplitudes': LA_x_amps,
-            'phases': LA_x_phases,
-            'ch': 0,
-        }
+        self.la_x_kwargs = comb_kwargs(LA_x_freqs, LA_x_amplitude, SpectrumDuration, ch=0, phase=SpectrumPhase)
         self.la_x_key = 'x_comb'
 
-        self.la_y_kwargs = {
-            'duration': SpectrumDuration,
-            'freqs': LA_y_freqs * 1e6,
-            'amplitudes': LA_y_amps,
-            'phases': LA_y_phases,
-            'ch': 1,
-        }
+        self.la_y_kwargs = comb_kwargs(LA_y_freqs, LA_y_amplitude, SpectrumDuration, ch=1, phase=SpectrumPhase)
         self.la_y_key = 'la_y_comb'
 
         self.local_addr_started = True
@@ -317,6 +305,7 @@ class SpectrumManager:
             'SpectrumManager: output must be stopped before card is stopped'
         )
         devices.spectrum_la.stop()
+        self.la_program.save()
 
     def start_local_addr(self, t):
         assert self.local_addr_started, (
@@ -329,9 +318,11 @@ class SpectrumManager:
         devices.spectrum_la.start_flexible_loop(
             t, devices.spectrum_la.comb, self.la_x_key, **self.la_x_kwargs
         )
+        self.la_program.start_loop(t, 'comb', self.la_x_key, self.la_x_kwargs)
         devices.spectrum_la.start_flexible_loop(
             t, devices.spectrum_la.comb, self.la_y_key, **self.la_y_kwargs
         )
+        self.la_program.start_loop(t, 'comb', self.la_y_key, self.la_y_kwargs)
         self.local_addr_outputting = True
         # print('start local addressing card, setting outputting flag to True')
         # print('outputtubg flag is ', self.outputting)
@@ -343,8 +334,10 @@ class SpectrumManager:
             'SpectrumManager: must run start() before stop()'
         )
         devices.spectrum_la.stop_flexible_loop(t, self.la_x_key)
+        self.la_program.stop_loop(t, self.la_x_key)
         self.la_x_key += '0'
         devices.spectrum_la.stop_flexible_loop(t, self.la_y_key)
+        self.la_program.stop_loop(t, self.la_y_key)
         self.la_y_key += '0'
         self.local_addr_outputting = False
         return t
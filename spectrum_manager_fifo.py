@@ -5,14 +5,17 @@ Modified from Rydberg lab spectrum_manager_fifo.py
 Created on March 25th 2024
 """
 import logging
+from typing import ClassVar
+
+import h5py
 import numpy as np
+from labscript import compiler as ls_compiler
 
 from labscriptlib.connection_table import devices
+from labscriptlib.fifo_streaming import CombStream, RampType
 from labscriptlib.tweezers_phaseAmplitudeAdjustment import trap_phase, trap_amplitude
 from labscriptlib.shot_globals import shot_globals
 
-# Note 20230327: can only use one channel for fifo mode for now.
-
 logger = logging.getLogger(__name__)
 
 
@@ -23,11 +26,27 @@ def dbm_to_vpeak(power):
     return 10**exponent
 
 
+def kwargs_power_dbm(kwargs):
+    # Inverse of dbm_to_vpeak for the output voltage of a fifo_multi_freq kwargs dict
+    return 20 * np.log10(kwargs["output_voltage"]) + 10
+
+
 class SpectrumManagerFifo:
+    CHANNELS: ClassVar[dict[int, dict]] = {
+        0: {"name": "Tweezer_X", "port": 0, "amplifier": 1, "key_prefix": "x_fifo"},
+        1: {"name": "Tweezer_Y", "port": 1, "amplifier": 2, "key_prefix": "y_fifo"},
+    }
+    """Card channels by index, with the settings that differ between them"""
+
+    SAMPLE_RATE: ClassVar[float] = 625e6
+    """Sample rate of the card, matching clock_freq in start_tweezer_card"""
+
     def __init__(self):
-        # current armed waveform (what start_tweezers will start)
-        self.x_kwargs = None
-        self.x_key = None
+        # current armed waveform per channel (what start_tweezers will start)
+        self.kwargs: dict[int, dict] = {}
+        self.keys: dict[int, str] = {}
+        # start time of the static loop playing on each channel
+        self.loop_starts: dict[int, float] = {}
 
         # state flags
         self.started_tw = False
@@ -41,6 +60,14 @@ class SpectrumManagerFifo:
         # key counter to avoid "Flexible output key already in use."
         self._key_counter = 0
 
+    @property
+    def x_kwargs(self):
+        return self.kwargs.get(0)
+
+    @property
+    def x_key(self):
+        return self.keys.get(0)
+
     # ------------------------
     # Internal helpers
     # ------------------------
@@ -108,40 +135,48 @@ class SpectrumManagerFifo:
     # ------------------------
     # Public tweezer API
     # ------------------------
-    def start_tweezer_card(self):
+    def start_tweezer_card(self, channels=(0,)):
         """
-        Configure the spectrum card and arm the DEFAULT tweezer comb from shot_globals.TW_x_freqs.
+        Configure the spectrum card and arm the DEFAULT tweezer combs from
+        shot_globals.TW_x_freqs (channel 0) and shot_globals.TW_y_freqs (channel 1).
         Does not start output yet.
         """
         self.started_tw = False
         self.outputting_tw = False
         self._key_counter = 0
+        self.kwargs.clear()
+        self.keys.clear()
+        self.loop_starts.clear()
 
-        # Default comb frequencies from runmanager globals
-        TW_x_freqs = np.asarray(shot_globals.TW_x_freqs)
-
-        # Card configuration (same as your current code)
+        powers = {0: self.TW_x_power, 1: shot_globals.TW_y_power}
         devices.spectrum_0.set_mode(
             replay_mode="fifo_single",
             channels=[
                 {
-                    "name": "Tweezer_X",
-                    "power": self.TW_x_power,
-                    "port": 0,
+                    "name": self.CHANNELS[ch]["name"],
+                    "power": powers[ch],
+                    "port": self.CHANNELS[ch]["port"],
                     "is_amplified": True,
-                    "amplifier": 1,
+                    "amplifier": self.CHANNELS[ch]["amplifier"],
                     "calibration_power": 15,
                     "power_mode": "constant_total",
                     "max_pulses": 1,
-                },
+                }
+                for ch in channels
             ],
-            clock_freq=625,
+            clock_freq=round(self.SAMPLE_RATE / 1e6),
             use_ext_clock=True,
             smart_programming=True,
         )
 
-        # Arm default waveform using the comb calibration logic:
-        self.set_tweezer_comb(TW_x_freqs, key="x_fifo_default")
+        # Arm default waveforms using the comb calibration logic:
+        if 0 in channels:
+            self.set_tweezer_comb(shot_globals.TW_x_freqs, key="x_fifo_default")
+        if 1 in channels:
+            self.set_tweezer_comb(
+                shot_globals.TW_y_freqs, amp_scale=shot_globals.TW_y_amplitude, power_dbm=powers[1],
+                ch=1, key="y_fifo_default",
+            )
 
         self.started_tw = True
         return
@@ -162,18 +197,27 @@ class SpectrumManagerFifo:
             amp_scale=amp_scale,
             base_phase_deg=base_phase_deg,
         )
-        self.x_kwargs = self._build_x_kwargs_from_comb(freqs_MHz, amps, phases, power_dbm=power_dbm, ch=ch)
-        self.x_key = key if key is not None else self._new_key("x_fifo")
+        self.kwargs[ch] = self._build_x_kwargs_from_comb(freqs_MHz, amps, phases, power_dbm=power_dbm, ch=ch)
+        self.keys[ch] = key if key is not None else self._new_key(self.CHANNELS[ch]["key_prefix"])
+
+    def _start_loop(self, t, ch):
+        devices.spectrum_0.start_flexible_loop(t, devices.spectrum_0.fifo_multi_freq, self.keys[ch], **self.kwargs[ch])
+        self.loop_starts[ch] = t
+
+    def _stop_loop(self, t, ch):
+        devices.spectrum_0.stop_flexible_loop(t, self.keys[ch], fifo=True)
+        del self.loop_starts[ch]
 
     def start_tweezers(self, t):
         if not self.started_tw:
             raise RuntimeError("SpectrumManager: must run start_tweezer_card() before start_tweezers()")
         if self.outputting_tw:
             raise RuntimeError("SpectrumManager: output has already been started")
-        if self.x_kwargs is None or self.x_key is None:
+        if not self.kwargs:
             raise RuntimeError("SpectrumManager: call set_tweezer_comb(...) before start_tweezers()")
 
-        devices.spectrum_0.start_flexible_loop(t, devices.spectrum_0.fifo_multi_freq, self.x_key, **self.x_kwargs)
+        for ch in self.kwargs:
+            self._start_loop(t, ch)
         self.outputting_tw = True
         return t
 
@@ -182,7 +226,8 @@ class SpectrumManagerFifo:
             raise ValueError("SpectrumManager: must run start_tweezers() before stop_tweezers()")
 
         logger.info(f"Ending last static period at time t = {t:.9f}")
-        devices.spectrum_0.stop_flexible_loop(t, self.x_key, fifo=True)
+        for ch in list(self.loop_starts):
+            self._stop_loop(t, ch)
         self.outputting_tw = False
         return t
 
@@ -193,8 +238,9 @@ class SpectrumManagerFifo:
           - old comb ends at t
           - new comb begins at t
         """
-        if self.outputting_tw:
-            self.stop_tweezers(t)
+        outputting = self.outputting_tw
+        if outputting and ch in self.loop_starts:
+            self._stop_loop(t, ch)
 
         self.set_tweezer_comb(
             freqs_MHz,
@@ -204,7 +250,72 @@ class SpectrumManagerFifo:
             ch=ch,
             key=key,  # usually None -> auto unique key
         )
-        self.start_tweezers(t)
+        if outputting:
+            self._start_loop(t, ch)
+        else:
+            self.start_tweezers(t)
+        return t
+
+    def move_tweezers(self, t, freqs_MHz, duration, *, ch=0, ramp: RampType = "min_jerk",
+                      amplitudes=None, hold_before=0, hold_after=0):
+        """
+        Sweep every tone of the comb on channel ch to freqs_MHz (tone i of the
+        current comb moves to freqs_MHz[i]), e.g. to rearrange atoms:
+          - the static comb ends at t
+          - the stream (static for hold_before, moving for duration, static for
+            hold_after) plays from t
+          - the static comb at the new frequencies begins at the end of the stream
+
+        The stream is not precomputed: its descriptor is saved to the shot file
+        under fifo_streams/<key> (see fifo_streaming.CombStream), and the card
+        driver generates the samples in chunks while streaming them into the FIFO.
+        All tone phases are continuous from the old comb to the new one. The tone
+        amplitudes ramp to amplitudes if given, and are kept otherwise.
+
+        Only card drivers that play fifo_streams (with a true supports_fifo_streams
+        attribute) can do this; with any other driver the channel would be silent
+        for the whole stream, so this raises instead.
+
+        Returns the end time of the stream.
+        """
+        if not getattr(devices.spectrum_0, "supports_fifo_streams", False):
+            raise RuntimeError(
+                "SpectrumManager: the spectrum_0 driver does not play fifo_streams, so the tweezers "
+                "would be off during the move"
+            )
+        if ch not in self.loop_starts:
+            raise RuntimeError(f"SpectrumManager: no comb is playing on channel {ch} to move from")
+
+        kwargs = self.kwargs[ch]
+        freqs_end_MHz = self._as_1d_array(freqs_MHz).astype(float)
+        amps_end = kwargs["amplitude"] if amplitudes is None else self._as_1d_array(amplitudes)
+        # phases of the looping comb at the time it is stopped
+        phases_now = np.mod(kwargs["phase"] + 360 * kwargs["freq"] * (t - self.loop_starts[ch]), 360)
+        self._stop_loop(t, ch)
+
+        stream = CombStream(ch, self.SAMPLE_RATE, kwargs["freq"], kwargs["amplitude"], phases_now)
+        if hold_before > 0:
+            stream.hold(hold_before)
+        stream.move(freqs_end_MHz * 1e6, duration, amplitudes_end=amps_end, ramp=ramp)
+        if hold_after > 0:
+            stream.hold(hold_after)
+
+        stream_key = self._new_key(f"{self.CHANNELS[ch]['key_prefix']}_stream")
+        with h5py.File(ls_compiler.hdf5_filename, "r+") as f:
+            group = f.require_group("fifo_streams").create_group(stream_key)
+            group.attrs["t_start"] = t
+            stream.save(group)
+        logger.info(
+            f"Streaming tweezer move on ch{ch} from t = {t:.9f} for {stream.duration * 1e6:.3f} us "
+            f"({stream.n_samples} samples)"
+        )
+
+        t += stream.duration
+        self.kwargs[ch] = self._build_x_kwargs_from_comb(
+            freqs_end_MHz, amps_end, stream.end_phases, power_dbm=kwargs_power_dbm(kwargs), ch=ch,
+        )
+        self.keys[ch] = self._new_key(self.CHANNELS[ch]["key_prefix"])
+        self._start_loop(t, ch)
         return t
 
     # ------------------------
@@ -0,0 +1,149 @@
+"""Fingerprints of the spectrum card programming of each shot.
+
+The spectrum cards only need reprogramming when their mode, waveforms or step
+table change. While a shot is compiled, ``CardProgram`` collects everything a
+card is programmed with and saves its fingerprint in the shot file. Whether a
+shot can skip reprogramming is only decided by the card's BLACS worker, with
+``LoadedCardProgram``: shots can be aborted, re-queued or come from another
+sequence, so only the worker knows what is loaded on the card.
+Unlike ``spectrum_manager``, this module does not depend on the globals of a
+shot, so it can be imported outside of a shot compilation, e.g. by the worker.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+
+import h5py
+import numpy as np
+from labscript import compiler as ls_compiler
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(value) -> str:
+    """Hash of a card configuration: nested dicts, lists, arrays and scalars.
+
+    Arrays are hashed by dtype, shape and bytes, so the fingerprint changes
+    whenever a sample of the generated waveforms would.
+    """
+    digest = hashlib.sha1()
+    _update_fingerprint(digest, value)
+    return digest.hexdigest()
+
+
+def _update_fingerprint(digest, value):
+    if isinstance(value, dict):
+        digest.update(b'{')
+        for key in sorted(value):
+            digest.update(repr(key).encode())
+            _update_fingerprint(digest, value[key])
+        digest.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'[')
+        for item in value:
+            _update_fingerprint(digest, item)
+        digest.update(b']')
+    elif isinstance(value, np.ndarray) and value.dtype != object:
+        array = np.ascontiguousarray(value)
+        digest.update(f'{array.dtype}{array.shape}'.encode())
+        digest.update(array.tobytes())
+    else:
+        digest.update(repr(value).encode())
+
+
+@dataclass
+class CardProgram:
+    """Everything a spectrum card is programmed with in one shot.
+
+    The card mode, and the step table: each flexible loop started or stopped,
+    in call order, with its time, key and waveform. Call ``start_loop`` and
+    ``stop_loop`` next to the card's ``start_flexible_loop`` and
+    ``stop_flexible_loop``, and ``save`` once the card is stopped.
+    """
+    card_name: str
+    mode: dict
+    steps: list[tuple] = field(default_factory=list)
+    waveforms: dict[str, str] = field(default_factory=dict)
+    """Fingerprint of the waveform of each key"""
+
+    def start_loop(self, t: float, function: str, key: str, kwargs: dict) -> None:
+        self.waveforms[key] = fingerprint([function, kwargs])
+        # labscript rounds instruction times to 0.1 ns
+        self.steps.append(('start_flexible_loop', round(t, 10), key, self.waveforms[key]))
+
+    def stop_loop(self, t: float, key: str, **kwargs) -> None:
+        self.steps.append(('stop_flexible_loop', round(t, 10), key, kwargs))
+
+    def fingerprint(self) -> str:
+        return fingerprint([self.mode, self.steps])
+
+    def save(self) -> str:
+        """Save the fingerprints to the shot file as the attributes of ``spectrum_programming/<card_name>``.
+
+        ``fingerprint`` covers the mode and the step table including all
+        waveforms; ``waveform_fingerprints`` (JSON) maps each key to the
+        fingerprint of its waveform. Returns the card fingerprint.
+        """
+        card_fingerprint = self.fingerprint()
+        with h5py.File(ls_compiler.hdf5_filename, 'r+') as f:
+            group = f.require_group(f'spectrum_programming/{self.card_name}')
+            group.attrs['fingerprint'] = card_fingerprint
+            group.attrs['waveform_fingerprints'] = json.dumps(self.waveforms)
+        return card_fingerprint
+
+
+def read_card_program(h5_file: h5py.File, card_name: str) -> tuple[str, dict[str, str]] | None:
+    """The card fingerprint and waveform fingerprints saved by ``CardProgram.save``, if any."""
+    group = h5_file.get(f'spectrum_programming/{card_name}')
+    if group is None:
+        return None
+    return group.attrs['fingerprint'], json.loads(group.attrs['waveform_fingerprints'])
+
+
+@dataclass
+class LoadedCardProgram:
+    """What a spectrum card was last programmed with, kept by its BLACS worker.
+
+    Typical use in the worker::
+
+        # transition_to_buffered
+        program = read_card_program(h5_file, card_name)
+        if self.loaded.matches(program):
+            ...  # only rearm the card
+        else:
+            upload = self.loaded.changed_waveforms(program)
+            ...  # program the card, uploading the waveforms in upload
+            self.loaded.programmed(program)
+
+        # abort, or programming failed
+        self.loaded.forget()
+    """
+    fingerprint: str | None = None
+    waveforms: set[str] = field(default_factory=set)
+
+    def matches(self, program: tuple[str, dict[str, str]] | None) -> bool:
+        """Whether the card already holds ``program``, the result of ``read_card_program``."""
+        return program is not None and program[0] == self.fingerprint
+
+    def changed_waveforms(self, program: tuple[str, dict[str, str]]) -> list[str]:
+        """Keys of the waveforms of ``program`` that are not loaded on the card."""
+        _, waveforms = program
+        return sorted(key for key, waveform in waveforms.items() if waveform not in self.waveforms)
+
+    def programmed(self, program: tuple[str, dict[str, str]] | None) -> None:
+        """Record that the card was programmed with ``program``."""
+        if program is None:
+            self.forget()
+            return
+        card_fingerprint, waveforms = program
+        self.fingerprint = card_fingerprint
+        self.waveforms = set(waveforms.values())
+        logger.debug(f'card programmed with {card_fingerprint}')
+
+    def forget(self) -> None:
+        """The card contents are unknown, e.g. after an abort: the next shot is programmed in full."""
+        self.fingerprint = None
+        self.waveforms = set()
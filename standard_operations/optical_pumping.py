@@ -2,7 +2,7 @@
 from typing import Literal
 import numpy as np
 
-from labscriptlib.experiment_components import D2Lasers, Microwave, ShutterConfig
+from labscriptlib.experiment_components import D2Lasers, D2Pulse, Microwave, ShutterConfig
 from labscriptlib.shot_globals import shot_globals
 from .mot import MOTOperations
 
@@ -338,27 +338,24 @@ class OpticalPumpingOperations(MOTOperations):
         t_end, t_aom_off: tuple[float, float]
             End time of sequence and AOM turn-off time
         """
-        # The shutter configuration can be optical_pumping_full or optical_pump_TA
-        # optical_pumping_full allow the two pulse sequence purely switched with aom after
-        # pump_to_F4 / depump_to_F3
+        # A TA pulse via the optical pumping path, tuned to resonance. The repump shutter
+        # is only left open after optical_pumping_full (pump_to_F4 / depump_to_F3), so
+        # that the pulses are switched purely with the AOMs; otherwise it is closed, so
+        # that no repump light leaks through its AOM while F=4 atoms are pushed out.
+        # The planner does the frequency ramp while the shutters move.
         if self.D2Lasers_obj.shutter_config == ShutterConfig.OPTICAL_PUMPING_FULL:
-            shutter_config = ShutterConfig.OPTICAL_PUMPING_FULL
+            require_closed = ShutterConfig.NONE
         else:
-            shutter_config = ShutterConfig.OPTICAL_PUMPING_TA
-
-        # tune to resonance
-        t = self.D2Lasers_obj.ramp_ta_freq(
-            t, D2Lasers.CONST_TA_VCO_RAMP_TIME, shot_globals.killing_pulse_detuning
-        )
-        # do a ta pulse via optical pumping path
-        t, t_aom_start = self.D2Lasers_obj.do_pulse(
-            t,
+            require_closed = ShutterConfig.REPUMP
+        kill_pulse = D2Pulse(
             shot_globals.op_killing_pulse_time,
-            shutter_config,
+            ShutterConfig.OPTICAL_PUMPING_TA,
             shot_globals.op_killing_ta_power,
             0,
-            close_all_shutters=close_all_shutters,
+            ta_detuning=shot_globals.killing_pulse_detuning,
+            require_closed=require_closed,
         )
+        t, (t_aom_start,) = self.D2Lasers_obj.do_pulses(t, [kill_pulse], close_all_shutters=close_all_shutters)
 
         t_aom_off = t_aom_start + shot_globals.op_killing_pulse_time
 
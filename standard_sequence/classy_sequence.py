@@ -78,9 +78,19 @@ import sys
 
 import labscript
 
+from labscriptlib.clockline_coalescer import coalesce_clocklines
 from labscriptlib.connection_table import devices
+from labscriptlib.experiment_components import (
+    BField,
+    Camera,
+    D2Lasers,
+    EField,
+    RydLasers,
+    UVLamps,
+)
 from labscriptlib.experiment_components.lasers import LocalAddressLaser, TweezerLaser
-from labscriptlib.experiment_components.microwaves import Microwave
+from labscriptlib.experiment_components.microwaves import Microwave, SpectrumSegmentCache
+from labscriptlib.output_ledger import prune_redundant_instructions
 from labscriptlib.shot_globals import shot_globals
 from labscriptlib.standard_operations import (
     MOTOperations,
@@ -91,6 +101,7 @@ from labscriptlib.standard_operations import (
 from labscriptlib.science_sequences import (
     GHZSequences
 )
+from labscriptlib.standard_sequence.compile_profiler import CompileProfiler
 
 logger = logging.getLogger(__name__)
 
@@ -98,6 +109,14 @@ logger = logging.getLogger(__name__)
 if __name__ == "__main__":
     logging.basicConfig(stream=sys.stdout, level=logging.INFO)
     devices.initialize()
+    profiler = None
+    if shot_globals.do_compile_profile:
+        profiler = CompileProfiler()
+        profiler.start(devices, [
+            MOTOperations, OpticalPumpingOperations, TweezerOperations, RydbergOperations,
+            GHZSequences, D2Lasers, TweezerLaser, LocalAddressLaser, RydLasers, Microwave,
+            BField, EField, Camera, UVLamps,
+        ])
     labscript.start()
     t: float = 0
     sequence_objects: list[MOTOperations] = []
@@ -316,5 +335,13 @@ if __name__ == "__main__":
                 init_mmwave_detuning=shot_globals.mmwave_spectrum_freq,
             )
             t = microwave_obj.reset_spectrum(t)
+    SpectrumSegmentCache.check_flushed()
+
+    prune_redundant_instructions(devices.built_devices().values())
+    coalesce_clocklines(devices.built_devices().values())
 
-    labscript.stop(t + 1e-2)
+    if profiler is None:
+        labscript.stop(t + 1e-2)
+    else:
+        profiler.timed('labscript', 'stop', labscript.stop)(t + 1e-2)
+        profiler.finish(labscript.compiler.hdf5_filename)
@@ -0,0 +1,227 @@
+"""Opt-in profiling of shot compilation.
+
+Enabled with the ``do_compile_profile`` global. The profiler wraps the methods of
+the operation and component classes and the output methods of every device
+(``constant``, ``ramp``, ``comb``, ...), then records per call site
+
+- the number of calls,
+- the time spent (inclusive of nested calls, and excluding them),
+- the labscript instructions (and camera exposures) it added, and how many samples
+  those expand to.
+
+The table is written to the shot file as the ``compile_profile`` dataset, and the
+most expensive entries are logged.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, ClassVar, Iterable
+
+import h5py
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# classes patched by the last profiler, so that a shot that failed halfway cannot
+# leave them wrapped for the next shot compiled in the same runmanager subprocess
+_patched_classes: list[tuple[type, str, Callable]] = []
+
+
+@dataclass
+class ProfileEntry:
+    kind: str
+    name: str
+    calls: int = 0
+    total_time: float = 0
+    self_time: float = 0
+    instructions: int = 0
+    samples: int = 0
+
+
+@dataclass
+class _Frame:
+    entry: ProfileEntry
+    child_time: float = 0
+    instructions: int = 0
+    samples: int = 0
+
+
+@dataclass
+class CompileProfiler:
+    """Collects a per-shot profile of operation methods and device calls.
+
+    Typical use in a sequence script::
+
+        profiler = CompileProfiler()
+        profiler.start(devices, [MOTOperations, RydLasers, ...])
+        ...  # build the sequence
+        profiler.finish(compiler.hdf5_filename)
+    """
+    DEVICE_METHODS: ClassVar[tuple[str, ...]] = (
+        'constant', 'ramp', 'customramp', 'sine', 'sine_ramp', 'exp_ramp',
+        'go_high', 'go_low', 'open', 'close', 'enable', 'disable', 'acquire',
+        'set_mode', 'comb', 'single_freq', 'sweep', 'fifo_multi_freq',
+        'start_flexible_loop', 'stop_flexible_loop', 'stop',
+        'synthesize', 'expose',
+    )
+    """Device methods that are timed and attributed the instructions they add"""
+
+    entries: dict[tuple[str, str], ProfileEntry] = field(default_factory=dict)
+    _stack: list[_Frame] = field(default_factory=list)
+    _t_start: float = 0
+    _patched_devices: list[tuple[Any, str]] = field(default_factory=list)
+    _active: bool = False
+
+    def start(self, devices: Any, classes: Iterable[type]) -> None:
+        """Instrument the devices created by ``devices.initialize()`` and the given classes.
+
+        With lazily built devices, the devices built later are instrumented when they are built.
+        """
+        restore_classes()
+        self._active = True
+        for cls in classes:
+            self._instrument_class(cls)
+        self._instrument_devices(devices)
+        self._t_start = time.perf_counter()
+
+    def finish(self, h5_path: str | None) -> None:
+        """Undo the instrumentation, log a summary and save the profile to the shot."""
+        total_time = time.perf_counter() - self._t_start
+        restore_classes()
+        self._restore_devices()
+
+        by_self_time = sorted(self.entries.values(), key=lambda entry: entry.self_time, reverse=True)
+        logger.info(f'compile profile: {total_time:.3f} s in total, most expensive:')
+        for entry in by_self_time[:10]:
+            logger.info(
+                f'  {entry.kind} {entry.name}: {entry.calls} calls, {entry.self_time:.4f} s, '
+                f'{entry.instructions} instructions ({entry.samples} samples)'
+            )
+
+        if h5_path is not None:
+            self.save(h5_path, total_time)
+
+    def save(self, h5_path: str, total_time: float) -> None:
+        string = h5py.string_dtype()
+        table = np.array(
+            [
+                (e.kind, e.name, e.calls, e.total_time, e.self_time, e.instructions, e.samples)
+                for e in self.entries.values()
+            ],
+            dtype=[
+                ('kind', string), ('name', string), ('calls', int), ('total_time', float),
+                ('self_time', float), ('instructions', int), ('samples', int),
+            ],
+        )
+        with h5py.File(h5_path, 'r+') as f:
+            dataset = f.create_dataset('compile_profile', data=table)
+            dataset.attrs['total_time'] = total_time
+
+    def timed(self, kind: str, name: str, func: Callable, counted_device: Any = None) -> Callable:
+        """Wrap ``func`` so that its calls are recorded under ``(kind, name)``.
+
+        If ``counted_device`` is given, the instructions added to it during the call
+        are attributed to this entry and all enclosing ones.
+        """
+        entry = self.entries.setdefault((kind, name), ProfileEntry(kind, name))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            n_before = _n_instructions(counted_device)
+            frame = _Frame(entry)
+            self._stack.append(frame)
+            t_start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - t_start
+                self._stack.pop()
+                entry.calls += 1
+                entry.total_time += elapsed
+                entry.self_time += elapsed - frame.child_time
+                if counted_device is not None:
+                    # includes instructions added by nested calls on the same device,
+                    # e.g. Shutter.open calling go_high, so replaces their counts
+                    n_new = _n_instructions(counted_device) - n_before
+                    frame.instructions = n_new
+                    frame.samples = _n_samples(counted_device, n_new)
+                entry.instructions += frame.instructions
+                entry.samples += frame.samples
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent.child_time += elapsed
+                    parent.instructions += frame.instructions
+                    parent.samples += frame.samples
+
+        return wrapper
+
+    def _instrument_class(self, cls: type) -> None:
+        for name, member in list(vars(cls).items()):
+            if not inspect.isfunction(member) or (name.startswith('__') and name != '__init__'):
+                continue
+            setattr(cls, name, self.timed('operation', f'{cls.__name__}.{name}', member))
+            _patched_classes.append((cls, name, member))
+
+    def _instrument_devices(self, devices: Any) -> None:
+        if not hasattr(devices, 'add_build_hook'):
+            for device_name, device in list(vars(devices).items()):
+                self._instrument_device(device_name, device)
+            return
+        for device_name, device in devices.built_devices().items():
+            self._instrument_device(device_name, device)
+        devices.add_build_hook(self._instrument_device)
+
+    def _instrument_device(self, device_name: str, device: Any) -> None:
+        if not self._active:
+            # built after finish()
+            return
+        for method_name in self.DEVICE_METHODS:
+            method = getattr(device, method_name, None)
+            if not callable(method) or method_name in vars(device):
+                continue
+            wrapped = self.timed('device', f'{device_name}.{method_name}', method, counted_device=device)
+            setattr(device, method_name, wrapped)
+            self._patched_devices.append((device, method_name))
+
+    def _restore_devices(self) -> None:
+        # the wrappers are instance attributes shadowing the methods of the device class
+        self._active = False
+        while self._patched_devices:
+            device, method_name = self._patched_devices.pop()
+            delattr(device, method_name)
+
+
+def restore_classes() -> None:
+    """Remove the instrumentation from all classes patched by a profiler."""
+    while _patched_classes:
+        cls, name, original = _patched_classes.pop()
+        setattr(cls, name, original)
+
+
+def _n_instructions(device: Any) -> int:
+    if device is None:
+        return 0
+    return sum(len(getattr(device, table, ())) for table in ('instructions', 'acquisitions', 'exposures'))
+
+
+def _n_samples(device: Any, n_new: int) -> int:
+    """Number of samples the last ``n_new`` instructions of ``device`` expand to.
+
+    A constant is one sample, a ramp ``duration * clock rate`` samples.
+    """
+    instructions = getattr(device, 'instructions', None)
+    if n_new <= 0 or not isinstance(instructions, dict):
+        return max(n_new, 0)
+    n_samples = 0
+    for instruction in itertools.islice(reversed(instructions.values()), n_new):
+        if isinstance(instruction, dict) and 'clock rate' in instruction:
+            duration = instruction['end time'] - instruction['initial time']
+            n_samples += int(np.ceil(duration * instruction['clock rate']))
+        else:
+            n_samples += 1
+    return n_samples
@@ -0,0 +1,171 @@
+"""Compile the shots of a scan in parallel, ahead of running them.
+
+runmanager compiles the shots of a scan one after the other in a single
+subprocess, which for a few hundred heavy Rydberg shots takes much longer than
+the previous scan leaves. Here the shot files of a scan (as created by
+runmanager, holding only the globals) are compiled by a pool of worker
+processes instead.
+
+Every worker is a separate process with its own ``shot_globals`` and ``devices``.
+Within a worker, ``shot_globals`` reloads when the shot file changes and
+``devices`` is reset before each shot, as in runmanager's compile subprocess.
+A failing shot is reported with its traceback and does not stop the others; its
+shot file may hold partial data, so it has to be regenerated.
+
+Usage::
+
+    python -m labscriptlib.standard_sequence.precompile SHOTS... [-j N]
+        [--script classy_sequence.py] [--report report.json]
+
+``SHOTS`` are shot files or folders of shot files, in the order they will run
+(the files in a folder are sorted by name). The exit code is 1 if any shot failed.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import runpy
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable
+
+import labscript
+
+from labscriptlib.connection_table import devices
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCRIPT = Path(__file__).with_name('classy_sequence.py')
+
+
+@dataclass
+class ShotResult:
+    h5_path: str
+    compile_time: float
+    error: str | None = None
+    traceback: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def compile_shot(h5_path: str, labscript_file: str) -> ShotResult:
+    """Compile one shot file in this process, the way runmanager's compile subprocess does."""
+    t_start = time.perf_counter()
+    devices.reset()
+    try:
+        labscript.labscript_init(h5_path, labscript_file=labscript_file)
+        runpy.run_path(labscript_file, run_name='__main__')
+    except Exception as e:
+        return ShotResult(
+            h5_path, time.perf_counter() - t_start, f'{type(e).__name__}: {e}', traceback.format_exc(),
+        )
+    finally:
+        labscript.labscript_cleanup()
+    return ShotResult(h5_path, time.perf_counter() - t_start)
+
+
+def _init_worker(log_level: int) -> None:
+    # the sequence script only configures logging if nothing else did
+    logging.basicConfig(stream=sys.stdout, level=log_level)
+
+
+def precompile(
+        h5_paths: Iterable[os.PathLike | str],
+        labscript_file: os.PathLike | str = DEFAULT_SCRIPT,
+        max_workers: int | None = None,
+) -> list[ShotResult]:
+    """Compile ``h5_paths`` in a pool of ``max_workers`` processes.
+
+    Parameters
+    ----------
+    h5_paths : iterable of path-like
+        Shot files, in the order they will run.
+    labscript_file : path-like
+        Sequence script compiling a shot, by default ``classy_sequence.py``.
+    max_workers : int, optional
+        Number of worker processes, by default the number of CPUs.
+
+    Returns
+    -------
+    list of ShotResult
+        One result per shot, in the order of ``h5_paths``.
+    """
+    h5_paths = [os.fspath(h5_path) for h5_path in h5_paths]
+    labscript_file = os.path.abspath(labscript_file)
+    results: dict[str, ShotResult] = {}
+    t_start = time.perf_counter()
+
+    # spawned workers start from a clean interpreter on every platform, so no
+    # globals or devices are inherited from this process
+    with ProcessPoolExecutor(
+            max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(logging.WARNING,),
+    ) as executor:
+        futures = {executor.submit(compile_shot, h5_path, labscript_file): h5_path for h5_path in h5_paths}
+        for future in as_completed(futures):
+            h5_path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # the worker died, e.g. a crash in a device driver
+                result = ShotResult(h5_path, float('nan'), f'{type(e).__name__}: {e}')
+            results[h5_path] = result
+            if result.ok:
+                logger.info(f'[{len(results)}/{len(h5_paths)}] {h5_path} compiled in {result.compile_time:.1f} s')
+            else:
+                logger.error(f'[{len(results)}/{len(h5_paths)}] {h5_path} failed: {result.error}')
+
+    ordered = [results[h5_path] for h5_path in h5_paths]
+    n_failed = sum(not result.ok for result in ordered)
+    logger.info(
+        f'compiled {len(ordered) - n_failed} of {len(ordered)} shots in {time.perf_counter() - t_start:.1f} s'
+        + (f', {n_failed} failed' if n_failed else '')
+    )
+    return ordered
+
+
+def collect_shot_files(paths: Iterable[os.PathLike | str]) -> list[Path]:
+    """Shot files given directly or as folders, in order."""
+    shot_files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            shot_files.extend(sorted(path.glob('*.h5')))
+        elif path.is_file():
+            shot_files.append(path)
+        else:
+            raise ValueError(f'No shot file or folder {path}')
+    return shot_files
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('shots', nargs='+', help='shot files or folders of shot files, in run order')
+    parser.add_argument('--script', default=DEFAULT_SCRIPT, help='sequence script (default: classy_sequence.py)')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--report', help='write the per-shot results to this JSON file')
+    args = parser.parse_args(argv)
+
+    results = precompile(collect_shot_files(args.shots), args.script, args.jobs)
+    for result in results:
+        if not result.ok:
+            print(f'{result.h5_path}:\n{result.traceback or result.error}')
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump([asdict(result) for result in results], f, indent=2)
+    return int(not all(result.ok for result in results))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+    sys.exit(main())
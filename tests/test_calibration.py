@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from labscriptlib import calibration
+from labscriptlib.calibration import (
+    CALIBRATIONS,
+    img_x_ta_calib,
+    repump_freq_calib,
+    ta_aom_calib,
+    ta_freq_calib,
+    ta_freq_from_voltage,
+)
+
+
+class TestPolynomialCalibration:
+    def test_array_matches_scalar(self):
+        detunings = np.linspace(-200, 50, 7)
+        np.testing.assert_allclose(
+            ta_freq_calib(detunings), [ta_freq_calib(d) for d in detunings]
+        )
+
+    def test_scalar_in_scalar_out(self):
+        assert np.ndim(repump_freq_calib(0)) == 0
+
+    def test_out_of_range_array_keeps_error_type(self):
+        with pytest.raises(ValueError, match=r'within \[-438, 121\] MHz, got values in'):
+            ta_freq_calib(np.array([0, 200]))
+        with pytest.raises(RuntimeError):
+            repump_freq_calib(np.array([-300, 0]))
+
+    def test_nan_is_rejected(self):
+        with pytest.raises(ValueError):
+            ta_aom_calib(np.array([0.5, np.nan]))
+
+    def test_wrappers_vectorize(self):
+        powers = np.array([0, 1, 2])
+        assert img_x_ta_calib(powers).shape == (3,)
+
+    def test_registry(self):
+        assert CALIBRATIONS['ta_freq'](-13) == ta_freq_calib(-13)
+
+
+class TestLookupTables:
+    @pytest.mark.parametrize('name', ['ta_freq', 'repump_freq', 'tweezer_power'])
+    def test_inverse_roundtrip(self, name):
+        curve = CALIBRATIONS[name]
+        x = np.linspace(*curve.domain, 101)[1:-1]
+        np.testing.assert_allclose(curve.inverse(curve(x)), x, atol=curve.inverse_error + 1e-9)
+
+    def test_interpolation_error_bounds_table(self):
+        curve = CALIBRATIONS['ta_freq']
+        x = np.random.default_rng(0).uniform(*curve.domain, 1000)
+        assert np.max(np.abs(curve.interpolate(x) - curve(x))) <= curve.interpolation_error * 1.01
+        assert curve.interpolation_error < 1e-6
+
+    def test_inverse_range_check(self):
+        with pytest.raises(ValueError, match='ta_freq calibration output'):
+            ta_freq_from_voltage(20)
+
+
+class TestRefit:
+    @pytest.fixture
+    def curve(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(calibration, 'CALIBRATION_DIR', tmp_path)
+        monkeypatch.setattr(calibration, 'CALIBRATIONS', {})
+        return calibration.PolynomialCalibration(
+            'line', [2, 1], domain=(0, 1), error=ValueError, message='out of range'
+        )
+
+    def test_saved_fit_is_picked_up(self, curve):
+        x = np.linspace(0, 1, 11)
+        fit = calibration.fit_calibration('line', x, 3 * x + 0.5, degree=1)
+        assert fit.max_residual < 1e-12
+
+        fit.save()
+        curve.refresh(force=True)
+        assert curve(1) == pytest.approx(3.5)
+        assert curve.fit_file.version == 1
+
+    def test_versions_increment(self, curve, tmp_path):
+        x = np.linspace(0, 1, 11)
+        calibration.fit_calibration('line', x, x, degree=1).save()
+        path = calibration.fit_calibration('line', x, 2 * x, degree=1).save()
+        assert path.endswith('v002.yml')
+        curve.refresh(force=True)
+        assert curve(1) == pytest.approx(2)
+
+    def test_inputs_outside_domain(self, curve):
+        x = np.linspace(0, 6.5, 11)
+        with pytest.raises(ValueError, match='9 of 11 measurements lie outside'):
+            calibration.fit_calibration('line', x, x, degree=1)
+
+    def test_unknown_curve(self, curve):
+        with pytest.raises(ValueError, match='Unknown calibration'):
+            calibration.fit_calibration('nope', [0, 1], [0, 1], degree=1)
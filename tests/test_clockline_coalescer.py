@@ -0,0 +1,99 @@
+import pytest
+
+from labscriptlib.clockline_coalescer import coalesce, coalesce_clocklines, movable_constant
+from labscriptlib.recording_devices import RecordingBackend
+
+MIN_INTERVAL = 10e-6
+
+
+@pytest.fixture
+def card():
+    backend = RecordingBackend()
+    clockline = backend.ClockLine(name='clockline_6739')
+    clockline.clock_limit = 1 / MIN_INTERVAL
+    return backend.NI_PXIe_6739(name='ni_6739_0', parent_device=clockline)
+
+
+@pytest.fixture
+def outputs(card):
+    backend = RecordingBackend()
+    return [backend.AnalogOut(f'ao{i}', card, f'ao{i}') for i in range(3)]
+
+
+def test_merge_onto_fixed_update(outputs):
+    ao0, ao1, ao2 = outputs
+    ao0.constant(1e-3, 1)
+    movable_constant(ao1, 1e-3 - 4e-6, 0.5, tolerance=5e-6)
+    movable_constant(ao2, 1e-3 + 3e-6, 0.2, tolerance=5e-6)
+    ao2.constant(2e-3, 0)
+
+    assert coalesce(outputs, MIN_INTERVAL) == {'ao1': 1, 'ao2': 1}
+    assert ao1.instructions == {1e-3: 0.5}
+    assert ao2.instructions == {1e-3: 0.2, 2e-3: 0}
+
+
+def test_merge_movable_updates(outputs):
+    ao0, ao1, _ = outputs
+    movable_constant(ao0, 1e-3, 1, tolerance=5e-6)
+    movable_constant(ao1, 1e-3 + 6e-6, 1, tolerance=5e-6)
+    coalesce(outputs, MIN_INTERVAL)
+    assert ao0.instructions == ao1.instructions == {1.003e-3: 1}
+
+
+def test_per_output_tolerances(outputs):
+    ao0, ao1, _ = outputs
+    ao0.constant(1e-3, 1)
+    ao1.constant(1e-3 + 2e-6, 1)
+    assert coalesce(outputs, MIN_INTERVAL) == {}
+    assert coalesce(outputs, MIN_INTERVAL, tolerances={'ao1': 2e-6}) == {'ao1': 1}
+
+
+def test_reject_beyond_tolerance(outputs):
+    ao0, ao1, _ = outputs
+    ao0.constant(1e-3, 1)
+    movable_constant(ao1, 1e-3 + 8e-6, 0.5, tolerance=5e-6)
+    with pytest.raises(ValueError, match='ao1 at 0.001008'):
+        coalesce(outputs, MIN_INTERVAL)
+
+
+def test_reject_same_output_conflict(outputs):
+    ao0 = outputs[0]
+    movable_constant(ao0, 1e-3, 1, tolerance=5e-6)
+    movable_constant(ao0, 1e-3 + 4e-6, 0, tolerance=5e-6)
+    with pytest.raises(ValueError, match='different values'):
+        coalesce(outputs, MIN_INTERVAL)
+
+
+def test_ramps_are_fixed(outputs):
+    ao0, ao1, _ = outputs
+    ao0.ramp(1e-3, 1e-3, 0, 1, samplerate=1e5)
+    movable_constant(ao1, 1.5e-3, 1, tolerance=5e-6)
+    movable_constant(ao1, 2e-3 + 3e-6, 0, tolerance=5e-6)
+    assert coalesce(outputs, MIN_INTERVAL) == {'ao1': 1}
+    assert list(ao1.instructions) == [1.5e-3, 2e-3]
+    assert list(ao0.instructions) == [1e-3]
+
+
+def test_coalesce_clocklines(outputs):
+    ao0, ao1, _ = outputs
+    ao0.constant(1e-3, 1)
+    movable_constant(ao1, 1e-3 + 2e-6, 1, tolerance=5e-6)
+    backend = RecordingBackend()
+    pb = backend.PulseBlasterESRPro500(name='pb')
+    direct = backend.DigitalOut('aom', pb.direct_outputs, 'flag 1')
+    direct.go_high(1e-3 + 1e-6)
+    no_clock = backend.DigitalOut('switch', backend.NI_PXIe_6363(name='card'), 'port0/line0')
+    no_clock.go_high(1e-3 + 3e-6)
+    assert coalesce_clocklines([ao0, ao1, direct, no_clock], tolerances={'aom': 5e-6, 'switch': 5e-6}) == {'ao1': 1}
+    assert direct.instructions == {1.001e-3: 1}
+    assert no_clock.instructions == {1.003e-3: 1}
+
+
+def test_coalesce_direct_outputs():
+    backend = RecordingBackend()
+    pb = backend.PulseBlasterESRPro500(name='pb')
+    flag1, flag2 = (backend.DigitalOut(f'flag{i}', pb.direct_outputs, f'flag {i}') for i in (1, 2))
+    flag1.go_high(1e-3)
+    flag2.go_high(1e-3 + 10e-9)
+    assert coalesce_clocklines([flag1, flag2], tolerances={'flag2': 20e-9}) == {'flag2': 1}
+    assert flag2.instructions == {1e-3: 1}
@@ -0,0 +1,47 @@
+import h5py
+
+from labscriptlib.connection_table import devices
+from labscriptlib.recording_devices import RecordingBackend, RecordingDigitalOut
+from labscriptlib.shot_globals import shot_globals, write_offline_shot
+from labscriptlib.standard_sequence.compile_profiler import CompileProfiler
+
+
+def test_profile_saved_and_unwrapped(tmp_path):
+    from labscriptlib.experiment_components import D2Lasers
+    from labscriptlib.standard_operations import MOTOperations
+
+    shot_path = write_offline_shot(tmp_path / 'profile.h5', {'do_compile_profile': True})
+    assert shot_globals.do_compile_profile
+    backend = RecordingBackend()
+    devices.initialize(backend=backend)
+    original_method = MOTOperations._do_mot_in_situ_sequence
+
+    profiler = CompileProfiler()
+    profiler.start(devices, [MOTOperations, D2Lasers])
+    sequence = MOTOperations(0)
+    n_before = backend.n_instructions
+    sequence._do_mot_in_situ_sequence(0, reset_mot=True, check_with_vimba=False)
+    built_devices = devices.built_devices()
+    assert MOTOperations._do_mot_in_situ_sequence is not original_method
+    assert 'go_high' in vars(devices.ta_aom_digital)
+    profiler.finish(shot_path)
+
+    # the classes and devices are unwrapped
+    assert MOTOperations._do_mot_in_situ_sequence is original_method
+    for device in built_devices.values():
+        assert not set(vars(device)) & set(CompileProfiler.DEVICE_METHODS)
+    assert devices.ta_aom_digital.go_high.__func__ is RecordingDigitalOut.go_high
+
+    with h5py.File(shot_path, 'r') as f:
+        table = f['compile_profile'][()]
+        assert f['compile_profile'].attrs['total_time'] > 0
+    rows = {(row['kind'].decode(), row['name'].decode()): row for row in table}
+    sequence_row = rows['operation', 'MOTOperations._do_mot_in_situ_sequence']
+    assert sequence_row['calls'] == 1
+    # the instructions added by device calls are attributed to the enclosing operations
+    assert sequence_row['instructions'] == backend.n_instructions - n_before > 0
+    assert rows['operation', 'MOTOperations.__init__']['instructions'] == n_before
+    assert rows['device', 'ta_aom_digital.go_high']['calls'] > 0
+    aom_rows = [row for (kind, name), row in rows.items() if name.startswith('ta_aom_digital.')]
+    assert sum(row['instructions'] for row in aom_rows) == len(devices.ta_aom_digital.instructions)
+    assert all(row['self_time'] <= row['total_time'] for row in table)
@@ -0,0 +1,91 @@
+import pytest
+
+from labscriptlib.connection_table import LabDevices, connection_table_specs
+from labscriptlib.recording_devices import RecordingBackend
+
+
+@pytest.fixture
+def backend():
+    return RecordingBackend()
+
+
+def built_names(backend):
+    return [device.name for device in backend.devices]
+
+
+def test_lazy_build(backend):
+    devices = LabDevices()
+    devices.initialize(backend=backend)
+    assert devices.initialized()
+    assert built_names(backend) == ['pb']
+
+    devices.ta_aom_analog.constant(0, 0.5)
+    assert built_names(backend)[:3] == ['pb', 'clockline_6739', 'ni_6739_0']
+    assert devices.ta_aom_analog.parent_device.parent_device.properties['pseudoclock'] is devices.pb.pseudoclock
+    assert 'ta_shutter' not in devices.built_devices()
+
+    n_built = len(backend.devices)
+    devices.repump_aom_analog
+    assert len(backend.devices) == n_built
+
+
+def test_lazy_build_declares_all_card_outputs(backend):
+    _, all_specs = connection_table_specs()
+    card_outputs = sorted(
+        spec.kwargs['name'] for spec in all_specs
+        if spec.class_name in ('AnalogOut', 'DigitalOut', 'Shutter')
+        and getattr(spec.kwargs.get('parent_device'), 'kwargs', {}).get('name') == 'ni_6363_0'
+    )
+    devices = LabDevices()
+    devices.initialize(backend=backend)
+    devices.ta_shutter
+    assert sorted(
+        device.name for device in backend.devices
+        if device.parent_device is devices.ta_shutter.parent_device and device.__class__.__name__ != 'AnalogIn'
+    ) == card_outputs
+    assert len(set(built_names(backend))) == len(backend.devices)
+
+
+def test_lazy_build_resolves_triggers(backend):
+    devices = LabDevices()
+    devices.initialize(backend=backend)
+    assert devices.spectrum_0.trigger['device'].name == 'ni_6363_0'
+    assert devices.dds0.properties['profileControls']['PS0']['device'] is devices.spectrum_0.trigger['device']
+
+
+def test_eager_build(backend):
+    named_specs, all_specs = connection_table_specs()
+    devices = LabDevices()
+    devices.initialize(backend=backend, lazy=False)
+    assert len(backend.devices) == len(all_specs)
+    assert built_names(backend)[:3] == ['pb', 'clockline_6363', 'ni_6363_0']
+    assert devices.built_devices().keys() == named_specs.keys()
+
+
+def test_specs_cached_across_shots(backend):
+    devices = LabDevices()
+    devices.initialize(backend=backend)
+    devices.ta_shutter
+    devices.initialize(backend=RecordingBackend())
+    assert 'ta_shutter' not in devices.built_devices()
+    assert connection_table_specs() is connection_table_specs()
+
+
+def test_build_hooks(backend):
+    devices = LabDevices()
+    devices.initialize(backend=backend)
+    built = []
+    devices.add_build_hook(lambda name, device: built.append(name))
+    devices.ta_shutter
+    devices.ta_shutter
+    assert built.count('ta_shutter') == 1
+    assert 'x_coil_feedback_off' in built
+
+
+def test_unknown_device(backend):
+    devices = LabDevices()
+    with pytest.raises(AttributeError, match='initialize'):
+        devices.ta_shutter
+    devices.initialize(backend=backend)
+    with pytest.raises(AttributeError, match='connection table'):
+        devices.no_such_device
@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+from labscriptlib.experiment_components.field_control import _sample_and_hold
+
+
+@pytest.mark.parametrize('n_points, duration', [(11, 1e-3), (7, 0.37e-3), (101, 12.3e-3)])
+def test_sample_and_hold_at_clock_midpoints(n_points, duration):
+    samples = np.arange(n_points, dtype=float)
+    samplerate = (n_points - 1) / duration
+    # labscript evaluates a ramp once per clock period, in its middle
+    n_ticks = int(round(duration * samplerate))
+    midpoints = (np.arange(n_ticks) + 0.5) / samplerate
+
+    played = _sample_and_hold(midpoints, duration, samples, samplerate)
+    np.testing.assert_array_equal(played, samples[:-1])
@@ -0,0 +1,66 @@
+import h5py
+import numpy as np
+import pytest
+
+from labscriptlib.fifo_streaming import CombStream, prefetch
+
+
+@pytest.fixture
+def stream():
+    freqs = np.array([80e6, 81e6, 82e6])
+    stream = CombStream(ch=0, sample_rate=625e6, freqs=freqs, amplitudes=0.3, phases=[0, 90, 180])
+    return stream.hold(1e-6).move(freqs + 0.5e6, 20e-6).hold(1e-6)
+
+
+def test_segments(stream):
+    assert [segment.ramp for segment in stream.segments] == ['static', 'min_jerk', 'static']
+    assert stream.n_samples == 625 + 12500 + 625
+    assert stream.freqs == pytest.approx([80.5e6, 81.5e6, 82.5e6])
+
+
+def test_phase_continuity(stream):
+    for before, after in zip(stream.segments, stream.segments[1:]):
+        end = before.cycles(np.array([before.duration]))[0]
+        start = after.cycles(np.array([0.0]))[0]
+        assert np.mod(end - start + 0.5, 1) - 0.5 == pytest.approx(0, abs=1e-9)
+
+
+def test_chunks_match_direct_evaluation(stream):
+    chunks = list(stream.chunks(4096))
+    samples = np.concatenate(chunks)
+    assert samples.dtype == np.int16
+    assert len(samples) == stream.n_samples
+    assert max(len(chunk) for chunk in chunks) == 4096
+
+    segment = stream.segments[1]
+    t = np.arange(100) / stream.sample_rate
+    expected = stream.full_scale() * (segment.amplitudes(t) * np.cos(2 * np.pi * segment.cycles(t))).sum(axis=1)
+    np.testing.assert_allclose(samples[625:725], expected, atol=1)
+
+
+def test_save_load(stream, tmp_path):
+    with h5py.File(tmp_path / 'stream.h5', 'w') as f:
+        stream.save(f.create_group('stream'))
+        loaded = CombStream.load(f['stream'])
+    assert loaded.n_samples == stream.n_samples
+    assert np.array_equal(np.concatenate(list(loaded.chunks())), np.concatenate(list(stream.chunks())))
+
+
+def test_move_shape_mismatch(stream):
+    with pytest.raises(ValueError):
+        stream.move([80e6], 1e-6)
+
+
+def test_prefetch():
+    assert list(prefetch(iter(range(10)))) == list(range(10))
+
+    def failing():
+        yield 1
+        raise RuntimeError('generator failed')
+
+    with pytest.raises(RuntimeError, match='generator failed'):
+        list(prefetch(failing()))
+
+    chunks = prefetch(iter(range(100)), depth=1)
+    assert next(chunks) == 0
+    chunks.close()
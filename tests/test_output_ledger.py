@@ -0,0 +1,44 @@
+import pytest
+
+from labscriptlib.output_ledger import prune_redundant_instructions, redundant_times
+from labscriptlib.recording_devices import RecordingBackend
+
+
+@pytest.fixture
+def backend():
+    return RecordingBackend()
+
+
+def test_redundant_times():
+    ramp = {'initial time': 0.3, 'end time': 0.4}
+    instructions = {0.5: 1, 0: 1, 0.1: 1, 0.2: 0, 0.25: 0, 0.3: ramp, 0.4: 0, 0.45: 0}
+    assert redundant_times(instructions) == [0.1, 0.25, 0.45]
+    assert redundant_times({}) == []
+
+
+def test_prune_digital_and_analog(backend):
+    aom = backend.DigitalOut('aom', None, 'flag 1')
+    aom.go_high(0)
+    aom.go_high(1e-3)
+    aom.go_low(3e-3)
+    # added out of time order, e.g. by a shutter delay
+    aom.go_high(2e-3)
+    coil = backend.AnalogOut('coil', None, 'ao0')
+    coil.constant(0, 1.5)
+    coil.ramp(1e-3, 1e-3, 1.5, 0, samplerate=1e5)
+    coil.constant(2e-3, 0)
+    coil.constant(4e-3, 0)
+    camera = backend.Manta419B('manta', None, 'flag 3')
+
+    removed = prune_redundant_instructions([aom, coil, camera])
+    assert removed == {'aom': 2, 'coil': 1}
+    assert aom.instructions == {0: 1, 3e-3: 0}
+    assert list(coil.instructions) == [0, 1e-3, 2e-3]
+
+
+def test_prune_nothing_redundant(backend):
+    aom = backend.DigitalOut('aom', None, 'flag 1')
+    aom.go_high(0)
+    aom.go_low(1e-3)
+    assert prune_redundant_instructions([aom]) == {}
+    assert aom.instructions == {0: 1, 1e-3: 0}
@@ -0,0 +1,48 @@
+import h5py
+import pytest
+
+from labscriptlib.standard_sequence.precompile import collect_shot_files, precompile
+
+SCRIPT = '''
+import h5py
+from labscript import compiler
+
+with h5py.File(compiler.hdf5_filename, 'r+') as f:
+    if f['globals'].attrs['fail']:
+        raise ValueError('bad shot')
+    f.attrs['compiled'] = True
+'''
+
+
+@pytest.fixture
+def scan(tmp_path):
+    script = tmp_path / 'sequence.py'
+    script.write_text(SCRIPT)
+    shots = tmp_path / 'shots'
+    shots.mkdir()
+    for i, fail in enumerate([False, True, False]):
+        with h5py.File(shots / f'shot_{i}.h5', 'w') as f:
+            f.create_group('globals').attrs['fail'] = fail
+    return script, shots
+
+
+def test_precompile(scan):
+    script, shots = scan
+    shot_files = collect_shot_files([shots])
+    results = precompile(shot_files, script, max_workers=2)
+
+    assert [result.h5_path for result in results] == [str(path) for path in shot_files]
+    assert [result.ok for result in results] == [True, False, True]
+    assert results[1].error == 'ValueError: bad shot'
+    assert 'Traceback' in results[1].traceback
+    with h5py.File(shot_files[2], 'r') as f:
+        assert f.attrs['compiled']
+
+
+def test_collect_shot_files(scan, tmp_path):
+    _, shots = scan
+    assert collect_shot_files([shots / 'shot_2.h5', shots]) == [
+        shots / 'shot_2.h5', shots / 'shot_0.h5', shots / 'shot_1.h5', shots / 'shot_2.h5',
+    ]
+    with pytest.raises(ValueError):
+        collect_shot_files([tmp_path / 'missing.h5'])
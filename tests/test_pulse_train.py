@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from labscript import LabscriptError, compiler
+
+from labscriptlib import pulse_train
+from labscriptlib.pulse_train import PulseTrain, check_min_spacing, emit_pulse_trains
+
+
+class FakeDigitalOut:
+    def __init__(self, name='out'):
+        self.name = name
+        self.instructions = {}
+
+    def go_high(self, t):
+        self.instructions[t] = 1
+
+    def go_low(self, t):
+        self.instructions[t] = 0
+
+
+class FakeShutter(FakeDigitalOut):
+    def go_high(self, t):
+        self.instructions[t - 1e-3] = 1
+
+
+@pytest.fixture
+def started(monkeypatch):
+    """Shot started, with FakeDigitalOut standing in for labscript's DigitalOut."""
+    monkeypatch.setattr(pulse_train, 'DigitalOut', FakeDigitalOut)
+    monkeypatch.setattr(compiler, 'start_called', True, raising=False)
+
+
+class TestPulseTrain:
+    def test_padding_is_broadcast(self):
+        train = PulseTrain.from_pulses(FakeDigitalOut(), [0, 1, 2], 0.1, pre_padding=[0.01, 0.02, 0.03])
+        np.testing.assert_allclose(train.on_times, [-0.01, 0.98, 1.97])
+        np.testing.assert_allclose(train.off_times, [0.1, 1.1, 2.1])
+
+    def test_overlap_raises(self):
+        with pytest.raises(ValueError, match='Pulses 0 and 1 on out overlap'):
+            PulseTrain.from_pulses(FakeDigitalOut(), [0, 0.05], 0.1)
+
+    def test_touching_pulses_merge(self):
+        train = PulseTrain.from_pulses(FakeDigitalOut(), [0, 0.1, 0.3], 0.1)
+        np.testing.assert_allclose(train.on_times, [0, 0.3])
+        np.testing.assert_allclose(train.off_times, [0.2, 0.4])
+
+
+class TestEmit:
+    def test_min_spacing_across_outputs(self):
+        a = PulseTrain.from_pulses(FakeDigitalOut('a'), [0], 1e-6)
+        b = PulseTrain.from_pulses(FakeDigitalOut('b'), [10e-9], 1e-6)
+        with pytest.raises(ValueError, match='closer than the minimum instruction spacing'):
+            check_min_spacing([a, b], 20e-9)
+        # simultaneous edges share an instruction
+        check_min_spacing([a, PulseTrain.from_pulses(FakeDigitalOut('c'), [0], 2e-6)], 20e-9)
+
+    def test_bulk_matches_go_high_go_low(self, started):
+        starts = np.arange(1000) * 2e-6 + 1e-3
+        bulk, reference = FakeDigitalOut(), FakeDigitalOut()
+        emit_pulse_trains([PulseTrain.from_pulses(bulk, starts, 1e-6)], 20e-9)
+        for start in starts:
+            reference.go_high(round(start, 10))
+            reference.go_low(round(start + 1e-6, 10))
+        assert bulk.instructions == reference.instructions
+
+    def test_bulk_requires_start(self, started, monkeypatch):
+        monkeypatch.setattr(compiler, 'start_called', False)
+        with pytest.raises(LabscriptError, match='prior to calling start'):
+            emit_pulse_trains([PulseTrain.from_pulses(FakeDigitalOut(), [1e-3], 1e-6)], 20e-9)
+
+    def test_subclasses_use_go_high(self, started):
+        shutter = FakeShutter()
+        emit_pulse_trains([PulseTrain.from_pulses(shutter, [1e-2], 1e-3)], 20e-9)
+        assert shutter.instructions == {10e-3 - 1e-3: 1, 11e-3: 0}
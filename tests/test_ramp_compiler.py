@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from labscriptlib.calibration import ta_freq_calib
+from labscriptlib.ramp_compiler import adaptive_ramp, compile_hold_steps
+
+
+class FakeOutput:
+    name = 'fake'
+
+    def __init__(self):
+        self.instructions = {}
+
+    def constant(self, t, value):
+        self.instructions[t] = value
+
+
+def held_values(step_times, step_values, grid):
+    return step_values[np.searchsorted(step_times, grid, side='right') - 1]
+
+
+class TestCompileHoldSteps:
+    def test_linear_ramp_within_tolerance(self):
+        duration, samplerate, tolerance = 10e-3, 1e5, 1e-3
+        target = lambda t_rel: 1 - 0.5 * t_rel / duration
+        step_times, step_values = compile_hold_steps(target, duration, samplerate, tolerance)
+
+        grid = np.arange(int(duration * samplerate)) / samplerate
+        assert np.all(np.abs(held_values(step_times, step_values, grid) - target(grid)) <= tolerance + 1e-12)
+        assert step_values[-1] == target(duration)
+        assert len(step_times) < len(grid) / 3
+
+    def test_constant_target_is_one_step(self):
+        step_times, step_values = compile_hold_steps(lambda t_rel: np.full_like(t_rel, 0.3), 1e-3, 1e5)
+        np.testing.assert_array_equal(step_times, [0])
+        np.testing.assert_array_equal(step_values, [0.3])
+
+    def test_steps_stay_on_sample_grid(self):
+        step_times, _ = compile_hold_steps(np.sin, 1, 1e3, tolerance=1e-2)
+        np.testing.assert_allclose(step_times * 1e3, np.round(step_times * 1e3), atol=1e-9)
+
+    def test_rejects_nonpositive_tolerance(self):
+        with pytest.raises(ValueError):
+            compile_hold_steps(np.sin, 1, 1e3, tolerance=0)
+
+
+def test_adaptive_ramp_follows_calibration():
+    output = FakeOutput()
+    duration = adaptive_ramp(output, 1, 1e-3, -100, 0, 3e5, calibration=ta_freq_calib)
+    assert duration == 1e-3
+
+    times = np.array(list(output.instructions))
+    assert times[0] == 1 and times[-1] < 1 + duration
+    assert output.instructions[times[-1]] == pytest.approx(ta_freq_calib(0))
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from labscriptlib.recording_devices import RecordingBackend, RecordingDigitalOut
+
+
+@pytest.fixture
+def backend():
+    return RecordingBackend()
+
+
+def test_backend_creates_stand_ins(backend):
+    pulseblaster = backend.PulseBlasterESRPro500(name='pb', board_number=0)
+    clockline = backend.ClockLine(name='clockline', pseudoclock=pulseblaster.pseudoclock, connection='flag 0')
+    card = backend.NI_PXIe_6739(name='ni_0', parent_device=clockline)
+    output = backend.AnalogOut('ta_aom_analog', card, connection='ao0')
+
+    assert isinstance(backend.DigitalOut('x', pulseblaster.direct_outputs, 'flag 1'), RecordingDigitalOut)
+    assert output.parent_device is card
+    assert card.child_devices == [output]
+    assert len(backend.devices) == 5
+    with pytest.raises(AttributeError):
+        backend.NoSuchDevice
+
+
+def test_instruction_tables(backend):
+    digital = backend.DigitalOut('aom', None, 'flag 1')
+    digital.go_high(1e-3)
+    digital.go_low(2e-3 + 1e-13)
+    analog = backend.AnalogOut('coil', None, 'ao0')
+    analog.constant(0, 1.5)
+    assert analog.ramp(1e-3, 1e-3, 1.5, 0, samplerate=1e5) == 1e-3
+
+    assert digital.instructions == {1e-3: 1, 2e-3: 0}
+    assert analog.instructions[1e-3]['clock rate'] == 1e5
+    assert backend.n_instructions == 4
+
+
+def test_shutter_delays(backend):
+    shutter = backend.Shutter('shutter', None, 'flag 2', delay=(2e-3, 1e-3), open_state=0)
+    shutter.open(10e-3)
+    shutter.close(20e-3)
+    assert shutter.instructions == {8e-3: 0, 19e-3: 1}
+
+
+def test_conflicts(backend):
+    analog = backend.AnalogOut('coil', None, 'ao0')
+    analog.constant(1e-3, 1)
+    analog.constant(1e-3, 2)
+    assert analog.instructions == {1e-3: 2}
+
+    analog.ramp(2e-3, 1e-3, 0, 1, samplerate=1e5)
+    with pytest.raises(ValueError, match='ramp'):
+        analog.constant(2e-3, 0)
+    with pytest.raises(ValueError, match='before the start'):
+        analog.constant(-1e-3, 0)
+
+
+def test_events_sorted(backend):
+    analog = backend.AnalogOut('coil', None, 'ao0')
+    camera = backend.Manta419B('manta', None, 'flag 3')
+    spectrum = backend.Spectrum('spectrum_uwave', None)
+    analog.constant(3e-3, 1)
+    camera.expose('image', 2e-3, 'atoms', exposure_time=1e-3)
+    spectrum.comb(1e-3, 1e-4, freqs=[1e6, 2e6], amplitudes=[0.5, 0.5], phases=[0, 0], ch=0, loops=2)
+    # instructions added directly to the table, as pulse_train does, are included
+    analog.instructions[4e-3] = 0
+
+    events = backend.events()
+    assert events['t'].tolist() == [1e-3, 2e-3, 3e-3, 4e-3]
+    assert events['method'].tolist() == ['comb', 'expose', 'constant', 'constant']
+    assert events['duration'][0] == pytest.approx(2e-4)
+    assert np.isnan(events['value'][1])
+
+
+def test_flexible_loops(backend):
+    spectrum = backend.Spectrum('spectrum_tw', None)
+    spectrum.start_flexible_loop(1e-3, spectrum.comb, 'comb_0', ch=0)
+    with pytest.raises(ValueError, match='already in use'):
+        spectrum.start_flexible_loop(2e-3, spectrum.comb, 'comb_0', ch=0)
+    spectrum.stop_flexible_loop(5e-3, 'comb_0', fifo=True)
+    assert spectrum.calls[-1][:3] == ('stop_flexible_loop', 5e-3, 4e-3)
+    with pytest.raises(ValueError, match='no flexible loop'):
+        spectrum.stop_flexible_loop(6e-3, 'comb_0')
@@ -0,0 +1,53 @@
+import pytest
+
+from labscript import compiler
+from labscriptlib.shot_globals import ShotGlobals, write_offline_shot
+
+
+def test_overrides(tmp_path):
+    shot_globals = ShotGlobals()
+    write_offline_shot(tmp_path / 'override.h5', {'TW_y_use_dds': False})
+    assert shot_globals.TW_y_use_dds is False
+    assert shot_globals.get_n_runs() == 1
+
+
+def test_unit_and_capitalization_check(tmp_path):
+    shot_globals = ShotGlobals()
+    assert shot_globals.unit('TW_y_use_dds') == 'bool'
+    write_offline_shot(tmp_path / 'misspelled.h5', {'tw_y_use_dds': False})
+    with pytest.raises(ValueError, match='only in capitalization'):
+        shot_globals.TW_y_use_dds
+
+
+def test_unknown_global_suggestions():
+    with pytest.raises(AttributeError, match='did you mean TW_y_use_dds'):
+        ShotGlobals().TW_y_use_ddss
+
+
+def test_no_shot_loaded(monkeypatch):
+    monkeypatch.setattr(compiler, 'hdf5_filename', None)
+    with pytest.raises(RuntimeError, match='no shot loaded'):
+        ShotGlobals().TW_y_use_dds
+
+
+def test_snapshot(tmp_path):
+    shot_globals = ShotGlobals()
+    write_offline_shot(tmp_path / 'snapshot.h5', {'TW_y_use_dds': False, 'gmc_dur': 1e-3})
+    snapshot = shot_globals.snapshot()
+    assert not hasattr(snapshot, '__dict__')
+    assert snapshot.TW_y_use_dds is False
+    assert snapshot.gmc_dur == shot_globals.gmc_dur == 1e-3
+    # declared on ShotGlobals, but not set in this shot
+    with pytest.raises(AttributeError, match='has no default and is not set in runmanager'):
+        snapshot.interaction_time
+    with pytest.raises(AttributeError, match='did you mean TW_y_use_dds'):
+        snapshot.TW_y_use_ddss
+
+    write_offline_shot(tmp_path / 'next.h5')
+    assert shot_globals.snapshot() is not snapshot
+
+
+def test_unknown_runmanager_global(tmp_path):
+    write_offline_shot(tmp_path / 'unknown.h5', {'TW_y_use_ddss': False})
+    with pytest.raises(ValueError, match=r'TW_y_use_ddss is unknown \(did you mean TW_y_use_dds'):
+        ShotGlobals().TW_y_use_dds
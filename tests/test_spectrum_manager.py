@@ -0,0 +1,36 @@
+import h5py
+import pytest
+
+from labscriptlib.spectrum_manager import comb_kwargs
+
+
+def test_comb_kwargs_single_tone():
+    kwargs = comb_kwargs([80], 0.99, 1e-3, ch=1)
+    assert kwargs['freqs'] == pytest.approx([80e6])
+    assert kwargs['amplitudes'] == [0.99]
+    assert kwargs['phases'] == [0]
+    assert kwargs['ch'] == 1
+    kwargs['ch'] = 0
+    assert comb_kwargs([80], 0.99, 1e-3, ch=1)['ch'] == 1
+
+
+def test_tweezer_card_program(offline_shot):
+    from labscriptlib.connection_table import devices
+    from labscriptlib.recording_devices import RecordingBackend
+    from labscriptlib.spectrum_manager import SpectrumManager
+    from labscriptlib.spectrum_programming import read_card_program
+
+    def compile_card(stop_time):
+        devices.initialize(backend=RecordingBackend())
+        manager = SpectrumManager()
+        manager.start_tweezer_card()
+        manager.start_tweezers(0)
+        manager.stop_tweezers(stop_time)
+        manager.stop_tweezer_card()
+        with h5py.File(offline_shot, 'r') as f:
+            return read_card_program(f, 'spectrum_0')
+
+    fingerprint, waveforms = compile_card(10e-3)
+    assert 'tw_x_comb' in waveforms
+    assert compile_card(10e-3)[0] == fingerprint
+    assert compile_card(20e-3)[0] != fingerprint
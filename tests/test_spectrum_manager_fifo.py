@@ -0,0 +1,89 @@
+import h5py
+import numpy as np
+import pytest
+
+from labscriptlib.connection_table import devices
+from labscriptlib.fifo_streaming import CombStream
+from labscriptlib.recording_devices import RecordingBackend
+from labscriptlib.spectrum_manager_fifo import SpectrumManagerFifo
+
+
+@pytest.fixture
+def manager():
+    devices.initialize(backend=RecordingBackend())
+    manager = SpectrumManagerFifo()
+    manager.start_tweezer_card(channels=(0, 1))
+    return manager
+
+
+def loop_calls():
+    card = devices.spectrum_0
+    return [
+        (method, t, kwargs['key'])
+        for (method, t, _, _), kwargs in zip(card.calls, card.call_kwargs)
+        if method.endswith('flexible_loop')
+    ]
+
+
+def test_two_channel_card(manager):
+    mode = devices.spectrum_0.mode
+    assert mode['replay_mode'] == 'fifo_single'
+    assert [channel['name'] for channel in mode['channels']] == ['Tweezer_X', 'Tweezer_Y']
+    assert [channel['port'] for channel in mode['channels']] == [0, 1]
+    assert manager.keys == {0: 'x_fifo_default', 1: 'y_fifo_default'}
+    assert manager.kwargs[1]['ch'] == 1
+
+    manager.start_tweezers(1e-3)
+    manager.stop_tweezers(5e-3)
+    assert loop_calls() == [
+        ('start_flexible_loop', 1e-3, 'x_fifo_default'),
+        ('start_flexible_loop', 1e-3, 'y_fifo_default'),
+        ('stop_flexible_loop', 5e-3, 'x_fifo_default'),
+        ('stop_flexible_loop', 5e-3, 'y_fifo_default'),
+    ]
+    assert not manager.loop_starts
+
+
+def test_move_needs_streaming_driver(manager):
+    manager.start_tweezers(1e-3)
+    with pytest.raises(RuntimeError, match='does not play fifo_streams'):
+        manager.move_tweezers(2e-3, manager.kwargs[0]['freq'] / 1e6 + 1, 100e-6)
+    # the static combs keep playing
+    assert set(manager.loop_starts) == {0, 1}
+    assert [call[0] for call in loop_calls()] == ['start_flexible_loop'] * 2
+
+
+def test_move_tweezers(manager, offline_shot):
+    devices.spectrum_0.supports_fifo_streams = True
+    manager.start_tweezers(1e-3)
+    old_kwargs = manager.kwargs[0]
+    freqs_end = old_kwargs['freq'] / 1e6 + 1
+    t_move = 2e-3 + 1.6e-9
+
+    t_end = manager.move_tweezers(t_move, freqs_end, 100e-6, hold_before=10e-6, hold_after=10e-6)
+
+    assert t_end == pytest.approx(t_move + 120e-6)
+    new_key = manager.keys[0]
+    assert loop_calls() == [
+        ('start_flexible_loop', 1e-3, 'x_fifo_default'),
+        ('start_flexible_loop', 1e-3, 'y_fifo_default'),
+        ('stop_flexible_loop', t_move, 'x_fifo_default'),
+        ('start_flexible_loop', t_end, new_key),
+    ]
+    # the other channel keeps its static loop
+    assert manager.loop_starts == {0: t_end, 1: 1e-3}
+
+    with h5py.File(offline_shot, 'r') as f:
+        (stream_key,) = f['fifo_streams']
+        group = f['fifo_streams'][stream_key]
+        assert group.attrs['t_start'] == t_move
+        stream = CombStream.load(group)
+    assert [segment.ramp for segment in stream.segments] == ['static', 'min_jerk', 'static']
+    np.testing.assert_allclose(stream.freqs, freqs_end * 1e6)
+
+    # phases carry over from the stopped comb into the stream, and from the stream into the new comb
+    phases_now = np.mod(old_kwargs['phase'] + 360 * old_kwargs['freq'] * (t_move - 1e-3), 360)
+    np.testing.assert_allclose(stream.segments[0].phases, phases_now)
+    np.testing.assert_allclose(manager.kwargs[0]['phase'], stream.end_phases)
+    np.testing.assert_allclose(manager.kwargs[0]['freq'], freqs_end * 1e6)
+    assert manager.kwargs[0]['output_voltage'] == pytest.approx(old_kwargs['output_voltage'])
@@ -0,0 +1,64 @@
+import h5py
+import numpy as np
+import pytest
+from labscript import compiler as ls_compiler
+
+from labscriptlib.spectrum_programming import CardProgram, LoadedCardProgram, fingerprint, read_card_program
+
+
+@pytest.fixture
+def shot_file(tmp_path, monkeypatch):
+    path = tmp_path / 'shot.h5'
+    h5py.File(path, 'w').close()
+    monkeypatch.setattr(ls_compiler, 'hdf5_filename', str(path))
+    return path
+
+
+def card_program(stop_time=10e-3, freqs=(80e6,)):
+    program = CardProgram('card', {'replay_mode': 'sequence', 'clock_freq': 625})
+    program.start_loop(1e-3, 'comb', 'x', {'freqs': np.array(freqs)})
+    program.stop_loop(stop_time, 'x')
+    program.start_loop(stop_time, 'comb', 'x0', {'freqs': np.array(freqs)})
+    program.stop_loop(stop_time + 2e-3, 'x0')
+    return program
+
+
+def test_fingerprint():
+    kwargs = {'freqs': np.array([80e6, 81e6]), 'phases': [0, 1.5], 'ch': 0}
+    assert fingerprint(kwargs) == fingerprint(dict(reversed(kwargs.items())))
+    assert fingerprint(kwargs) != fingerprint(dict(kwargs, phases=[0, 1.6]))
+    assert fingerprint([1, 'a']) != fingerprint([1, 'b'])
+
+
+def test_step_table_in_fingerprint(shot_file):
+    program = card_program()
+    assert program.fingerprint() == card_program().fingerprint()
+    # same mode and waveforms, only the loop times moved
+    assert program.fingerprint() != card_program(stop_time=20e-3).fingerprint()
+    assert program.fingerprint() != card_program(freqs=(81e6,)).fingerprint()
+
+    card_fingerprint = program.save()
+    with h5py.File(shot_file, 'r') as f:
+        stored_fingerprint, waveforms = read_card_program(f, 'card')
+        assert read_card_program(f, 'other_card') is None
+    assert stored_fingerprint == card_fingerprint
+    assert waveforms['x'] == waveforms['x0']
+
+
+def test_loaded_card_program():
+    loaded = LoadedCardProgram()
+    shot_0 = (card_program().fingerprint(), card_program().waveforms)
+    shot_1 = (card_program(freqs=(81e6,)).fingerprint(), card_program(freqs=(81e6,)).waveforms)
+    assert not loaded.matches(shot_0)
+    assert loaded.changed_waveforms(shot_0) == ['x', 'x0']
+
+    loaded.programmed(shot_0)
+    assert loaded.matches(shot_0)
+    assert not loaded.matches(shot_1)
+    assert loaded.changed_waveforms(shot_1) == ['x', 'x0']
+    assert loaded.changed_waveforms((card_program(stop_time=20e-3).fingerprint(), shot_0[1])) == []
+
+    # after an abort the card is programmed in full, whatever the previous shot was
+    loaded.forget()
+    assert not loaded.matches(shot_0)
+    assert not loaded.matches(None)
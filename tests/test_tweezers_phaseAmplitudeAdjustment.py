@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from labscriptlib.tweezers_phaseAmplitudeAdjustment import (
+    CombCalibrationStore,
+    _crest_factor,
+    _frequency_bins,
+    _schroeder_phases,
+    optimize_comb_phases,
+    trap_amplitude,
+    trap_phase,
+)
+
+
+class TestCombLookup:
+    def test_lookup_ignores_frequency_order(self):
+        freqs = np.arange(58, 88, 0.6)
+        np.testing.assert_array_equal(trap_phase(freqs[::-1]), trap_phase(freqs))
+
+    def test_lookup_returns_arrays(self):
+        freqs = np.arange(58, 88, 0.6)
+        assert isinstance(trap_phase(freqs), np.ndarray)
+        assert trap_amplitude(freqs).shape == freqs.shape
+
+    def test_uncalibrated_comb_names_nearest(self):
+        with pytest.raises(ValueError, match='Nearest calibrated comb has 50 tones'):
+            trap_phase(np.arange(58, 88.6, 0.6))
+
+
+class TestCombCalibrationStore:
+    def test_saved_comb_is_found(self, tmp_path):
+        store = CombCalibrationStore(tmp_path / 'combs.h5')
+        freqs = [70.6, 70.0, 71.2]
+        store.save(freqs, phases=[20, 10, 30], notes='test comb')
+        np.testing.assert_array_equal(store.lookup(freqs, 'phases'), [10, 20, 30])
+        with pytest.raises(ValueError):
+            store.lookup(freqs, 'amplitudes')
+
+        store.save(freqs, amplitudes=[0.8, 0.9, 0.7])
+        np.testing.assert_array_equal(store.lookup(freqs, 'phases'), [10, 20, 30])
+        np.testing.assert_array_equal(store.lookup(freqs, 'amplitudes'), [0.9, 0.8, 0.7])
+
+    def test_other_process_saves_are_picked_up(self, tmp_path):
+        path = tmp_path / 'combs.h5'
+        reader = CombCalibrationStore(path)
+        with pytest.raises(ValueError):
+            reader.lookup([60.0, 61.0], 'phases')
+        CombCalibrationStore(path).save([60.0, 61.0], phases=[0, 90])
+        np.testing.assert_array_equal(reader.lookup([60.0, 61.0], 'phases'), [0, 90])
+
+
+class TestOptimizeCombPhases:
+    def test_beats_schroeder_phases(self):
+        freqs = np.arange(60, 72, 0.6)
+        amplitudes = np.ones(len(freqs))
+        bins = _frequency_bins(freqs)
+        phases = optimize_comb_phases(freqs, n_restarts=4, max_workers=1, seed=0, save=False)
+
+        assert np.all((phases >= 0) & (phases < 360))
+        optimized = _crest_factor(np.radians(phases), amplitudes, bins, 1024)
+        schroeder = _crest_factor(_schroeder_phases(amplitudes), amplitudes, bins, 1024)
+        assert optimized < schroeder
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from labscriptlib.waveform_synthesis import CombSynthesizer, synthesize_comb
+
+
+def naive_comb(freqs, amplitudes, phases, n_samples, sample_rate, start=0):
+    t = np.arange(start, start + n_samples) / sample_rate
+    waveform = sum(a * np.cos(2 * np.pi * f * t + np.deg2rad(p)) for f, a, p in zip(freqs, amplitudes, phases))
+    return waveform / max(np.sum(np.abs(amplitudes)), 1) * np.iinfo(np.int16).max
+
+
+@pytest.fixture
+def comb():
+    rng = np.random.default_rng(0)
+    freqs = np.linspace(70e6, 100e6, 40)
+    return freqs, np.full(40, 1 / 40), rng.uniform(0, 360, 40)
+
+
+def test_matches_naive_sum(comb):
+    samples = synthesize_comb(*comb, n_samples=10_000, sample_rate=625e6)
+    assert samples.dtype == np.int16
+    np.testing.assert_allclose(samples, naive_comb(*comb, 10_000, 625e6), atol=1)
+
+
+def test_start_offset_is_phase_continuous(comb):
+    synthesizer = CombSynthesizer(*comb, sample_rate=625e6, chunk_size=1000)
+    full = synthesizer.render(5000)
+    assert np.array_equal(synthesizer.render(2500, start=2500), full[2500:])
+    np.testing.assert_allclose(
+        synthesizer.render(100, start=10**9), naive_comb(*comb, 100, 625e6, start=10**9), atol=1,
+    )
+
+
+def test_threads_and_out_buffer(comb):
+    synthesizer = CombSynthesizer(*comb, sample_rate=625e6, chunk_size=512)
+    buffer = np.zeros(10_000, dtype=np.int16)
+    out = synthesizer.render(5000, out=buffer[5000:], threads=4)
+    assert np.shares_memory(out, buffer)
+    assert np.array_equal(buffer[5000:], synthesizer.render(5000))
+
+    with pytest.raises(ValueError):
+        synthesizer.render(5000, out=np.zeros(5000))
@@ -0,0 +1,143 @@
+"""Synthesis of static multi-tone comb waveforms into int16 sample buffers.
+
+Summing ``a_k cos(2 pi f_k t + phi_k)`` tone by tone costs a float64 temporary of
+the full waveform length per tone, which dominates for combs of 100+ tones at
+625 MS/s. Here the waveform is computed in chunks as the real part of a single
+complex64 matrix-vector product per chunk:
+
+    samples[n0 + m] = Re( sum_k (a_k e^{i phi_k} e^{2 pi i f_k n0 / fs}) * e^{2 pi i f_k m / fs} )
+
+The table ``e^{2 pi i f_k m / fs}`` over one chunk (``m < chunk_size``) is computed
+once and reused for every chunk; only the per-tone phasor at the chunk start (the
+phase accumulator) is recomputed, in float64 from the absolute sample index, so
+no phase error builds up over long waveforms. Each chunk is scaled in float32 and
+written straight into its slice of the preallocated int16 output, which can be
+handed to the card as is. Chunks are independent and can be computed in threads
+(the matrix product releases the GIL).
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import ClassVar
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+INT16_MAX = np.iinfo(np.int16).max
+
+
+class CombSynthesizer:
+    """Renders a static comb of tones into int16 buffers.
+
+    Parameters
+    ----------
+    freqs : array_like
+        Tone frequencies in Hz.
+    amplitudes : array_like
+        Relative tone amplitudes.
+    phases : array_like
+        Tone phases at sample 0, in degrees.
+    sample_rate : float
+        Sample rate in Hz.
+    chunk_size : int
+        Number of samples computed per matrix product.
+    """
+    CHUNK_SIZE: ClassVar[int] = 4096
+    """Default chunk size; the phase table is ``n_tones * CHUNK_SIZE`` complex64 values"""
+
+    def __init__(
+            self,
+            freqs: ArrayLike,
+            amplitudes: ArrayLike,
+            phases: ArrayLike,
+            sample_rate: float,
+            chunk_size: int | None = None,
+    ):
+        self.freqs = np.atleast_1d(np.asarray(freqs, dtype=float))
+        self.amplitudes = np.broadcast_to(np.asarray(amplitudes, dtype=float), self.freqs.shape)
+        phases = np.broadcast_to(np.asarray(phases, dtype=float), self.freqs.shape)
+        self.sample_rate = sample_rate
+        self.chunk_size = self.CHUNK_SIZE if chunk_size is None else chunk_size
+
+        self._weights = self.amplitudes * np.exp(1j * np.deg2rad(phases))
+        self._cycles_per_sample = self.freqs / sample_rate
+        steps = np.mod(np.outer(self._cycles_per_sample, np.arange(self.chunk_size)), 1)
+        self._step_table = np.exp(2j * np.pi * steps).astype(np.complex64)
+
+    def full_scale(self) -> float:
+        """Scale from relative amplitude to int16 such that no sample can clip."""
+        return INT16_MAX / max(np.abs(self.amplitudes).sum(), 1)
+
+    def render(
+            self,
+            n_samples: int,
+            start: int = 0,
+            out: NDArray[np.int16] | None = None,
+            full_scale: float | None = None,
+            threads: int | None = None,
+    ) -> NDArray[np.int16]:
+        """Samples ``start`` to ``start + n_samples`` of the comb.
+
+        Parameters
+        ----------
+        n_samples : int
+            Number of samples to render.
+        start : int
+            Index of the first sample; sample ``n`` is at time ``n / sample_rate``.
+        out : ndarray of int16, optional
+            Buffer of length ``n_samples`` to write into, e.g. a view of the card
+            buffer. Allocated if not given.
+        full_scale : float, optional
+            int16 value of a relative amplitude of 1. Defaults to ``full_scale()``.
+        threads : int, optional
+            Number of threads to render the chunks in. Rendered in the calling
+            thread if not given or 1.
+
+        Returns
+        -------
+        ndarray of int16
+            ``out``, filled with the samples.
+        """
+        if out is None:
+            out = np.empty(n_samples, dtype=np.int16)
+        elif out.dtype != np.int16 or out.shape != (n_samples,):
+            raise ValueError(f'Output buffer must be int16 of shape ({n_samples},), got {out.dtype} {out.shape}')
+        scale = np.float32(self.full_scale() if full_scale is None else full_scale)
+
+        chunk_starts = range(0, n_samples, self.chunk_size)
+
+        def render_chunk(offset: int):
+            stop = min(offset + self.chunk_size, n_samples)
+            self._render_chunk(start + offset, out[offset:stop], scale)
+
+        if threads is None or threads <= 1:
+            for offset in chunk_starts:
+                render_chunk(offset)
+        else:
+            with ThreadPoolExecutor(threads) as executor:
+                # list() re-raises exceptions from the threads
+                list(executor.map(render_chunk, chunk_starts))
+        return out
+
+    def _render_chunk(self, first_sample: int, out: NDArray[np.int16], scale: np.float32) -> None:
+        n = len(out)
+        accumulated = np.mod(self._cycles_per_sample * first_sample, 1)
+        phasors = (self._weights * np.exp(2j * np.pi * accumulated)).astype(np.complex64)
+        waveform = (phasors @ self._step_table[:, :n]).real
+        waveform *= scale
+        np.rint(waveform, out=waveform)
+        out[...] = waveform
+
+
+def synthesize_comb(
+        freqs: ArrayLike,
+        amplitudes: ArrayLike,
+        phases: ArrayLike,
+        n_samples: int,
+        sample_rate: float,
+        out: NDArray[np.int16] | None = None,
+        threads: int | None = None,
+) -> NDArray[np.int16]:
+    """int16 samples of a static comb, see ``CombSynthesizer``."""
+    synthesizer = CombSynthesizer(freqs, amplitudes, phases, sample_rate)
+    return synthesizer.render(n_samples, out=out, threads=threads)